@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+端到端压测
+
+启动本地模拟服务器（fake_wechat_server.py），将站点基础地址指向它，再通过 MCP 客户端
+以 N 个并发调用方调用工具，覆盖从工具调用、Playwright / HTTP 直连、解析到格式化的完整链路。
+输出延迟分位数（p50/p90/p99）、吞吐量、错误分布和内存占用的 JSON 结果。
+
+默认关闭结果缓存和文章缓存、放宽限流，每次调用使用不同的参数，避免缓存和请求合并掩盖真实开销。
+相应的环境变量如已设置则以环境变量为准。
+
+用法：
+    python benchmarks/bench_e2e.py --tool article --concurrency 8 --requests 200 --latency-ms 100
+    python benchmarks/bench_e2e.py --tool search --captcha-rate 0.05 --output e2e.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fake_wechat_server import FakeServerConfig, FakeWechatServer
+
+TOOLS = ("search", "article", "account", "trending")
+
+TRENDING_CATEGORIES = ("hot", "tech", "finance", "entertainment")
+
+# 压测时的默认配置，环境变量中已有的值优先
+BENCH_ENV = {
+    "WECHAT_SCRAPER_RESULT_CACHE": "false",
+    "WECHAT_SCRAPER_ARTICLE_CACHE": "false",
+    "WECHAT_SCRAPER_RATE_LIMIT": "10000",
+    "WECHAT_SCRAPER_RATE_BURST": "10000",
+}
+
+
+def tool_call(tool: str, index: int) -> tuple:
+    """返回第 index 次调用的工具名和参数，参数各不相同以绕开请求合并"""
+    if tool == "search":
+        return "search_wechat_articles", {"query": f"基准测试 {index}"}
+    if tool == "article":
+        return "get_wechat_article", {"article_id": f"https://mp.weixin.qq.com/s/bench-{index}", "cache": "bypass"}
+    if tool == "account":
+        return "list_wechat_articles_by_account", {"account_name": f"基准公众号 {index}"}
+    return "get_trending_wechat_articles", {"category": TRENDING_CATEGORIES[index % len(TRENDING_CATEGORIES)]}
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def max_rss_mb(who: int) -> float:
+    """进程峰值常驻内存（MB），Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节"""
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+async def run_load(tool: str, concurrency: int, requests: int, timeout: float) -> Dict[str, Any]:
+    """通过进程内 MCP 客户端发起 requests 次调用，最多 concurrency 个同时进行"""
+    from fastmcp import Client
+    from mcp_server_wechat.server import mcp
+    from mcp_server_wechat.utils import get_metrics
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    output_chars = 0
+    counter = iter(range(requests))
+
+    async with Client(mcp, timeout=timeout) as client:
+        async def caller():
+            nonlocal output_chars
+            for index in counter:
+                name, arguments = tool_call(tool, index)
+                started = time.perf_counter()
+                try:
+                    result = await client.call_tool(name, {"input": arguments}, raise_on_error=False)
+                    text = result.content[0].text if result.content else ""
+                    if result.is_error:
+                        # 按错误信息的第一行归类
+                        key = text.splitlines()[0][:80] if text else "unknown"
+                        errors[key] = errors.get(key, 0) + 1
+                    else:
+                        output_chars += len(text)
+                except Exception as e:
+                    key = f"{type(e).__name__}: {str(e)[:60]}"
+                    errors[key] = errors.get(key, 0) + 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "requests": len(latencies),
+        "succeeded": len(latencies) - failed,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (
+                ("mean", sum(latencies) / len(latencies) if latencies else None),
+                ("p50", percentile(latencies, 0.50)),
+                ("p90", percentile(latencies, 0.90)),
+                ("p99", percentile(latencies, 0.99)),
+                ("max", latencies[-1] if latencies else None),
+            )
+        },
+        "output_chars": output_chars,
+        # 服务器记录的各阶段耗时分布
+        "stages": get_metrics().snapshot()["stages"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="基于本地模拟服务器的端到端压测")
+    parser.add_argument("--tool", choices=TOOLS, default="article", help="压测的工具")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发调用方数量")
+    parser.add_argument("--requests", type=int, default=50, help="总调用次数")
+    parser.add_argument("--timeout", type=float, default=120, help="单次工具调用超时（秒）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟服务器的基础延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="模拟服务器的随机附加延迟上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务器返回 HTTP 错误的比例")
+    parser.add_argument("--captcha-rate", type=float, default=0.0, help="模拟服务器重定向到验证页的比例")
+    parser.add_argument("--article-fixture", default="article_medium.html", help="文章详情页使用的页面快照")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--browser-only", action="store_true", help="关闭文章 HTTP 直连，全部经过 Playwright")
+    parser.add_argument("--output", help="将 JSON 结果写入文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        captcha_rate=args.captcha_rate,
+        article_fixture=args.article_fixture,
+        seed=args.seed
+    )
+
+    with FakeWechatServer(config) as server:
+        # 模块在导入时读取环境变量，必须在导入服务器之前设置
+        for name, value in BENCH_ENV.items():
+            os.environ.setdefault(name, value)
+        os.environ["WECHAT_SCRAPER_SOGOU_BASE_URL"] = server.base_url
+        os.environ["WECHAT_SCRAPER_ARTICLE_BASE_URL"] = server.base_url
+        if args.browser_only:
+            os.environ["WECHAT_SCRAPER_HTTP_FAST_PATH"] = "false"
+
+        load = asyncio.run(run_load(args.tool, args.concurrency, args.requests, args.timeout))
+        server_stats = server.stats()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tool": args.tool,
+            "concurrency": args.concurrency,
+            "browser_only": args.browser_only,
+            "env": {name: os.environ[name] for name in sorted(os.environ) if name.startswith("WECHAT_SCRAPER_")},
+        },
+        "load": load,
+        "memory": {
+            "max_rss_mb": round(max_rss_mb(resource.RUSAGE_SELF), 1),
+            # 浏览器子进程退出后才计入
+            "children_max_rss_mb": round(max_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        },
+        "server": server_stats,
+    }
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
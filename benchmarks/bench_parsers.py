@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+"""
+离线解析与格式化基准测试
+
+使用 tests/fixtures 中保存的匿名化页面快照（搜狗搜索页、热门页、公众号页，以及小/中/超大
+三种文章页），测量各解析后端的吞吐量、峰值内存，以及 ResponseFormatter.format_response
+在每种 format/detail 组合下的耗时。结果以 JSON 输出，不需要网络访问。
+
+解析的峰值内存（peak_rss_kb）在独立子进程中以峰值常驻内存（Linux 为 VmHWM，其他平台为
+getrusage 的 ru_maxrss）的增量测量，包含 libxml2 等 C 扩展的分配；tracemalloc 只能看到 Python 对象，其结果记为 python_heap_peak_kb，不能用于比较
+lxml 与 bs4 后端的内存占用。
+
+用法：
+    python benchmarks/bench_parsers.py --output results.json
+    python benchmarks/bench_parsers.py --baseline results.json --threshold 0.2
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import bs4
+import lxml.etree
+
+from mcp_server_wechat.utils.formatters import ResponseFormatter
+from mcp_server_wechat.utils.parsers import (
+    PARSER_BACKENDS,
+    find_account_url,
+    parse_account_articles,
+    parse_article_details,
+    parse_search_results,
+    parse_trending_articles,
+)
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+# 超大文章由中等文章的正文重复生成，避免在仓库中保存数 MB 的页面
+HUGE_ARTICLE_REPEAT = 25
+
+ARTICLE_URL = "https://mp.weixin.qq.com/s/benchmark"
+
+# 峰值常驻内存增加超过该值（KB）且超过阈值比例时才视为回归
+MEMORY_REGRESSION_MIN_KB = 1024
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def build_huge_article(medium: str, repeat: int = HUGE_ARTICLE_REPEAT) -> str:
+    """将中等文章的正文重复 repeat 次，生成超大文章页"""
+    start = medium.index('id="js_content"')
+    start = medium.index(">", start) + 1
+    end = medium.index("</div>", medium.rindex("</p>", start))
+    return medium[:start] + medium[start:end] * repeat + medium[end:]
+
+
+def load_pages() -> Dict[str, str]:
+    """加载所有基准页面"""
+    medium = load_fixture("article_medium.html")
+    return {
+        "search": load_fixture("search.html"),
+        "trending": load_fixture("trending.html"),
+        "account_search": load_fixture("account_search.html"),
+        "account": load_fixture("account.html"),
+        "article_small": load_fixture("article.html"),
+        "article_medium": medium,
+        "article_huge": build_huge_article(medium),
+    }
+
+
+# 页面名 -> 解析函数（接受 html 和 backend）
+PARSE_CASES: Dict[str, Callable[[str, str], Any]] = {
+    "search": lambda html, backend: parse_search_results(html, 50, backend=backend),
+    "trending": lambda html, backend: parse_trending_articles(html, 50, backend=backend),
+    "account_search": lambda html, backend: find_account_url(html, backend=backend),
+    "account": lambda html, backend: parse_account_articles(html, 50, backend=backend),
+    "article_small": lambda html, backend: parse_article_details(html, "id", ARTICLE_URL, True, backend=backend),
+    "article_medium": lambda html, backend: parse_article_details(html, "id", ARTICLE_URL, True, backend=backend),
+    "article_huge": lambda html, backend: parse_article_details(html, "id", ARTICLE_URL, True, backend=backend),
+}
+
+
+def measure(fn: Callable[[], Any], iterations: int, min_seconds: float) -> Dict[str, float]:
+    """
+    重复执行 fn 并统计耗时和 Python 堆峰值
+
+    至少执行 iterations 次，且总耗时至少 min_seconds 秒；Python 堆峰值单独执行一次测量，
+    避免 tracemalloc 的开销影响耗时统计。tracemalloc 看不到 C 扩展的分配，见 measure_rss。
+    """
+    fn()  # 预热
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < iterations or time.perf_counter() - started < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "python_heap_peak_kb": peak / 1024,
+    }
+
+
+def _max_rss_kb() -> float:
+    """当前进程的峰值常驻内存（KB）"""
+    # Linux 的 ru_maxrss 在 fork/execve 后保留父进程的峰值，子进程读到的可能是父进程的值；
+    # /proc 中的 VmHWM 属于 execve 之后新建的地址空间，只反映本进程
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return float(line.split()[1])
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位
+    return usage / 1024 if sys.platform == "darwin" else usage
+
+
+def probe_memory(page_name: str, backend: str):
+    """在子进程中执行：加载页面后解析一次，输出进程峰值常驻内存的增量"""
+    html = load_pages()[page_name]
+    parse = PARSE_CASES[page_name]
+    gc.collect()
+    before = _max_rss_kb()
+    parse(html, backend)
+    print(json.dumps({"peak_rss_kb": _max_rss_kb() - before}))
+
+
+def measure_rss(page_name: str, backend: str) -> Optional[float]:
+    """
+    在新的解释器进程中测量解析一次的峰值常驻内存增量（KB），包含 C 扩展的分配
+
+    每个用例使用独立进程，避免前面用例抬高的峰值掩盖后面的用例；平台不支持 getrusage 时返回 None。
+    """
+    if resource is None:
+        return None
+    output = subprocess.run(
+        [sys.executable, __file__, "--memory-probe", page_name, backend],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["peak_rss_kb"]
+
+
+def bench_parsers(pages: Dict[str, str], backends: List[str], iterations: int, min_seconds: float) -> List[Dict[str, Any]]:
+    """测量每个页面在每个解析后端下的吞吐量、峰值常驻内存增量和 Python 堆峰值"""
+    results = []
+    for page_name, parse in PARSE_CASES.items():
+        html = pages[page_name]
+        size = len(html.encode("utf-8"))
+        for backend in backends:
+            stats = measure(lambda: parse(html, backend), iterations, min_seconds)
+            mean_seconds = stats["mean_ms"] / 1000
+            results.append({
+                "page": page_name,
+                "backend": backend,
+                "bytes": size,
+                **_round(stats),
+                "peak_rss_kb": measure_rss(page_name, backend),
+                "pages_per_second": round(1 / mean_seconds, 2) if mean_seconds else None,
+                "mb_per_second": round(size / 1024 / 1024 / mean_seconds, 2) if mean_seconds else None,
+            })
+    return results
+
+
+def build_format_payloads(pages: Dict[str, str]) -> Dict[str, Any]:
+    """由解析结果构造各工具的响应数据"""
+    articles, total_pages = parse_search_results(pages["search"], 50)
+    medium = parse_article_details(pages["article_medium"], "id", ARTICLE_URL, True)
+    huge = parse_article_details(pages["article_huge"], "id", ARTICLE_URL, True)
+    batch = [dict(medium, article_id=f"id-{i}") for i in range(20)]
+    batch.append({"article_id": "missing", "error": "缓存中没有该文章", "suggestion": "请稍后重试"})
+    return {
+        "search": {
+            "articles": articles,
+            "pagination": {"current_page": 1, "total_pages": total_pages, "total_results": len(articles), "has_more": True},
+            "query": "示例",
+        },
+        "article_medium": medium,
+        "article_huge": huge,
+        "batch": {"articles": batch, "total_results": len(batch), "succeeded": len(batch) - 1, "failed": 1},
+    }
+
+
+def bench_formatter(payloads: Dict[str, Any], iterations: int, min_seconds: float) -> List[Dict[str, Any]]:
+    """测量 format_response 在每种 format/detail 组合下的耗时和峰值内存"""
+    results = []
+    for payload_name, data in payloads.items():
+        for fmt in ("json", "compact", "markdown"):
+            for detail in ("concise", "detailed"):
+                output = ResponseFormatter.format_response(data, format=fmt, detail=detail)
+                stats = measure(
+                    lambda: ResponseFormatter.format_response(data, format=fmt, detail=detail),
+                    iterations,
+                    min_seconds
+                )
+                results.append({
+                    "payload": payload_name,
+                    "format": fmt,
+                    "detail": detail,
+                    "output_chars": len(output),
+                    **_round(stats),
+                })
+    return results
+
+
+def _round(stats: Dict[str, float]) -> Dict[str, float]:
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+
+
+def _case_key(result: Dict[str, Any]) -> Tuple:
+    return tuple((key, result[key]) for key in ("page", "backend", "payload", "format", "detail") if key in result)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    与基线结果对比，返回平均耗时或解析峰值常驻内存增加超过 threshold（比例）的用例
+
+    常驻内存按页分配，小页面的增量波动较大，增加不足 MEMORY_REGRESSION_MIN_KB 时不视为回归。
+    """
+    regressions = []
+    for section in ("parse", "format"):
+        previous = {_case_key(item): item for item in baseline.get(section, [])}
+        for item in results[section]:
+            base = previous.get(_case_key(item))
+            if not base:
+                continue
+            if base.get("mean_ms"):
+                change = item["mean_ms"] / base["mean_ms"] - 1
+                if change > threshold:
+                    regressions.append({
+                        "section": section,
+                        "case": dict(_case_key(item)),
+                        "metric": "mean_ms",
+                        "baseline_mean_ms": base["mean_ms"],
+                        "mean_ms": item["mean_ms"],
+                        "change": round(change, 3),
+                    })
+            rss, base_rss = item.get("peak_rss_kb"), base.get("peak_rss_kb")
+            if rss is not None and base_rss and rss - base_rss > MEMORY_REGRESSION_MIN_KB:
+                change = rss / base_rss - 1
+                if change > threshold:
+                    regressions.append({
+                        "section": section,
+                        "case": dict(_case_key(item)),
+                        "metric": "peak_rss_kb",
+                        "baseline_peak_rss_kb": base_rss,
+                        "peak_rss_kb": rss,
+                        "change": round(change, 3),
+                    })
+    return regressions
+
+
+def run(
+    iterations: int = 20,
+    min_seconds: float = 0.2,
+    backends: Optional[List[str]] = None,
+    formatter: bool = True
+) -> Dict[str, Any]:
+    """执行全部基准测试并返回结果字典"""
+    pages = load_pages()
+    backends = backends or list(PARSER_BACKENDS)
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "lxml": ".".join(str(part) for part in lxml.etree.LXML_VERSION),
+            "bs4": bs4.__version__,
+            "iterations": iterations,
+            "min_seconds": min_seconds,
+            "huge_article_repeat": HUGE_ARTICLE_REPEAT,
+            "memory": {
+                "peak_rss_kb": "每个解析用例在独立进程中解析一次的峰值常驻内存增量，包含 C 扩展分配；小页面的分配可能落在已有内存中而记为 0"
+                               if resource is not None else "当前平台不支持 getrusage，未测量",
+                "python_heap_peak_kb": "tracemalloc 峰值，只含 Python 对象，不含 libxml2 等 C 分配，不能用于比较解析后端",
+            },
+        },
+        "parse": bench_parsers(pages, backends, iterations, min_seconds),
+        "format": bench_formatter(build_format_payloads(pages), iterations, min_seconds) if formatter else [],
+    }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="离线解析与格式化基准测试")
+    parser.add_argument("--iterations", type=int, default=20, help="每个用例最少执行次数")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="每个用例最少执行时间（秒）")
+    parser.add_argument("--backend", action="append", choices=PARSER_BACKENDS, help="只测试指定的解析后端，可重复")
+    parser.add_argument("--skip-formatter", action="store_true", help="跳过格式化基准")
+    parser.add_argument("--output", help="将 JSON 结果写入文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="平均耗时增加超过该比例视为回归")
+    parser.add_argument("--memory-probe", nargs=2, metavar=("PAGE", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.memory_probe:
+        probe_memory(*args.memory_probe)
+        return 0
+
+    results = run(args.iterations, args.min_seconds, args.backend, not args.skip_formatter)
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        results["regressions"] = compare(results, baseline, args.threshold)
+        exit_code = 1 if results["regressions"] else 0
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
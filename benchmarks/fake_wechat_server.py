@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""
+本地模拟搜狗微信 / 微信公众平台服务器
+
+按真实站点的 URL 形式返回 tests/fixtures 中的页面快照，可配置响应延迟、错误率和验证页比例，
+用于在不访问真实站点的情况下对完整链路做端到端压测。一个服务器同时模拟两个站点：
+
+- /weixin?type=2&query=...&page=N   搜索结果页（search.html）
+- /weixin?type=1&query=...          公众号搜索结果页（account_search.html）
+- /gzh?openid=...                   公众号文章列表页（account.html）
+- / 、/pcindex/pc/pc_N/1.html       热门文章页（trending.html）
+- /s?__biz=... 、/s/<短链>           文章详情页（默认 article_medium.html）
+- /link?url=...                     跳转到文章详情页
+
+注入验证页时，搜狗页面重定向到 /antispider/，文章页重定向到 /mp/wappoc_appmsgcaptcha，
+与真实站点的行为一致。
+
+将 WECHAT_SCRAPER_SOGOU_BASE_URL 和 WECHAT_SCRAPER_ARTICLE_BASE_URL 指向本服务器即可：
+
+    python benchmarks/fake_wechat_server.py --port 8765 --latency-ms 200 --captcha-rate 0.05
+    WECHAT_SCRAPER_SOGOU_BASE_URL=http://127.0.0.1:8765 \\
+    WECHAT_SCRAPER_ARTICLE_BASE_URL=http://127.0.0.1:8765 mcp-server-wechat
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+CAPTCHA_SOGOU_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>搜狗搜索</title></head>
+<body><form id="seccodeForm"><img id="seccodeImage" src="/antispider/util/seccode.php">
+<input id="seccodeInput" name="c"></form><p>用户您好，您的访问过于频繁，为确认本次访问为正常用户行为，需要您协助验证。</p>
+</body></html>"""
+
+CAPTCHA_ARTICLE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>环境异常</title></head>
+<body><div id="js_verify"><p>环境异常</p><p>当前环境异常，完成验证后即可继续访问。</p></div></body></html>"""
+
+
+@dataclass
+class FakeServerConfig:
+    """
+    模拟服务器配置
+
+    - latency_ms / jitter_ms: 每个响应的延迟为 latency_ms 加上 [0, jitter_ms) 内的随机值
+    - error_rate: 返回 HTTP 错误（随机选择 500/502/503）的比例
+    - captcha_rate: 重定向到验证页的比例
+    - article_fixture: 文章详情页使用的页面快照
+    - seed: 随机数种子，便于复现
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    captcha_rate: float = 0.0
+    article_fixture: str = "article_medium.html"
+    seed: Optional[int] = None
+
+
+class FakeWechatServer:
+    """
+    在后台线程中运行的模拟服务器
+
+    用法：
+        with FakeWechatServer(FakeServerConfig(latency_ms=50)) as server:
+            client = WechatScraperClient(sogou_base_url=server.base_url, article_base_url=server.base_url)
+    """
+
+    def __init__(self, config: Optional[FakeServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeServerConfig()
+        self.random = random.Random(self.config.seed)
+        self.pages = {
+            name: (FIXTURES / name).read_text(encoding="utf-8")
+            for name in ("search.html", "account_search.html", "account.html", "trending.html", self.config.article_fixture)
+        }
+        self.counters = {"requests": 0, "errors": 0, "captchas": 0, "not_found": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeWechatServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-wechat-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程中运行，直到被中断"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeWechatServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回请求统计和当前配置"""
+        with self._lock:
+            return {**self.counters, "config": asdict(self.config)}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return self.random.random() < rate
+
+    def _delay(self) -> float:
+        with self._lock:
+            jitter = self.random.random() * self.config.jitter_ms
+        return (self.config.latency_ms + jitter) / 1000
+
+    def route(self, path: str, query: Dict[str, str]) -> Tuple[int, Dict[str, str], str]:
+        """
+        按 URL 返回响应，不包括延迟和故障注入
+
+        Returns:
+            (状态码, 响应头, 响应体)
+        """
+        if path == "/weixin":
+            page = "account_search.html" if query.get("type") == "1" else "search.html"
+            return 200, {}, self.pages[page]
+        if path == "/gzh":
+            return 200, {}, self.pages["account.html"]
+        if path == "/" or path.startswith("/pcindex/"):
+            return 200, {}, self.pages["trending.html"]
+        if path == "/s" or path.startswith("/s/"):
+            return 200, {}, self.pages[self.config.article_fixture]
+        if path == "/link":
+            return 302, {"Location": f"/s?src=11&link={quote(query.get('url', ''))}"}, ""
+        if path.startswith("/antispider"):
+            return 200, {}, CAPTCHA_SOGOU_HTML
+        if path.startswith("/mp/wappoc_appmsgcaptcha"):
+            return 200, {}, CAPTCHA_ARTICLE_HTML
+        return 404, {}, "not found"
+
+    def handle(self, raw_path: str) -> Tuple[int, Dict[str, str], str]:
+        """按配置注入延迟、错误和验证页后返回响应"""
+        parsed = urlparse(raw_path)
+        path = parsed.path
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        self._count("requests")
+
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        is_captcha_page = path.startswith("/antispider") or path.startswith("/mp/wappoc_appmsgcaptcha")
+        if not is_captcha_page:
+            if self._roll(self.config.error_rate):
+                self._count("errors")
+                with self._lock:
+                    status = self.random.choice((500, 502, 503))
+                return status, {}, "injected error"
+            if self._roll(self.config.captcha_rate):
+                self._count("captchas")
+                target = "/mp/wappoc_appmsgcaptcha" if path == "/s" or path.startswith("/s/") else "/antispider/"
+                return 302, {"Location": f"{target}?from={quote(raw_path)}"}, ""
+
+        status, headers, body = self.route(path, query)
+        if status == 404:
+            self._count("not_found")
+        return status, headers, body
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path == "/__stats":
+                    status, headers, body = 200, {"Content-Type": "application/json"}, json.dumps(server.stats())
+                else:
+                    status, headers, body = server.handle(self.path)
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", headers.pop("Content-Type", "text/html; charset=utf-8"))
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本地模拟搜狗微信 / 微信公众平台服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个响应的基础延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="随机附加延迟的上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 错误的比例")
+    parser.add_argument("--captcha-rate", type=float, default=0.0, help="重定向到验证页的比例")
+    parser.add_argument("--article-fixture", default="article_medium.html", help="文章详情页使用的页面快照")
+    parser.add_argument("--seed", type=int, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        captcha_rate=args.captcha_rate,
+        article_fixture=args.article_fixture,
+        seed=args.seed
+    )
+    server = FakeWechatServer(config, args.host, args.port)
+    print(f"模拟服务器已启动: {server.base_url}（统计信息见 {server.base_url}/__stats）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
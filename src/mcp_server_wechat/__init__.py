@@ -1,6 +1,18 @@
 """
 微信文章 MCP 服务器
 """
-from .server import mcp
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["mcp"]
\ No newline at end of file
+__all__ = ["mcp"]
+
+
+def __getattr__(name: str) -> Any:
+    # 按需导入服务器，使 mcp_server_wechat.startup 等子模块可以单独导入
+    if name == "mcp":
+        from .server import mcp
+        return mcp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if TYPE_CHECKING:
+    from .server import mcp
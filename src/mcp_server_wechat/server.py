@@ -1,13 +1,117 @@
 """
 微信文章 MCP 服务器
 """
+import sys
+import json
+import logging
+import argparse
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import Any, Optional
+
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
-# 导入工具
+# 导入工具（只加载输入模型，爬虫依赖在首次调用时导入）
 from .tools.search import search_wechat_articles
 from .tools.article import get_wechat_article
+from .tools.article_batch import get_wechat_articles_batch
 from .tools.account import list_wechat_articles_by_account
 from .tools.trending import get_trending_wechat_articles
+from .tools.local_search import search_local_articles
+from .utils import (
+    get_article_cache,
+    get_article_index,
+    get_content_store,
+    get_metrics,
+    get_offloader,
+    get_rate_limiter,
+    get_result_cache,
+    get_retry_stats,
+    get_single_flight,
+    use_shared_cache,
+)
+from .startup import PREWARM_ENABLED, measure_startup, start_prewarm
+
+
+def _loaded(module: str) -> Optional[ModuleType]:
+    """已导入的 utils 子模块，尚未导入时返回 None（对应组件从未使用过）"""
+    return sys.modules.get(f"{__package__}.utils.{module}")
+
+
+def _browser_manager() -> Optional[Any]:
+    """共享浏览器管理器，浏览器模块尚未导入时返回 None，不为此导入 Playwright"""
+    browser = _loaded("browser")
+    return browser.get_browser_manager() if browser is not None else None
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """服务器生命周期：共享浏览器、HTTP 连接池和解析执行器按需启动，退出时关闭已经启动的组件"""
+    browser_manager = _browser_manager()
+    if browser_manager is not None:
+        browser_manager.reset()
+    try:
+        yield
+    finally:
+        http_fetcher = _loaded("http_fetcher")
+        if http_fetcher is not None:
+            await http_fetcher.get_http_fetcher().aclose()
+        browser_manager = _browser_manager()
+        if browser_manager is not None:
+            await browser_manager.shutdown()
+        get_offloader().shutdown()
+
+
+class PrewarmMiddleware(Middleware):
+    """
+    MCP 握手完成后在后台预热爬虫模块和共享浏览器
+
+    较早的协议版本以 initialize 握手，较新的版本以 server/discover 握手，两者都会触发预热（只执行一次）。
+    """
+
+    async def on_initialize(self, context, call_next):
+        result = await call_next(context)
+        start_prewarm()
+        return result
+
+    async def on_discover(self, context, call_next):
+        result = await call_next(context)
+        start_prewarm()
+        return result
+
+
+def _rate_limit_stats():
+    """按指标名汇总各域名的限流与熔断统计"""
+    stats = get_rate_limiter().stats()
+    keys = ("acquired", "waits", "wait_seconds", "circuit_opened", "circuit_rejected")
+    return {key: {host: values[key] for host, values in stats.items()} for key in keys}
+
+
+def _optional_stats(get):
+    """未启用的组件返回空统计"""
+    return lambda: get().stats() if get() is not None else {}
+
+
+def register_metric_collectors():
+    """注册读取指标时收集的已有统计（缓存命中、重试、限流、页面池等待等）"""
+    metrics = get_metrics()
+    metrics.register_collector("page_pool", _optional_stats(lambda: getattr(_browser_manager(), "page_pool", None)))
+    metrics.register_collector("resource_blocker", _optional_stats(lambda: getattr(_browser_manager(), "resource_blocker", None)))
+    metrics.register_collector("result_cache", _optional_stats(get_result_cache))
+    metrics.register_collector("article_cache", _optional_stats(get_article_cache))
+    metrics.register_collector("local_index", _optional_stats(get_article_index))
+    metrics.register_collector("content_store", lambda: get_content_store().stats())
+    metrics.register_collector("single_flight", lambda: get_single_flight().stats())
+    metrics.register_collector("retry", lambda: get_retry_stats().snapshot())
+    metrics.register_collector("rate_limit", _rate_limit_stats)
+    metrics.register_collector("offload", lambda: get_offloader().stats())
+
+
+register_metric_collectors()
+
 
 # 创建 FastMCP 实例
 mcp = FastMCP(
@@ -19,9 +123,12 @@ mcp = FastMCP(
     2. 获取文章详情 (get_wechat_article)
     3. 按公众号获取文章列表 (list_wechat_articles_by_account)
     4. 获取热门文章 (get_trending_wechat_articles)
+    5. 批量获取文章详情 (get_wechat_articles_batch)
+    6. 检索本地已抓取的文章 (search_local_articles)：不访问搜狗，毫秒级返回
     
     所有工具都支持 JSON 和 Markdown 格式的响应。
-    """
+    """,
+    lifespan=lifespan
 )
 
 # 注册工具
@@ -57,13 +164,115 @@ mcp.tool(
     }
 )(get_trending_wechat_articles)
 
+mcp.tool(
+    annotations={
+        "readOnlyHint": True,
+        "idempotentHint": True,
+        "openWorldHint": True
+    }
+)(get_wechat_articles_batch)
+
+mcp.tool(
+    annotations={
+        "readOnlyHint": True,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)(search_local_articles)
+
+# 注册指标资源：各阶段耗时直方图、计数器和已有统计
+@mcp.resource(
+    "wechat://metrics",
+    name="scraper_metrics",
+    description="各工具各阶段（浏览器启动、页面池等待、导航、等待选择器、解析、格式化等）的耗时分布，以及缓存命中、重试、验证页、页面池等待等计数",
+    mime_type="application/json"
+)
+def scraper_metrics() -> str:
+    return json.dumps(get_metrics().snapshot(), ensure_ascii=False)
+
+
+# HTTP 传输模式下提供 Prometheus 抓取端点
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(get_metrics().render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+_prewarm_enabled = False
+
+
+def enable_prewarm():
+    """启用握手后的后台预热（重复调用无副作用）"""
+    global _prewarm_enabled
+    if not _prewarm_enabled:
+        mcp.add_middleware(PrewarmMiddleware())
+        _prewarm_enabled = True
+
+
+if PREWARM_ENABLED:
+    enable_prewarm()
+
+
 def main():
     """命令行入口点"""
-    # 使用 STDIO 传输协议（默认，用于本地/Claude Desktop）
-    mcp.run()
+    parser = argparse.ArgumentParser(description="微信文章 MCP 服务器")
+    parser.add_argument(
+        "--transport",
+        choices=("stdio", "http"),
+        default="stdio",
+        help="传输协议：stdio（默认，用于本地/Claude Desktop）或 http（远程访问/多客户端，同时提供 /metrics）"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 模式的监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP 模式的监听端口")
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        default=PREWARM_ENABLED,
+        help="握手完成后在后台导入爬虫模块并启动浏览器，缩短第一次工具调用的耗时（WECHAT_SCRAPER_PREWARM）"
+    )
+    parser.add_argument(
+        "--measure-startup",
+        action="store_true",
+        help="在新进程中测量启动各阶段（导入、工具列表、浏览器启动）的耗时，输出 JSON 后退出"
+    )
+    parser.add_argument("--no-browser", action="store_true", help="与 --measure-startup 一起使用，不测量浏览器启动")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="HTTP 模式的工作进程数，大于 1 时各进程共享监听端口，各自运行浏览器，并通过共享结果缓存避免重复抓取"
+    )
+    parser.add_argument(
+        "--shared-cache",
+        metavar="PATH",
+        help="共享结果缓存的 SQLite 文件路径，同一主机上的多个服务器进程共享搜索/公众号/热门结果"
+             "（WECHAT_SCRAPER_SHARED_CACHE_PATH；多进程模式默认 ~/.cache/mcp-server-wechat/results.db）"
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers 必须大于等于 1")
+    if args.workers > 1 and args.transport != "http":
+        parser.error("--workers 大于 1 时需要 --transport http")
 
-if __name__ == "__main__":
-    main()
+    if args.measure_startup:
+        print(json.dumps(measure_startup(launch_browser=not args.no_browser), indent=2, ensure_ascii=False))
+        return
+
+    # 日志输出到标准错误，stdio 模式下不干扰协议消息
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.workers > 1:
+        from .workers import serve
+        serve(args.host, args.port, args.workers, shared_cache=args.shared_cache, prewarm=args.prewarm)
+        return
 
-    # 如需使用 HTTP 传输协议（用于远程访问/多客户端）
-    # mcp.run(transport="http", host="127.0.0.1", port=8000)
\ No newline at end of file
+    if args.shared_cache:
+        use_shared_cache(args.shared_cache)
+    if args.prewarm:
+        enable_prewarm()
+
+    if args.transport == "http":
+        mcp.run(transport="http", host=args.host, port=args.port)
+    else:
+        mcp.run()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
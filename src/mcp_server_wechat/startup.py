@@ -0,0 +1,130 @@
+"""
+启动优化与启动耗时测量
+
+stdio 客户端每个会话都会启动一个服务器进程，启动耗时对用户可见。
+注册工具只需要输入模型，Playwright、lxml、BeautifulSoup、httpx 等爬虫依赖在第一次调用工具时才导入。
+
+- 预热（WECHAT_SCRAPER_PREWARM 或 --prewarm）：MCP 握手完成后，在后台线程中导入爬虫模块，
+  然后启动共享浏览器并填满页面池，使第一次工具调用不再承担导入、Chromium 启动和创建标签页的开销
+- --measure-startup：在新的解释器进程中依次导入各部分并启动浏览器，输出各阶段耗时
+
+本模块只依赖标准库，测量子进程导入它时不会提前加载被测量的模块。
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import subprocess
+from importlib import import_module
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("startup")
+
+# 环境变量配置
+PREWARM_ENABLED = os.getenv("WECHAT_SCRAPER_PREWARM", "false").lower() == "true"
+
+# 导入后即可处理所有工具调用的模块
+SCRAPER_MODULE = "mcp_server_wechat.utils.wechat_client"
+
+# 测量时依次导入的阶段：阶段名 -> 模块，每个阶段只计入此前尚未导入的部分
+IMPORT_PHASES = (
+    ("import_fastmcp", "fastmcp.server.server"),
+    ("import_server", "mcp_server_wechat.server"),
+    ("import_playwright", "playwright.async_api"),
+    ("import_httpx", "httpx"),
+    ("import_lxml", "lxml.html"),
+    ("import_bs4", "bs4"),
+    ("import_scraper", SCRAPER_MODULE),
+)
+
+_prewarm_task: Optional[asyncio.Task] = None
+
+
+async def prewarm():
+    """在后台导入爬虫模块、启动共享浏览器并预先创建页面，失败只记录日志，首次工具调用时会重新尝试"""
+    try:
+        # 导入耗时数百毫秒，放到线程中执行，不阻塞握手之后的请求
+        await asyncio.to_thread(import_module, SCRAPER_MODULE)
+        from .utils import get_browser_manager
+        browser_manager = get_browser_manager()
+        await browser_manager.get_context()
+        created = await browser_manager.page_pool.prewarm()
+        logger.info(f"浏览器预热完成，预先创建 {created} 个页面")
+    except Exception as e:
+        logger.warning(f"浏览器预热失败: {str(e)}")
+
+
+def start_prewarm() -> asyncio.Task:
+    """启动后台预热，进程内只执行一次"""
+    global _prewarm_task
+    if _prewarm_task is None:
+        _prewarm_task = asyncio.get_running_loop().create_task(prewarm())
+    return _prewarm_task
+
+
+def _probe(launch_browser: bool):
+    """在测量子进程中执行：依次导入各阶段并启动浏览器，以 JSON 输出到标准输出"""
+    result: Dict[str, Any] = {"started_at": time.time(), "phases_ms": {}}
+    for phase, module in IMPORT_PHASES:
+        started = time.perf_counter()
+        import_module(module)
+        result["phases_ms"][phase] = round((time.perf_counter() - started) * 1000, 1)
+
+    from mcp_server_wechat.server import mcp
+    started = time.perf_counter()
+    tools = asyncio.run(mcp.list_tools())
+    result["phases_ms"]["list_tools"] = round((time.perf_counter() - started) * 1000, 1)
+    result["tools"] = len(tools)
+
+    if launch_browser:
+        from mcp_server_wechat.utils import get_browser_manager
+
+        async def launch():
+            manager = get_browser_manager()
+            try:
+                await manager.get_context()
+            finally:
+                await manager.shutdown()
+
+        started = time.perf_counter()
+        try:
+            asyncio.run(launch())
+        except Exception as e:
+            result["browser_launch_error"] = str(e)
+        result["phases_ms"]["browser_launch"] = round((time.perf_counter() - started) * 1000, 1)
+
+    print(json.dumps(result))
+
+
+def measure_startup(launch_browser: bool = True) -> Dict[str, Any]:
+    """
+    在新的解释器进程中测量启动各阶段的耗时
+
+    Args:
+        launch_browser: 是否测量 Chromium 启动
+
+    Returns:
+        各阶段耗时（毫秒），ready_ms 为可以响应握手和工具列表的时间，
+        first_call_ms 为第一次工具调用前还需的导入和浏览器启动时间
+    """
+    code = f"from mcp_server_wechat.startup import _probe; _probe({launch_browser!r})"
+    # 子进程导入与当前进程相同的包
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    python_path = os.pathsep.join(filter(None, (package_root, os.environ.get("PYTHONPATH"))))
+    env = {**os.environ, "PYTHONPATH": python_path, "WECHAT_SCRAPER_PREWARM": "false"}
+    spawned = time.time()
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env).stdout
+    total_ms = (time.time() - spawned) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+
+    phases = {"interpreter": round((result.pop("started_at") - spawned) * 1000, 1), **result.pop("phases_ms")}
+    ready = ("interpreter", "import_fastmcp", "import_server", "list_tools")
+    return {
+        "phases_ms": phases,
+        "ready_ms": round(sum(phases[name] for name in ready), 1),
+        "first_call_ms": round(sum(value for name, value in phases.items() if name not in ready), 1),
+        "total_ms": round(total_ms, 1),
+        **result,
+    }
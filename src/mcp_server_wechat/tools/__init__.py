@@ -3,12 +3,16 @@
 """
 from .search import search_wechat_articles
 from .article import get_wechat_article
+from .article_batch import get_wechat_articles_batch
 from .account import list_wechat_articles_by_account
 from .trending import get_trending_wechat_articles
+from .local_search import search_local_articles
 
 __all__ = [
     "search_wechat_articles",
     "get_wechat_article",
     "list_wechat_articles_by_account",
-    "get_trending_wechat_articles"
+    "get_trending_wechat_articles",
+    "get_wechat_articles_batch",
+    "search_local_articles"
 ]
\ No newline at end of file
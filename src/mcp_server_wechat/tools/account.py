@@ -1,10 +1,19 @@
 """
 按公众号获取文章列表工具
 """
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
-from ..utils import WechatScraperClient, ResponseFormatter, MCPError
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_result_cache,
+    get_single_flight,
+    get_rate_limiter,
+    get_offloader,
+    get_metrics,
+    ArticleField,
+)
 
 class ListWechatArticlesByAccountInput(BaseModel):
     """按公众号获取文章列表输入模型"""
@@ -23,9 +32,9 @@ class ListWechatArticlesByAccountInput(BaseModel):
         description="返回结果数量限制 (1-50)"
     )
     
-    format: Literal["json", "markdown"] = Field(
+    format: Literal["json", "markdown", "compact"] = Field(
         default="json",
-        description="响应格式：'json' 或 'markdown'"
+        description="响应格式：'json'、'markdown' 或 'compact'（无缩进的列式 JSON，字段名只出现一次，每篇文章一行数组）"
     )
     
     detail: Literal["concise", "detailed"] = Field(
@@ -33,6 +42,17 @@ class ListWechatArticlesByAccountInput(BaseModel):
         description="详细程度：'concise' 返回摘要信息，'detailed' 返回完整信息"
     )
 
+    continuation: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_continuation，用于获取因超出长度限制而未返回的后续文章"
+    )
+
+    fields: Optional[List[ArticleField]] = Field(
+        default=None,
+        min_length=1,
+        description="每篇文章只返回指定字段（仅对 json 和 compact 生效），例如 ['title', 'url']"
+    )
+
 async def list_wechat_articles_by_account(input: ListWechatArticlesByAccountInput) -> str:
     """
     按公众号获取文章列表
@@ -42,8 +62,10 @@ async def list_wechat_articles_by_account(input: ListWechatArticlesByAccountInpu
     Args:
         account_name: 公众号名称，例如：'人民日报'、'腾讯科技'
         limit: 返回结果数量限制 (1-50)
-        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本
+        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本，"compact" 返回列式 JSON
         detail: "concise" 返回摘要信息，"detailed" 返回完整信息
+        continuation: 上一次响应中的 next_continuation，用于获取后续文章
+        fields: 每篇文章只返回的字段，例如 ["title", "url"]
     
     Returns:
         指定公众号的文章列表，包含标题、摘要、发布时间等信息
@@ -58,29 +80,41 @@ async def list_wechat_articles_by_account(input: ListWechatArticlesByAccountInpu
         - 访问频率限制: 等待一段时间后重试
         - 网络错误: 检查网络连接
     """
-    try:
-        async with WechatScraperClient() as client:
-            # 调用爬虫客户端获取公众号文章列表
-            results = await client.list_articles_by_account(
-                account_name=input.account_name,
-                limit=input.limit
-            )
+    # 爬虫客户端依赖 Playwright、lxml 等，首次调用时才导入，注册工具时不加载
+    from ..utils import WechatScraperClient, get_browser_manager
+
+    with get_metrics().tool("list_wechat_articles_by_account"):
+        try:
+            async with WechatScraperClient(
+                browser_manager=get_browser_manager(),
+                result_cache=get_result_cache(),
+                single_flight=get_single_flight(),
+                rate_limiter=get_rate_limiter(),
+                offloader=get_offloader()
+            ) as client:
+                # 调用爬虫客户端获取公众号文章列表
+                results = await client.list_articles_by_account(
+                    account_name=input.account_name,
+                    limit=input.limit
+                )
             
-            # 格式化响应
-            response = ResponseFormatter.format_response(
-                data=results,
-                format=input.format,
-                detail=input.detail
-            )
+                # 格式化响应
+                response = await ResponseFormatter.format_response_async(
+                    data=results,
+                    format=input.format,
+                    detail=input.detail,
+                    continuation=input.continuation,
+                    fields=input.fields
+                )
             
-            return response
+                return response
             
-    except MCPError:
-        # MCPError 已经包含可操作的建议，直接抛出
-        raise
-    except Exception as e:
-        # 其他异常转换为 MCPError
-        raise MCPError(
-            message=f"获取公众号文章列表时发生未预期的错误: {str(e)}",
-            suggestion="请检查公众号名称是否正确，网络连接是否正常，并稍后重试"
-        )
\ No newline at end of file
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"获取公众号文章列表时发生未预期的错误: {str(e)}",
+                suggestion="请检查公众号名称是否正确，网络连接是否正常，并稍后重试"
+            )
\ No newline at end of file
@@ -4,7 +4,18 @@
 from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
-from ..utils import WechatScraperClient, ResponseFormatter, MCPError
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_article_cache,
+    get_article_index,
+    get_single_flight,
+    get_rate_limiter,
+    get_offloader,
+    get_metrics,
+    get_content_store,
+    ARTICLE_CHUNK_CHARS,
+)
 
 class GetWechatArticleInput(BaseModel):
     """获取微信文章详情输入模型"""
@@ -25,6 +36,29 @@ class GetWechatArticleInput(BaseModel):
         default="json",
         description="响应格式：'json' 或 'markdown'"
     )
+    
+    cache: Literal["prefer", "bypass", "only"] = Field(
+        default="prefer",
+        description="缓存策略：'prefer' 优先使用未过期的缓存，'bypass' 跳过缓存重新抓取，'only' 只读缓存（含已过期条目）"
+    )
+    
+    offset: int = Field(
+        default=0,
+        ge=0,
+        description="正文起始位置（字符），用于从指定位置读取正文"
+    )
+    
+    max_chars: int = Field(
+        default=ARTICLE_CHUNK_CHARS,
+        ge=1000,
+        le=80000,
+        description="本次最多返回的正文字符数 (1000-80000)，超出部分通过 next_cursor 继续获取"
+    )
+    
+    cursor: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_cursor，用于获取正文的下一段（不会重新抓取页面），指定后忽略 offset 和 max_chars"
+    )
 
 async def get_wechat_article(input: GetWechatArticleInput) -> str:
     """
@@ -36,43 +70,74 @@ async def get_wechat_article(input: GetWechatArticleInput) -> str:
         article_id: 文章ID或完整URL
         include_content: 是否包含文章正文内容
         format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本
+        cache: 缓存策略 - "prefer" 优先使用缓存，"bypass" 重新抓取，"only" 只读缓存
+        offset: 正文起始位置（字符）
+        max_chars: 本次最多返回的正文字符数
+        cursor: 上一次响应中的 next_cursor，用于获取正文的下一段
     
     Returns:
-        文章详细信息，包括标题、作者、发布时间、正文内容等
+        文章详细信息，包括标题、作者、发布时间、正文内容等；
+        正文较长时只返回一段，content_range 给出本段位置，next_cursor 用于获取下一段
     
     Examples:
         get_wechat_article(article_id="https://mp.weixin.qq.com/s?__biz=MzIwMzA5NTI3NQ==&mid=2649914567")
         get_wechat_article(article_id="MzIwMzA5NTI3NQ==", include_content=False, format="markdown")
+        get_wechat_article(article_id="https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw", cache="bypass")
+        get_wechat_article(article_id="https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw", cursor="<上一次响应中的 next_cursor>")
     
     错误处理:
         - 无效文章ID: 提供有效的文章ID或URL
         - 文章不存在: 确认文章ID是否正确
         - 访问频率限制: 等待一段时间后重试
         - 网络错误: 检查网络连接
+        - cursor 失效: 不带 cursor 重新获取文章的第一段
     """
-    try:
-        async with WechatScraperClient() as client:
-            # 调用爬虫客户端获取文章详情
-            article = await client.get_article_details(
-                article_id=input.article_id,
-                include_content=input.include_content
-            )
+    # 爬虫客户端依赖 Playwright、lxml 等，首次调用时才导入，注册工具时不加载
+    from ..utils import WechatScraperClient, get_browser_manager, get_http_fetcher
+
+    with get_metrics().tool("get_wechat_article"):
+        try:
+            async with WechatScraperClient(
+                browser_manager=get_browser_manager(),
+                http_fetcher=get_http_fetcher(),
+                article_cache=get_article_cache(),
+                article_index=get_article_index(),
+                single_flight=get_single_flight(),
+                rate_limiter=get_rate_limiter(),
+                offloader=get_offloader(),
+                content_store=get_content_store()
+            ) as client:
+                # 调用爬虫客户端获取文章详情，包含正文时分段返回
+                if input.include_content:
+                    article = await client.get_article_chunk(
+                        article_id=input.article_id,
+                        offset=input.offset,
+                        max_chars=input.max_chars,
+                        cursor=input.cursor,
+                        cache_mode=input.cache
+                    )
+                else:
+                    article = await client.get_article_details(
+                        article_id=input.article_id,
+                        include_content=False,
+                        cache_mode=input.cache
+                    )
             
-            # 格式化响应
-            response = ResponseFormatter.format_response(
-                data=article,
-                format=input.format,
-                detail="detailed"  # 文章详情始终使用详细模式
-            )
+                # 格式化响应
+                response = await ResponseFormatter.format_response_async(
+                    data=article,
+                    format=input.format,
+                    detail="detailed"  # 文章详情始终使用详细模式
+                )
             
-            return response
+                return response
             
-    except MCPError:
-        # MCPError 已经包含可操作的建议，直接抛出
-        raise
-    except Exception as e:
-        # 其他异常转换为 MCPError
-        raise MCPError(
-            message=f"获取文章详情时发生未预期的错误: {str(e)}",
-            suggestion="请检查文章ID是否正确，网络连接是否正常，并稍后重试"
-        )
\ No newline at end of file
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"获取文章详情时发生未预期的错误: {str(e)}",
+                suggestion="请检查文章ID是否正确，网络连接是否正常，并稍后重试"
+            )
\ No newline at end of file
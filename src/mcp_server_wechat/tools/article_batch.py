@@ -0,0 +1,151 @@
+"""
+批量获取微信文章详情工具
+"""
+import os
+import asyncio
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_article_cache,
+    get_article_index,
+    get_single_flight,
+    get_rate_limiter,
+    get_offloader,
+    get_metrics,
+)
+
+# 环境变量配置
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("WECHAT_SCRAPER_BATCH_CONCURRENCY", "5"))
+
+class GetWechatArticlesBatchInput(BaseModel):
+    """批量获取微信文章详情输入模型"""
+    model_config = {"extra": "forbid"}
+
+    article_ids: List[str] = Field(
+        description="文章ID或URL列表 (1-500)",
+        min_length=1,
+        max_length=500,
+        examples=[["https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw", "MzIwMzA5NTI3NQ=="]]
+    )
+
+    include_content: bool = Field(
+        default=False,
+        description="是否包含文章正文内容"
+    )
+
+    concurrency: int = Field(
+        default=DEFAULT_BATCH_CONCURRENCY,
+        ge=1,
+        le=20,
+        description="最大并发抓取数量 (1-20)"
+    )
+
+    cache: Literal["prefer", "bypass", "only"] = Field(
+        default="prefer",
+        description="缓存策略：'prefer' 优先使用未过期的缓存，'bypass' 跳过缓存重新抓取，'only' 只读缓存（含已过期条目）"
+    )
+
+    format: Literal["json", "markdown"] = Field(
+        default="json",
+        description="响应格式：'json' 或 'markdown'"
+    )
+
+    detail: Literal["concise", "detailed"] = Field(
+        default="concise",
+        description="详细程度：'concise' 返回摘要信息，'detailed' 返回完整信息"
+    )
+
+    continuation: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_continuation，用于获取因超出长度限制而未返回的后续文章"
+    )
+
+async def get_wechat_articles_batch(input: GetWechatArticlesBatchInput) -> str:
+    """
+    批量获取微信文章详情
+
+    并发获取多篇微信文章的详细信息，结果按输入顺序返回，单篇失败不影响其他文章。
+
+    Args:
+        article_ids: 文章ID或完整URL列表 (1-500)
+        include_content: 是否包含文章正文内容
+        concurrency: 最大并发抓取数量 (1-20)
+        cache: 缓存策略 - "prefer" 优先使用缓存，"bypass" 重新抓取，"only" 只读缓存
+        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本
+        detail: "concise" 返回摘要信息，"detailed" 返回完整信息
+        continuation: 上一次响应中的 next_continuation，用于获取后续文章
+
+    Returns:
+        按输入顺序排列的文章列表，获取失败的文章包含 error 和 suggestion 字段
+
+    Examples:
+        get_wechat_articles_batch(article_ids=["https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw"])
+        get_wechat_articles_batch(article_ids=[...], include_content=True, concurrency=8, format="markdown", detail="detailed")
+
+    错误处理:
+        - 单篇文章失败: 在对应条目中返回错误信息和建议
+        - 访问频率限制: 降低 concurrency 或等待一段时间后重试
+        - 网络错误: 检查网络连接
+    """
+    # 爬虫客户端依赖 Playwright、lxml 等，首次调用时才导入，注册工具时不加载
+    from ..utils import WechatScraperClient, get_browser_manager, get_http_fetcher
+
+    with get_metrics().tool("get_wechat_articles_batch"):
+        try:
+            async with WechatScraperClient(
+                browser_manager=get_browser_manager(),
+                http_fetcher=get_http_fetcher(),
+                article_cache=get_article_cache(),
+                article_index=get_article_index(),
+                single_flight=get_single_flight(),
+                rate_limiter=get_rate_limiter(),
+                offloader=get_offloader()
+            ) as client:
+                semaphore = asyncio.Semaphore(input.concurrency)
+
+                async def fetch_one(article_id: str) -> Dict[str, Any]:
+                    async with semaphore:
+                        try:
+                            return await client.get_article_details(
+                                article_id=article_id,
+                                include_content=input.include_content,
+                                cache_mode=input.cache
+                            )
+                        except MCPError as e:
+                            return {"article_id": article_id, "error": e.message, "suggestion": e.suggestion}
+                        except Exception as e:
+                            return {"article_id": article_id, "error": str(e), "suggestion": "请检查文章ID是否正确并稍后重试"}
+
+                # 并发获取，gather 保持输入顺序
+                articles = await asyncio.gather(*(fetch_one(article_id) for article_id in input.article_ids))
+                failed = sum(1 for article in articles if "error" in article)
+
+                results = {
+                    "articles": articles,
+                    "total_results": len(articles),
+                    "succeeded": len(articles) - failed,
+                    "failed": failed
+                }
+
+                # 格式化响应
+                response = await ResponseFormatter.format_response_async(
+                    data=results,
+                    format=input.format,
+                    detail=input.detail,
+                    continuation=input.continuation
+                )
+
+                return response
+
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"批量获取文章详情时发生未预期的错误: {str(e)}",
+                suggestion="请检查文章ID列表是否正确，网络连接是否正常，并稍后重试"
+            )
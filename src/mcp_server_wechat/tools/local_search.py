@@ -0,0 +1,146 @@
+"""
+检索本地已抓取文章工具
+"""
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_article_index,
+    get_metrics,
+    ArticleField,
+)
+
+class SearchLocalArticlesInput(BaseModel):
+    """检索本地文章输入模型"""
+    model_config = {"extra": "forbid"}
+
+    query: str = Field(
+        description="检索词，多个词以空格分隔时需要同时命中，例如：'人工智能 医疗'",
+        min_length=1,
+        max_length=100,
+        examples=["人工智能 医疗", "大模型"]
+    )
+
+    account: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        description="只返回该公众号的文章，例如：'人民日报'"
+    )
+
+    since: Optional[str] = Field(
+        default=None,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="发布日期下限（YYYY-MM-DD，含当天）；无法识别发布时间的文章不参与时间过滤"
+    )
+
+    until: Optional[str] = Field(
+        default=None,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="发布日期上限（YYYY-MM-DD，含当天）"
+    )
+
+    sort: Literal["relevance", "newest"] = Field(
+        default="relevance",
+        description="排序方式：'relevance' 按相关度（标题命中权重更高），'newest' 按发布时间倒序"
+    )
+
+    limit: int = Field(
+        default=10,
+        ge=1,
+        le=50,
+        description="返回结果数量限制 (1-50)"
+    )
+
+    format: Literal["json", "markdown", "compact"] = Field(
+        default="json",
+        description="响应格式：'json'、'markdown' 或 'compact'（无缩进的列式 JSON，字段名只出现一次，每篇文章一行数组）"
+    )
+
+    detail: Literal["concise", "detailed"] = Field(
+        default="concise",
+        description="详细程度：'concise' 返回摘要信息，'detailed' 返回完整信息（含相关度 score）"
+    )
+
+    continuation: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_continuation，用于获取因超出长度限制而未返回的后续文章"
+    )
+
+    fields: Optional[List[ArticleField]] = Field(
+        default=None,
+        min_length=1,
+        description="每篇文章只返回指定字段（仅对 json 和 compact 生效），例如 ['title', 'url']"
+    )
+
+async def search_local_articles(input: SearchLocalArticlesInput) -> str:
+    """
+    检索本地已抓取的文章
+
+    在通过 get_wechat_article / get_wechat_articles_batch 获取过正文的文章中全文检索（标题、公众号、正文），
+    只读取本地索引，不访问搜狗，通常在毫秒级返回。适合对已经读过的文章反复调研；
+    需要最新文章时请使用 search_wechat_articles。
+
+    Args:
+        query: 检索词，多个词以空格分隔时需要同时命中
+        account: 只返回该公众号的文章
+        since: 发布日期下限（YYYY-MM-DD）
+        until: 发布日期上限（YYYY-MM-DD）
+        sort: "relevance" 按相关度，"newest" 按发布时间倒序
+        limit: 返回结果数量限制 (1-50)
+        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本，"compact" 返回列式 JSON
+        detail: "concise" 返回摘要信息，"detailed" 返回完整信息
+        continuation: 上一次响应中的 next_continuation，用于获取后续文章
+        fields: 每篇文章只返回的字段，例如 ["title", "url"]
+
+    Returns:
+        命中的文章列表，摘要为正文中命中位置附近的片段，total_results 为命中总数
+
+    Examples:
+        search_local_articles(query="人工智能 医疗")
+        search_local_articles(query="大模型", account="机器之心", since="2025-01-01", sort="newest")
+
+    错误处理:
+        - 没有结果: 本地索引只包含获取过正文的文章，请先使用 search_wechat_articles 和 get_wechat_article
+        - 本地索引未启用: 设置 WECHAT_SCRAPER_LOCAL_INDEX=true
+    """
+    with get_metrics().tool("search_local_articles"):
+        article_index = get_article_index()
+        if article_index is None:
+            raise MCPError(
+                message="本地索引未启用",
+                suggestion="请设置环境变量 WECHAT_SCRAPER_LOCAL_INDEX=true，或使用 search_wechat_articles 在线搜索"
+            )
+
+        try:
+            with get_metrics().stage("local_search"):
+                results = await article_index.search(
+                    query=input.query,
+                    limit=input.limit,
+                    account=input.account,
+                    since=input.since,
+                    until=input.until,
+                    sort=input.sort
+                )
+
+            # 格式化响应
+            response = await ResponseFormatter.format_response_async(
+                data=results,
+                format=input.format,
+                detail=input.detail,
+                continuation=input.continuation,
+                fields=input.fields
+            )
+
+            return response
+
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"检索本地文章时发生未预期的错误: {str(e)}",
+                suggestion="请稍后重试，或使用 search_wechat_articles 在线搜索"
+            )
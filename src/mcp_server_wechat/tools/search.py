@@ -1,11 +1,20 @@
 """
 搜索微信文章工具
 """
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 from fastmcp import FastMCP
-from ..utils import WechatScraperClient, ResponseFormatter, MCPError
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_result_cache,
+    get_single_flight,
+    get_rate_limiter,
+    get_offloader,
+    get_metrics,
+    ArticleField,
+)
 
 class SearchWechatArticlesInput(BaseModel):
     """搜索微信文章输入模型"""
@@ -32,9 +41,16 @@ class SearchWechatArticlesInput(BaseModel):
         description="页码，从1开始"
     )
     
-    format: Literal["json", "markdown"] = Field(
+    max_results: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=200,
+        description="多页模式：从 page 开始并发抓取多页并去重，最多返回的结果数量 (1-200)；设置后忽略 limit"
+    )
+    
+    format: Literal["json", "markdown", "compact"] = Field(
         default="json",
-        description="响应格式：'json' 或 'markdown'"
+        description="响应格式：'json'、'markdown' 或 'compact'（无缩进的列式 JSON，字段名只出现一次，每篇文章一行数组）"
     )
     
     detail: Literal["concise", "detailed"] = Field(
@@ -42,6 +58,17 @@ class SearchWechatArticlesInput(BaseModel):
         description="详细程度：'concise' 返回摘要信息，'detailed' 返回完整信息"
     )
 
+    continuation: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_continuation，用于获取因超出长度限制而未返回的后续文章"
+    )
+
+    fields: Optional[List[ArticleField]] = Field(
+        default=None,
+        min_length=1,
+        description="每篇文章只返回指定字段（仅对 json 和 compact 生效），例如 ['title', 'url']"
+    )
+
 async def search_wechat_articles(input: SearchWechatArticlesInput) -> str:
     """
     搜索微信文章
@@ -52,8 +79,11 @@ async def search_wechat_articles(input: SearchWechatArticlesInput) -> str:
         query: 搜索关键词，例如：'人工智能'、'区块链金融'
         limit: 返回结果数量限制 (1-50)
         page: 页码，从1开始
-        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本
+        max_results: 多页模式下最多返回的结果数量，设置后从 page 开始并发抓取多页并去重
+        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本，"compact" 返回列式 JSON
         detail: "concise" 返回摘要信息，"detailed" 返回完整信息
+        continuation: 上一次响应中的 next_continuation，用于获取后续文章
+        fields: 每篇文章只返回的字段，例如 ["title", "url"]
     
     Returns:
         格式化的文章列表，包含标题、摘要、作者、发布时间等信息
@@ -61,6 +91,8 @@ async def search_wechat_articles(input: SearchWechatArticlesInput) -> str:
     Examples:
         search_wechat_articles(query="人工智能医疗", limit=10, page=1, format="json", detail="concise")
         search_wechat_articles(query="区块链金融", format="markdown", detail="detailed")
+        search_wechat_articles(query="人工智能", max_results=100)
+        search_wechat_articles(query="人工智能", limit=50, format="compact", fields=["title", "url"])
     
     错误处理:
         - 无效查询: 提供非空搜索词
@@ -68,30 +100,50 @@ async def search_wechat_articles(input: SearchWechatArticlesInput) -> str:
         - 访问频率限制: 等待一段时间后重试
         - 网络错误: 检查网络连接
     """
-    try:
-        async with WechatScraperClient() as client:
-            # 调用爬虫客户端搜索文章
-            results = await client.search_articles(
-                query=input.query,
-                page_num=input.page,
-                limit=input.limit
-            )
+    # 爬虫客户端依赖 Playwright、lxml 等，首次调用时才导入，注册工具时不加载
+    from ..utils import WechatScraperClient, get_browser_manager
+
+    with get_metrics().tool("search_wechat_articles"):
+        try:
+            async with WechatScraperClient(
+                browser_manager=get_browser_manager(),
+                result_cache=get_result_cache(),
+                single_flight=get_single_flight(),
+                rate_limiter=get_rate_limiter(),
+                offloader=get_offloader()
+            ) as client:
+                # 调用爬虫客户端搜索文章
+                if input.max_results is not None:
+                    # 多页模式：一次调用抓取并合并多页结果
+                    results = await client.search_articles_multi(
+                        query=input.query,
+                        start_page=input.page,
+                        max_results=input.max_results
+                    )
+                else:
+                    results = await client.search_articles(
+                        query=input.query,
+                        page_num=input.page,
+                        limit=input.limit
+                    )
             
-            # 格式化响应
-            response = ResponseFormatter.format_response(
-                data=results,
-                format=input.format,
-                detail=input.detail
-            )
+                # 格式化响应
+                response = await ResponseFormatter.format_response_async(
+                    data=results,
+                    format=input.format,
+                    detail=input.detail,
+                    continuation=input.continuation,
+                    fields=input.fields
+                )
             
-            return response
+                return response
             
-    except MCPError:
-        # MCPError 已经包含可操作的建议，直接抛出
-        raise
-    except Exception as e:
-        # 其他异常转换为 MCPError
-        raise MCPError(
-            message=f"搜索文章时发生未预期的错误: {str(e)}",
-            suggestion="请检查网络连接并稍后重试，或报告此问题"
-        )
\ No newline at end of file
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"搜索文章时发生未预期的错误: {str(e)}",
+                suggestion="请检查网络连接并稍后重试，或报告此问题"
+            )
\ No newline at end of file
@@ -1,10 +1,19 @@
 """
 获取热门微信文章工具
 """
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
-from ..utils import WechatScraperClient, ResponseFormatter, MCPError
+from ..utils import (
+    ResponseFormatter,
+    MCPError,
+    get_result_cache,
+    get_single_flight,
+    get_rate_limiter,
+    get_offloader,
+    get_metrics,
+    ArticleField,
+)
 
 class GetTrendingWechatArticlesInput(BaseModel):
     """获取热门微信文章输入模型"""
@@ -22,9 +31,9 @@ class GetTrendingWechatArticlesInput(BaseModel):
         description="返回结果数量限制 (1-50)"
     )
     
-    format: Literal["json", "markdown"] = Field(
+    format: Literal["json", "markdown", "compact"] = Field(
         default="json",
-        description="响应格式：'json' 或 'markdown'"
+        description="响应格式：'json'、'markdown' 或 'compact'（无缩进的列式 JSON，字段名只出现一次，每篇文章一行数组）"
     )
     
     detail: Literal["concise", "detailed"] = Field(
@@ -32,6 +41,17 @@ class GetTrendingWechatArticlesInput(BaseModel):
         description="详细程度：'concise' 返回摘要信息，'detailed' 返回完整信息"
     )
 
+    continuation: Optional[str] = Field(
+        default=None,
+        description="上一次响应中的 next_continuation，用于获取因超出长度限制而未返回的后续文章"
+    )
+
+    fields: Optional[List[ArticleField]] = Field(
+        default=None,
+        min_length=1,
+        description="每篇文章只返回指定字段（仅对 json 和 compact 生效），例如 ['title', 'url']"
+    )
+
 async def get_trending_wechat_articles(input: GetTrendingWechatArticlesInput) -> str:
     """
     获取热门微信文章
@@ -41,8 +61,10 @@ async def get_trending_wechat_articles(input: GetTrendingWechatArticlesInput) ->
     Args:
         category: 文章分类 - "hot"(热门)、"tech"(科技)、"finance"(财经)、"entertainment"(娱乐)
         limit: 返回结果数量限制 (1-50)
-        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本
+        format: 响应格式 - "json" 返回结构化数据，"markdown" 返回可读文本，"compact" 返回列式 JSON
         detail: "concise" 返回摘要信息，"detailed" 返回完整信息
+        continuation: 上一次响应中的 next_continuation，用于获取后续文章
+        fields: 每篇文章只返回的字段，例如 ["title", "url"]
     
     Returns:
         热门文章列表，包含标题、摘要、作者、发布时间等信息
@@ -56,29 +78,41 @@ async def get_trending_wechat_articles(input: GetTrendingWechatArticlesInput) ->
         - 访问频率限制: 等待一段时间后重试
         - 网络错误: 检查网络连接
     """
-    try:
-        async with WechatScraperClient() as client:
-            # 调用爬虫客户端获取热门文章
-            results = await client.get_trending_articles(
-                category=input.category,
-                limit=input.limit
-            )
+    # 爬虫客户端依赖 Playwright、lxml 等，首次调用时才导入，注册工具时不加载
+    from ..utils import WechatScraperClient, get_browser_manager
+
+    with get_metrics().tool("get_trending_wechat_articles"):
+        try:
+            async with WechatScraperClient(
+                browser_manager=get_browser_manager(),
+                result_cache=get_result_cache(),
+                single_flight=get_single_flight(),
+                rate_limiter=get_rate_limiter(),
+                offloader=get_offloader()
+            ) as client:
+                # 调用爬虫客户端获取热门文章
+                results = await client.get_trending_articles(
+                    category=input.category,
+                    limit=input.limit
+                )
             
-            # 格式化响应
-            response = ResponseFormatter.format_response(
-                data=results,
-                format=input.format,
-                detail=input.detail
-            )
+                # 格式化响应
+                response = await ResponseFormatter.format_response_async(
+                    data=results,
+                    format=input.format,
+                    detail=input.detail,
+                    continuation=input.continuation,
+                    fields=input.fields
+                )
             
-            return response
+                return response
             
-    except MCPError:
-        # MCPError 已经包含可操作的建议，直接抛出
-        raise
-    except Exception as e:
-        # 其他异常转换为 MCPError
-        raise MCPError(
-            message=f"获取热门文章时发生未预期的错误: {str(e)}",
-            suggestion="请检查网络连接是否正常，并稍后重试"
-        )
\ No newline at end of file
+        except MCPError:
+            # MCPError 已经包含可操作的建议，直接抛出
+            raise
+        except Exception as e:
+            # 其他异常转换为 MCPError
+            raise MCPError(
+                message=f"获取热门文章时发生未预期的错误: {str(e)}",
+                suggestion="请检查网络连接是否正常，并稍后重试"
+            )
\ No newline at end of file
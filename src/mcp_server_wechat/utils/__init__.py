@@ -1,8 +1,78 @@
 """
 工具包初始化
+
+导出的名称在首次访问时才导入所在模块，注册工具时不会加载 Playwright、lxml、BeautifulSoup 和 httpx。
 """
-from .errors import MCPError, handle_scraper_error
-from .formatters import ResponseFormatter
-from .wechat_client import WechatScraperClient
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+# 导出名称 -> 所在模块
+_EXPORTS = {
+    "MCPError": ".errors",
+    "classify_scraper_error": ".errors",
+    "handle_scraper_error": ".errors",
+    "ResponseFormatter": ".formatters",
+    "ArticleField": ".formatters",
+    "BrowserManager": ".browser",
+    "get_browser_manager": ".browser",
+    "ArticleHttpFetcher": ".http_fetcher",
+    "get_http_fetcher": ".http_fetcher",
+    "ArticleCache": ".article_cache",
+    "get_article_cache": ".article_cache",
+    "ArticleIndex": ".local_index",
+    "get_article_index": ".local_index",
+    "ResultCache": ".result_cache",
+    "get_result_cache": ".result_cache",
+    "use_shared_cache": ".result_cache",
+    "SharedResultCache": ".shared_cache",
+    "SingleFlight": ".singleflight",
+    "get_single_flight": ".singleflight",
+    "RetryStats": ".retry",
+    "get_retry_stats": ".retry",
+    "with_retry": ".retry",
+    "HostRateLimiter": ".rate_limit",
+    "get_rate_limiter": ".rate_limit",
+    "Offloader": ".offload",
+    "get_offloader": ".offload",
+    "Metrics": ".metrics",
+    "get_metrics": ".metrics",
+    "ARTICLE_CHUNK_CHARS": ".chunking",
+    "ArticleContentStore": ".chunking",
+    "get_content_store": ".chunking",
+    "WechatScraperClient": ".wechat_client",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
-__all__ = ["MCPError", "handle_scraper_error", "ResponseFormatter", "WechatScraperClient"]
\ No newline at end of file
+if TYPE_CHECKING:
+    # 仅供类型检查器使用，运行时的导出见 _EXPORTS
+    from .errors import MCPError, classify_scraper_error, handle_scraper_error  # noqa: F401
+    from .formatters import ArticleField, ResponseFormatter  # noqa: F401
+    from .browser import BrowserManager, get_browser_manager  # noqa: F401
+    from .http_fetcher import ArticleHttpFetcher, get_http_fetcher  # noqa: F401
+    from .article_cache import ArticleCache, get_article_cache  # noqa: F401
+    from .local_index import ArticleIndex, get_article_index  # noqa: F401
+    from .result_cache import ResultCache, get_result_cache, use_shared_cache  # noqa: F401
+    from .shared_cache import SharedResultCache  # noqa: F401
+    from .singleflight import SingleFlight, get_single_flight  # noqa: F401
+    from .retry import RetryStats, get_retry_stats, with_retry  # noqa: F401
+    from .rate_limit import HostRateLimiter, get_rate_limiter  # noqa: F401
+    from .offload import Offloader, get_offloader  # noqa: F401
+    from .metrics import Metrics, get_metrics  # noqa: F401
+    from .chunking import ARTICLE_CHUNK_CHARS, ArticleContentStore, get_content_store  # noqa: F401
+    from .wechat_client import WechatScraperClient  # noqa: F401
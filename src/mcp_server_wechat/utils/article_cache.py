@@ -0,0 +1,275 @@
+"""
+文章磁盘缓存模块
+
+使用 SQLite 按规范化 URL 持久化解析后的文章详情，跨会话、跨进程复用。
+数据库开启 WAL 模式，同一主机上的多个服务器进程可以安全地并发读写。
+"""
+import os
+import json
+import time
+import zlib
+import asyncio
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger("article_cache")
+
+# 环境变量配置
+ARTICLE_CACHE_ENABLED = os.getenv("WECHAT_SCRAPER_ARTICLE_CACHE", "true").lower() == "true"
+ARTICLE_CACHE_PATH = os.getenv(
+    "WECHAT_SCRAPER_ARTICLE_CACHE_PATH",
+    str(Path.home() / ".cache" / "mcp-server-wechat" / "articles.db")
+)
+ARTICLE_CACHE_TTL = int(os.getenv("WECHAT_SCRAPER_ARTICLE_CACHE_TTL", "86400"))  # 秒
+ARTICLE_CACHE_MAX_MB = int(os.getenv("WECHAT_SCRAPER_ARTICLE_CACHE_MAX_MB", "200"))
+ARTICLE_CACHE_COMPRESS = os.getenv("WECHAT_SCRAPER_ARTICLE_CACHE_COMPRESS", "true").lower() == "true"
+
+# 文章 URL 中用于唯一标识文章的参数
+ARTICLE_KEY_PARAMS = ("__biz", "mid", "idx", "sn")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    content BLOB,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    has_content INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    content_fetched_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_accessed_at ON articles (accessed_at);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS articles_size_insert AFTER INSERT ON articles BEGIN
+    UPDATE cache_size SET total = total + new.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS articles_size_update AFTER UPDATE OF size ON articles BEGIN
+    UPDATE cache_size SET total = total + new.size - old.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS articles_size_delete AFTER DELETE ON articles BEGIN
+    UPDATE cache_size SET total = total - old.size WHERE id = 1;
+END;
+INSERT OR IGNORE INTO cache_size (id, total) SELECT 1, COALESCE(SUM(size), 0) FROM articles;
+"""
+
+
+def canonicalize_article_url(url: str) -> str:
+    """
+    规范化文章 URL，作为缓存键
+
+    - 统一使用 https 和小写域名，去掉片段
+    - mp.weixin.qq.com/s?... 形式只保留标识文章的参数并排序
+    - mp.weixin.qq.com/s/<短链> 形式去掉全部查询参数
+    - weixin.sogou.com/link 跳转链接只保留 url 参数（其余参数每次请求都会变化）
+    """
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    path = parsed.path.rstrip("/") or "/"
+    query = ""
+    if host == "mp.weixin.qq.com":
+        if path == "/s":
+            params = {k: v for k, v in parse_qsl(parsed.query) if k in ARTICLE_KEY_PARAMS}
+            query = urlencode(sorted(params.items()))
+    elif host == "weixin.sogou.com" and path == "/link":
+        params = {k: v for k, v in parse_qsl(parsed.query) if k == "url"}
+        query = urlencode(sorted(params.items()))
+    else:
+        query = urlencode(sorted(parse_qsl(parsed.query)))
+    return urlunparse(("https", host, path, "", query, ""))
+
+
+class ArticleCache:
+    """
+    SQLite 文章缓存
+
+    - 缓存解析后的文章字典及抓取时间，超过 TTL 视为过期；正文单独记录抓取时间，
+      不含正文的结果只刷新元数据，不会让旧正文重新变得新鲜
+    - 总大小由触发器维护在 cache_size 表中，超过上限时按最近访问时间淘汰
+    - 可选对正文字段进行 zlib 压缩
+    - 所有数据库操作在线程中执行，不阻塞事件循环
+    """
+
+    def __init__(
+        self,
+        path: str = ARTICLE_CACHE_PATH,
+        ttl: int = ARTICLE_CACHE_TTL,
+        max_bytes: int = ARTICLE_CACHE_MAX_MB * 1024 * 1024,
+        compress: bool = ARTICLE_CACHE_COMPRESS
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._initialized = False
+
+        # 统计信息（仅当前进程）
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    async def get(
+        self,
+        url: str,
+        include_content: bool = True,
+        allow_stale: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的文章
+
+        Args:
+            url: 文章 URL
+            include_content: 是否需要正文；缓存中没有正文时视为未命中
+            allow_stale: 是否允许返回已过期的条目
+
+        Returns:
+            文章详情字典，未命中时返回 None
+        """
+        article = await asyncio.to_thread(self._get, canonicalize_article_url(url), include_content, allow_stale)
+        if article is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return article
+
+    async def put(self, url: str, article: Dict[str, Any]):
+        """写入文章到缓存，并在超过容量时淘汰旧条目"""
+        await asyncio.to_thread(self._put, canonicalize_article_url(url), article)
+        self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接，首次使用时建表"""
+        if not self._initialized:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode = WAL")
+            # 旧版本创建的数据库没有 content_fetched_at 列，沿用 fetched_at
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+            if columns and "content_fetched_at" not in columns:
+                with conn:
+                    conn.execute("ALTER TABLE articles ADD COLUMN content_fetched_at REAL")
+                    conn.execute("UPDATE articles SET content_fetched_at = fetched_at WHERE has_content = 1")
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _get(self, key: str, include_content: bool, allow_stale: bool) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data, content, compressed, has_content, fetched_at, content_fetched_at "
+                "FROM articles WHERE url = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            data, content, compressed, has_content, fetched_at, content_fetched_at = row
+            if include_content and not has_content:
+                return None
+            # 需要正文时按正文的抓取时间判断是否过期
+            fresh_since = content_fetched_at if include_content else fetched_at
+            if not allow_stale and time.time() - fresh_since > self.ttl:
+                return None
+
+            with conn:
+                conn.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (time.time(), key))
+
+            article = json.loads(data)
+            if include_content:
+                article["content"] = zlib.decompress(content).decode("utf-8") if compressed else content.decode("utf-8")
+            else:
+                article["content"] = None
+            return article
+        finally:
+            conn.close()
+
+    def _put(self, key: str, article: Dict[str, Any]):
+        data = {k: v for k, v in article.items() if k != "content"}
+        data_text = json.dumps(data, ensure_ascii=False)
+
+        content = article.get("content")
+        has_content = content is not None
+        content_blob = None
+        if has_content:
+            content_blob = content.encode("utf-8")
+            if self.compress:
+                content_blob = zlib.compress(content_blob)
+        data_size = len(data_text.encode("utf-8"))
+        size = data_size + (len(content_blob) if content_blob else 0)
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                # 已缓存正文的条目不会被不含正文的结果覆盖，正文的抓取时间保持不变
+                existing = conn.execute("SELECT has_content FROM articles WHERE url = ?", (key,)).fetchone()
+                if existing and existing[0] and not has_content:
+                    conn.execute(
+                        "UPDATE articles SET data = ?, size = ? + LENGTH(content), fetched_at = ?, accessed_at = ? "
+                        "WHERE url = ?",
+                        (data_text, data_size, now, now, key)
+                    )
+                else:
+                    # 使用 UPSERT 而不是 INSERT OR REPLACE：REPLACE 删除旧行时不会触发删除触发器
+                    conn.execute(
+                        "INSERT INTO articles "
+                        "(url, data, content, compressed, has_content, size, fetched_at, content_fetched_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (url) DO UPDATE SET data = excluded.data, content = excluded.content, "
+                        "compressed = excluded.compressed, has_content = excluded.has_content, size = excluded.size, "
+                        "fetched_at = excluded.fetched_at, content_fetched_at = excluded.content_fetched_at, "
+                        "accessed_at = excluded.accessed_at",
+                        (key, data_text, content_blob, int(self.compress and has_content),
+                         int(has_content), size, now, now if has_content else None, now)
+                    )
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时，按最近访问时间淘汰到上限的 90%"""
+        total = conn.execute("SELECT total FROM cache_size WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for url, size in conn.execute("SELECT url, size FROM articles ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM articles WHERE url = ?", (url,))
+            total -= size
+            removed += 1
+        self.evictions += removed
+        logger.info(f"文章缓存超过容量上限，已淘汰 {removed} 条")
+
+
+_article_cache: Optional[ArticleCache] = None
+
+
+def get_article_cache() -> Optional[ArticleCache]:
+    """获取进程级共享的文章缓存，未启用时返回 None"""
+    global _article_cache
+    if _article_cache is None and ARTICLE_CACHE_ENABLED:
+        _article_cache = ArticleCache()
+    return _article_cache
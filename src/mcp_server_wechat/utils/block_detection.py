@@ -0,0 +1,74 @@
+"""
+反爬虫/验证页检测模块
+
+搜狗和微信在请求过于频繁时会重定向到验证页，页面上不会出现期望的结果选择器。
+等待期望选择器的同时等待验证页特征，先出现者为准，验证页可以在页面加载后立即识别，
+不必等到选择器超时。验证页上没有可识别的元素时，选择器超时后再按页面文本判断，
+与文章 HTTP 直连路径使用同一份文本特征。
+"""
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+# 反爬虫/验证页 URL 特征
+BLOCK_URL_MARKERS = ("antispider", "wappoc_appmsgcaptcha", "secitptpage/verify")
+
+# 验证页上的元素特征（搜狗验证码表单、微信环境异常验证）
+BLOCK_PAGE_SELECTORS = (
+    "#seccodeForm",
+    "#seccodeInput",
+    "#seccodeImage",
+    "#js_verify",
+    "img[src*='antispider']",
+)
+
+# 验证页/异常页 HTML 中的特征（HTTP 直连和浏览器共用）
+BLOCK_PAGE_MARKERS = (
+    "环境异常",
+    "完成验证",
+    "请输入验证码",
+    "访问频率受限",
+    "wappoc_appmsgcaptcha",
+    "secitptpage/verify",
+)
+
+
+def is_block_url(url: str) -> bool:
+    """判断 URL 是否为反爬虫或验证页"""
+    return any(marker in url for marker in BLOCK_URL_MARKERS)
+
+
+def is_block_html(html: str) -> bool:
+    """判断页面 HTML 是否为验证页或访问受限页"""
+    return any(marker in html for marker in BLOCK_PAGE_MARKERS)
+
+
+async def wait_for_selector_or_block(page: Page, selector: str, timeout: int) -> bool:
+    """
+    等待期望的选择器或验证页特征出现
+    
+    Args:
+        page: 已完成导航的页面
+        selector: 期望的结果选择器
+        timeout: 超时时间（毫秒）
+    
+    Returns:
+        是否为验证页；两者都未出现且页面文本也不是访问受限页时抛出超时异常
+    """
+    if is_block_url(page.url):
+        return True
+    
+    # CSS 选择器列表匹配任意一个即返回，相当于让两者竞速
+    try:
+        await page.wait_for_selector(", ".join((selector,) + BLOCK_PAGE_SELECTORS), timeout=timeout)
+    except PlaywrightTimeoutError:
+        # 没有验证页元素的访问受限页（例如只有“访问频率受限”文本）按文本识别，不作为超时重试
+        try:
+            html = await page.content()
+        except Exception:
+            html = ""
+        if is_block_url(page.url) or is_block_html(html):
+            return True
+        raise
+    
+    if is_block_url(page.url):
+        return True
+    return await page.query_selector(selector) is None
@@ -0,0 +1,155 @@
+"""
+浏览器生命周期管理模块
+
+在整个服务器进程内共享同一个 Playwright 浏览器与上下文，
+避免每次工具调用都重新启动 Chromium。
+"""
+import os
+import asyncio
+import logging
+from typing import Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from .errors import MCPError
+from .page_pool import PagePool
+from .metrics import get_metrics
+from .interception import ResourceBlocker, BLOCK_RESOURCES_ENABLED
+
+logger = logging.getLogger("browser_manager")
+
+# 环境变量配置
+HEADLESS_MODE = os.getenv("WECHAT_SCRAPER_HEADLESS", "true").lower() == "true"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+class BrowserManager:
+    """
+    进程级浏览器管理器
+
+    - 首次调用 get_context() 时才启动浏览器（懒加载）
+    - 使用锁保证并发调用只会启动一次
+    - 浏览器崩溃或断开后，下一次调用会自动重启
+    - shutdown() 在服务器退出时关闭所有资源
+    - page_pool 为所有调用方共享的有界页面池
+    - resource_blocker 在共享上下文上拦截不需要的资源（可通过环境变量关闭）
+    """
+
+    def __init__(self, headless: bool = HEADLESS_MODE, user_agent: str = USER_AGENT):
+        self.headless = headless
+        self.user_agent = user_agent
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self.restart_count = 0
+        self.page_pool = PagePool(self.get_context)
+        self.resource_blocker = ResourceBlocker() if BLOCK_RESOURCES_ENABLED else None
+
+    @property
+    def is_running(self) -> bool:
+        """浏览器是否处于可用状态"""
+        return (
+            self._browser is not None
+            and self._context is not None
+            and self._browser.is_connected()
+        )
+
+    async def get_context(self) -> BrowserContext:
+        """
+        获取共享的浏览器上下文，必要时启动或重启浏览器
+
+        Returns:
+            共享的 BrowserContext
+        """
+        if self.is_running:
+            return self._context
+
+        async with self._lock:
+            # 等待锁期间可能已被其他调用方启动
+            if self.is_running:
+                return self._context
+
+            if self._closed:
+                raise MCPError(
+                    message="浏览器管理器已关闭",
+                    suggestion="服务器正在退出，请重新启动服务器后再试"
+                )
+
+            if self._browser is not None or self._playwright is not None:
+                logger.warning("检测到浏览器已断开，正在重启")
+                await self._teardown()
+                self.restart_count += 1
+
+            with get_metrics().stage("browser_launch"):
+                await self._launch()
+            return self._context
+
+    async def _launch(self):
+        """启动 Playwright、浏览器和上下文"""
+        try:
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._browser.on("disconnected", self._on_disconnected)
+            self._context = await self._browser.new_context(user_agent=self.user_agent)
+            if self.resource_blocker is not None:
+                await self.resource_blocker.install(self._context)
+            logger.info("共享浏览器初始化成功")
+        except Exception as e:
+            logger.error(f"共享浏览器初始化失败: {str(e)}")
+            await self._teardown()
+            raise MCPError(
+                message=f"浏览器初始化失败: {str(e)}",
+                suggestion="请检查 Playwright 是否正确安装，可尝试运行 'playwright install chromium'"
+            )
+
+    def _on_disconnected(self, browser: Browser):
+        """浏览器断开回调，标记上下文失效以便下次重启"""
+        if browser is self._browser:
+            logger.warning("共享浏览器已断开连接")
+            self._context = None
+
+    async def _teardown(self):
+        """关闭当前持有的资源，忽略关闭过程中的错误"""
+        context, browser, playwright = self._context, self._browser, self._playwright
+        self.page_pool.clear()
+        self._context = None
+        self._browser = None
+        self._playwright = None
+
+        for resource in (context, browser):
+            if resource is None:
+                continue
+            try:
+                await resource.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器资源时出错: {str(e)}")
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                logger.debug(f"停止 Playwright 时出错: {str(e)}")
+
+    async def shutdown(self):
+        """关闭共享浏览器，服务器退出时调用"""
+        async with self._lock:
+            self._closed = True
+            if self._browser is not None or self._playwright is not None:
+                await self._teardown()
+                logger.info("共享浏览器已关闭")
+
+    def reset(self):
+        """重置关闭状态，允许同一进程内再次启动（用于服务器重新进入生命周期）"""
+        self._closed = False
+
+
+_browser_manager: Optional[BrowserManager] = None
+
+
+def get_browser_manager() -> BrowserManager:
+    """获取进程级共享的浏览器管理器"""
+    global _browser_manager
+    if _browser_manager is None:
+        _browser_manager = BrowserManager()
+    return _browser_manager
@@ -0,0 +1,264 @@
+"""
+文章正文分段模块
+
+超长文章不再在格式化时被截断：第一次请求抓取全文并保存在进程内的正文缓存中，
+每次只返回 max_chars 以内的一段，并附带指向下一段的 next_cursor。
+后续分段直接从缓存读取，不再导航或请求网络。
+
+cursor 是不透明的 base64url 字符串，记录文章的规范化 URL、下一段的起始位置、分段大小，
+以及正文摘要；正文在两次请求之间发生变化（例如缓存过期后重新抓取到不同内容）时拒绝继续。
+
+列表类响应超出长度限制时使用同样格式的 continuation 令牌，记录下一篇文章的序号和文章列表的摘要。
+"""
+import os
+import time
+import json
+import base64
+import re
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .errors import MCPError
+
+logger = logging.getLogger("chunking")
+
+# 环境变量配置
+ARTICLE_CHUNK_CHARS = int(os.getenv("WECHAT_SCRAPER_ARTICLE_CHUNK_CHARS", "40000"))
+CONTENT_STORE_TTL = int(os.getenv("WECHAT_SCRAPER_CONTENT_STORE_TTL", "3600"))  # 秒
+CONTENT_STORE_MAX_MB = int(os.getenv("WECHAT_SCRAPER_CONTENT_STORE_MAX_MB", "64"))
+
+# 在分段末尾的这一比例范围内寻找段落边界，找不到时按字符数切分
+BOUNDARY_WINDOW = 0.2
+
+# 基本多文种平面以外的字符（emoji 等），部分客户端按 UTF-16 计为两个字符
+_NON_BMP_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def content_digest(content: str) -> str:
+    """正文摘要，用于确认 cursor 对应的正文没有变化"""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def encoded_length(text: str) -> int:
+    """
+    文本在响应中的最大长度：JSON 转义后的长度（引号、反斜杠、换行和控制字符会变长），
+    非 BMP 字符按两个字符计；markdown 输出原文，不会超过该长度
+    """
+    return len(json.dumps(text, ensure_ascii=False)) + len(_NON_BMP_RE.findall(text))
+
+
+def split_chunk(content: str, offset: int, max_chars: int, max_encoded: Optional[int] = None) -> Tuple[str, int]:
+    """
+    从 offset 开始取不超过 max_chars 个字符，尽量在段落边界处结束
+
+    Args:
+        content: 完整正文
+        offset: 起始位置
+        max_chars: 本段最多字符数
+        max_encoded: 本段序列化后的最大长度（见 encoded_length），超出时缩短本段而不是截断响应
+
+    Returns:
+        (本段内容, 下一段的起始位置)
+    """
+    chunk, end = _split_chunk(content, offset, max_chars)
+    if max_encoded is None:
+        return chunk, end
+    while len(chunk) > 1:
+        encoded = encoded_length(chunk)
+        if encoded <= max_encoded:
+            break
+        # 按转义后的膨胀比例缩短，每次至少减少一个字符
+        chunk, end = _split_chunk(content, offset, max(1, min(len(chunk) - 1, len(chunk) * max_encoded // encoded)))
+    return chunk, end
+
+
+def _split_chunk(content: str, offset: int, max_chars: int) -> Tuple[str, int]:
+    end = offset + max_chars
+    if end >= len(content):
+        return content[offset:], len(content)
+
+    # 在末尾窗口内找最后一个换行，换行保留在本段
+    boundary = content.rfind("\n", end - int(max_chars * BOUNDARY_WINDOW), end)
+    if boundary > offset:
+        end = boundary + 1
+    return content[offset:end], end
+
+
+def _encode_token(payload: Dict[str, Any]) -> str:
+    text = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+
+def encode_cursor(url: str, offset: int, max_chars: int, digest: str) -> str:
+    """生成指向下一段的 cursor"""
+    return _encode_token({"u": url, "o": offset, "m": max_chars, "d": digest})
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    解析 cursor
+
+    Returns:
+        包含 url、offset、max_chars、digest 的字典
+
+    Raises:
+        MCPError: cursor 格式无效
+    """
+    try:
+        payload = _decode_token(cursor)
+        position = {
+            "url": str(payload["u"]),
+            "offset": int(payload["o"]),
+            "max_chars": int(payload["m"]),
+            "digest": str(payload["d"])
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise MCPError(
+            message=f"无效的 cursor: {str(e)}",
+            suggestion="请使用上一次响应中返回的 next_cursor，或不带 cursor 重新获取文章",
+            kind="invalid_cursor"
+        )
+    if position["offset"] < 0 or position["max_chars"] < 1:
+        raise MCPError(
+            message="无效的 cursor",
+            suggestion="请使用上一次响应中返回的 next_cursor，或不带 cursor 重新获取文章",
+            kind="invalid_cursor"
+        )
+    return position
+
+
+def encode_continuation(index: int, digest: str) -> str:
+    """生成指向列表中下一篇文章的 continuation 令牌"""
+    return _encode_token({"i": index, "d": digest})
+
+
+def decode_continuation(token: str) -> Dict[str, Any]:
+    """
+    解析 continuation 令牌
+
+    Returns:
+        包含 index、digest 的字典
+
+    Raises:
+        MCPError: 令牌格式无效
+    """
+    try:
+        payload = _decode_token(token)
+        position = {"index": int(payload["i"]), "digest": str(payload["d"])}
+    except (ValueError, KeyError, TypeError) as e:
+        raise MCPError(
+            message=f"无效的 continuation: {str(e)}",
+            suggestion="请使用上一次响应中返回的 next_continuation，或不带 continuation 重新调用",
+            kind="invalid_cursor"
+        )
+    if position["index"] < 1:
+        raise MCPError(
+            message="无效的 continuation",
+            suggestion="请使用上一次响应中返回的 next_continuation，或不带 continuation 重新调用",
+            kind="invalid_cursor"
+        )
+    return position
+
+
+@dataclass
+class _StoredArticle:
+    article: Dict[str, Any]
+    digest: str
+    size: int
+    expires_at: float
+
+
+class ArticleContentStore:
+    """
+    进程内的文章全文缓存（TTL + LRU，按正文字符数限制总容量）
+
+    与磁盘缓存 ArticleCache 不同，这里只为分段读取服务：保存最近抓取的完整文章，
+    使同一篇文章的后续分段无需再次解压或读取 SQLite。
+    """
+
+    def __init__(self, ttl: int = CONTENT_STORE_TTL, max_chars: int = CONTENT_STORE_MAX_MB * 1024 * 1024):
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, _StoredArticle]" = OrderedDict()
+        self._size = 0
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        查询文章
+
+        Args:
+            key: 规范化的文章 URL
+
+        Returns:
+            (文章字典, 正文摘要)，未命中或已过期时返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.article, entry.digest
+
+    def put(self, key: str, article: Dict[str, Any]) -> str:
+        """
+        保存文章，超过容量时淘汰最久未使用的条目
+
+        Returns:
+            正文摘要
+        """
+        content = article.get("content") or ""
+        digest = content_digest(content)
+        if self.ttl <= 0 or len(content) > self.max_chars:
+            return digest
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _StoredArticle(dict(article), digest, len(content), time.monotonic() + self.ttl)
+        self._size += len(content)
+        while self._size > self.max_chars:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return digest
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        return {
+            "entries": len(self._entries),
+            "chars": self._size,
+            "max_chars": self.max_chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+_content_store: Optional[ArticleContentStore] = None
+
+
+def get_content_store() -> ArticleContentStore:
+    """获取进程级共享的文章全文缓存"""
+    global _content_store
+    if _content_store is None:
+        _content_store = ArticleContentStore()
+    return _content_store
@@ -0,0 +1,48 @@
+"""
+站点地址配置模块
+
+所有页面 URL 都按真实站点（weixin.sogou.com、mp.weixin.qq.com）构建，
+缓存键、日志和返回结果中的链接保持不变；只有在实际发起请求时才替换为配置的基础地址。
+将两个基础地址指向本地的模拟服务器（benchmarks/fake_wechat_server.py），
+即可在不访问真实站点的情况下对完整链路做压测。
+"""
+import os
+from typing import Optional
+from urllib.parse import urlparse
+
+# 真实站点
+SOGOU_ORIGIN = "https://weixin.sogou.com"
+ARTICLE_ORIGIN = "https://mp.weixin.qq.com"
+
+# 环境变量配置
+SOGOU_BASE_URL = os.getenv("WECHAT_SCRAPER_SOGOU_BASE_URL", SOGOU_ORIGIN).rstrip("/")
+ARTICLE_BASE_URL = os.getenv("WECHAT_SCRAPER_ARTICLE_BASE_URL", ARTICLE_ORIGIN).rstrip("/")
+
+
+def base_url_host(base_url: str) -> Optional[str]:
+    """返回基础地址的主机名"""
+    return urlparse(base_url).hostname
+
+
+def rebase_url(url: str, sogou_base_url: str = SOGOU_BASE_URL, article_base_url: str = ARTICLE_BASE_URL) -> str:
+    """
+    将真实站点的 URL 替换为配置的基础地址
+
+    Args:
+        url: 按真实站点构建的 URL
+        sogou_base_url: weixin.sogou.com 的替代地址
+        article_base_url: mp.weixin.qq.com 的替代地址
+
+    Returns:
+        替换了协议和主机部分的 URL；其他站点的 URL 原样返回
+    """
+    parsed = urlparse(url)
+    if parsed.hostname == "weixin.sogou.com":
+        base = sogou_base_url.rstrip("/")
+    elif parsed.hostname == "mp.weixin.qq.com":
+        base = article_base_url.rstrip("/")
+    else:
+        return url
+
+    rest = url[len(f"{parsed.scheme}://{parsed.netloc}"):]
+    return base + rest
@@ -2,66 +2,141 @@
 错误处理模块
 """
 from typing import Dict, Any, Optional
-import httpx
-from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+# 连接被重置/中断的特征
+CONNECTION_RESET_MARKERS = (
+    "ERR_CONNECTION_RESET",
+    "ERR_CONNECTION_CLOSED",
+    "ERR_CONNECTION_ABORTED",
+    "ERR_NETWORK_CHANGED",
+    "ERR_EMPTY_RESPONSE",
+    "ERR_TIMED_OUT",
+)
+
+# 浏览器或页面已被关闭（例如浏览器崩溃）的特征
+BROWSER_CLOSED_MARKERS = (
+    "has been closed",
+    "Target closed",
+    "Browser closed",
+)
 
 class MCPError(Exception):
     """MCP 错误基类"""
-    
-    def __init__(self, message: str, suggestion: Optional[str] = None):
+
+    def __init__(self, message: str, suggestion: Optional[str] = None, kind: Optional[str] = None):
         self.message = message
         self.suggestion = suggestion or "请稍后重试"
+        self.kind = kind
         super().__init__(f"{message}. {suggestion}" if suggestion else message)
 
 
+def classify_scraper_error(error: Exception) -> str:
+    """
+    对爬虫错误进行分类
+
+    Args:
+        error: 原始异常
+
+    Returns:
+        错误类别：timeout、connection_refused、connection_reset、dns、proxy、
+        browser_closed、browser、http、rate_limited、unknown
+    """
+    # 在函数内导入，使导入本模块（注册工具时）不加载 Playwright 和 httpx
+    import httpx
+    from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+    
+    if isinstance(error, MCPError):
+        return error.kind or "unknown"
+    elif isinstance(error, PlaywrightTimeoutError):
+        return "timeout"
+    elif isinstance(error, PlaywrightError):
+        text = str(error)
+        if "ERR_CONNECTION_REFUSED" in text:
+            return "connection_refused"
+        elif any(marker in text for marker in CONNECTION_RESET_MARKERS):
+            return "connection_reset"
+        elif "ERR_NAME_NOT_RESOLVED" in text:
+            return "dns"
+        elif "net::ERR_PROXY_CONNECTION_FAILED" in text:
+            return "proxy"
+        elif any(marker in text for marker in BROWSER_CLOSED_MARKERS):
+            return "browser_closed"
+        else:
+            return "browser"
+    elif isinstance(error, httpx.HTTPError):
+        return "http"
+    elif "访问频率受限" in str(error) or "请输入验证码" in str(error):
+        return "rate_limited"
+    else:
+        return "unknown"
+
+
 def handle_scraper_error(error: Exception) -> MCPError:
     """
     处理爬虫错误并转换为 MCPError
-    
+
     Args:
         error: 原始异常
-        
+
     Returns:
         MCPError: 格式化的 MCP 错误
     """
-    if isinstance(error, PlaywrightTimeoutError):
+    # 已经是 MCPError（例如熔断器或验证页检测抛出的错误），保留原始信息
+    if isinstance(error, MCPError):
+        return error
+    
+    kind = classify_scraper_error(error)
+    if kind == "timeout":
         return MCPError(
             message="请求超时，可能是网络问题或目标网站响应慢",
-            suggestion="请检查网络连接并稍后重试，或增加超时时间 (WECHAT_SCRAPER_TIMEOUT 环境变量)"
+            suggestion="请检查网络连接并稍后重试，或增加超时时间 (WECHAT_SCRAPER_TIMEOUT 环境变量)",
+            kind=kind
         )
-    elif isinstance(error, PlaywrightError):
-        if "ERR_CONNECTION_REFUSED" in str(error):
-            return MCPError(
-                message="连接被拒绝，无法访问目标网站",
-                suggestion="请检查网络连接或目标网站是否可访问"
-            )
-        elif "ERR_NAME_NOT_RESOLVED" in str(error):
-            return MCPError(
-                message="无法解析域名",
-                suggestion="请检查网络连接和DNS设置"
-            )
-        elif "net::ERR_PROXY_CONNECTION_FAILED" in str(error):
-            return MCPError(
-                message="代理连接失败",
-                suggestion="请检查代理设置或尝试不使用代理"
-            )
-        else:
-            return MCPError(
-                message=f"浏览器错误: {str(error)}",
-                suggestion="请检查 Playwright 是否正确安装，可尝试运行 'playwright install chromium'"
-            )
-    elif isinstance(error, httpx.HTTPError):
+    elif kind == "connection_refused":
+        return MCPError(
+            message="连接被拒绝，无法访问目标网站",
+            suggestion="请检查网络连接或目标网站是否可访问",
+            kind=kind
+        )
+    elif kind == "connection_reset":
+        return MCPError(
+            message="连接被重置或中断",
+            suggestion="网络不稳定，请稍后重试",
+            kind=kind
+        )
+    elif kind == "dns":
+        return MCPError(
+            message="无法解析域名",
+            suggestion="请检查网络连接和DNS设置",
+            kind=kind
+        )
+    elif kind == "proxy":
+        return MCPError(
+            message="代理连接失败",
+            suggestion="请检查代理设置或尝试不使用代理",
+            kind=kind
+        )
+    elif kind in ("browser", "browser_closed"):
+        return MCPError(
+            message=f"浏览器错误: {str(error)}",
+            suggestion="请检查 Playwright 是否正确安装，可尝试运行 'playwright install chromium'",
+            kind=kind
+        )
+    elif kind == "http":
         return MCPError(
             message=f"HTTP 请求错误: {str(error)}",
-            suggestion="请检查网络连接并稍后重试"
+            suggestion="请检查网络连接并稍后重试",
+            kind=kind
         )
-    elif "访问频率受限" in str(error) or "请输入验证码" in str(error):
+    elif kind == "rate_limited":
         return MCPError(
             message="访问频率受限，可能触发了反爬虫机制",
-            suggestion="请降低请求频率，稍后再试，或考虑使用代理"
+            suggestion="请降低请求频率，稍后再试，或考虑使用代理",
+            kind=kind
         )
     else:
         return MCPError(
             message=f"未知错误: {str(error)}",
-            suggestion="请检查日志获取详细信息并报告此问题"
-        )
\ No newline at end of file
+            suggestion="请检查日志获取详细信息并报告此问题",
+            kind=kind
+        )
@@ -0,0 +1,293 @@
+"""
+声明式列表提取模块
+
+每种列表页用一份 ListSpec 描述：行选择器加上各字段的选择器、属性和后处理函数。
+选择器使用 CSS 书写，导入时编译为 XPath 供 lxml 后端使用，BeautifulSoup 后端直接使用 CSS，
+浏览器内提取（page.evaluate）也使用同一份 CSS，三种方式共用同一份字段定义。
+新增页面类型只需增加一份 ListSpec。
+
+各方式只负责取出原始值（元素不存在时为 None），默认值、去空白和后处理统一在 Python 中完成，
+保证输出一致。
+"""
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from lxml import etree
+
+logger = logging.getLogger("extractors")
+
+# BeautifulSoup 的 get_text 不包含这些元素内的文本
+_SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# 表示行元素本身的选择器
+SELF_SELECTOR = ":scope"
+
+# 支持的 CSS 复合选择器：可选标签名加任意个 .class / #id
+_COMPOUND_PATTERN = re.compile(r"^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?(?P<rest>(?:[.#][\w-]+)*)$")
+_SIMPLE_PATTERN = re.compile(r"([.#])([\w-]+)")
+
+
+def has_class(name: str) -> str:
+    """生成与 CSS 类选择器等价的 XPath 条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def scoped_selector(selector: str) -> str:
+    """
+    相对行元素的 CSS 选择器
+
+    querySelector / select_one 允许选择器的前半部分匹配行外的祖先元素（例如行位于 h3 内时
+    "h3 a" 会命中行内的任意 a），加上 :scope 前缀后与 XPath 的 .// 一样只在行内匹配
+    """
+    return selector if selector == SELF_SELECTOR else f"{SELF_SELECTOR} {selector}"
+
+
+def css_to_xpath(selector: str) -> str:
+    """
+    将简单的 CSS 选择器编译为相对当前节点的 XPath
+
+    只支持后代组合符和 tag / .class / #id 组成的复合选择器，
+    不支持的写法在导入时直接报错。
+
+    Args:
+        selector: CSS 选择器，例如 ".news-list li"、"h4.weui_media_title"
+
+    Returns:
+        XPath 表达式，例如 ".//*[...]//li"
+    """
+    if selector == SELF_SELECTOR:
+        return "."
+    steps = []
+    for compound in selector.split():
+        match = _COMPOUND_PATTERN.match(compound)
+        if not match or not (match["tag"] or match["rest"]):
+            raise ValueError(f"不支持的选择器: {selector}")
+        conditions = "".join(
+            f"[@id='{name}']" if kind == "#" else f"[{has_class(name)}]"
+            for kind, name in _SIMPLE_PATTERN.findall(match["rest"])
+        )
+        steps.append((match["tag"] or "*") + conditions)
+    if not steps:
+        raise ValueError(f"不支持的选择器: {selector}")
+    return ".//" + "//".join(steps)
+
+
+def iter_text(element) -> Iterator[str]:
+    """按 BeautifulSoup 的规则遍历 lxml 元素内的文本（跳过注释、脚本和样式）"""
+    if element.text and element.tag not in _SKIPPED_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        # 注释和处理指令的 tag 不是字符串，只保留其后的文本
+        if isinstance(child.tag, str) and child.tag not in _SKIPPED_TEXT_TAGS:
+            yield from iter_text(child)
+        if child.tail:
+            yield child.tail
+
+
+def text_of(element, separator: str = "") -> str:
+    """等价于 BeautifulSoup 的 element.get_text(separator)"""
+    return separator.join(iter_text(element))
+
+
+# 浏览器内提取脚本：按与 iter_text 相同的规则取文本，只返回原始值
+EVALUATE_SCRIPT = """
+(payload) => {
+    const SKIPPED = new Set(["SCRIPT", "STYLE", "TEMPLATE", "RT", "RP"]);
+    const collect = (node, out) => {
+        for (const child of node.childNodes) {
+            if (child.nodeType === Node.TEXT_NODE || child.nodeType === Node.CDATA_SECTION_NODE) {
+                out.push(child.data);
+            } else if (child.nodeType === Node.ELEMENT_NODE && !SKIPPED.has(child.tagName.toUpperCase())) {
+                collect(child, out);
+            }
+        }
+        return out;
+    };
+    // 加上 :scope 前缀，选择器的每一部分都只在行内匹配（与 XPath 的 .// 一致）
+    const select = (row, selector) => selector === ":scope" ? row : row.querySelector(":scope " + selector);
+    const result = {};
+    for (const [key, spec] of Object.entries(payload)) {
+        let rows = Array.from(document.querySelectorAll(spec.rows));
+        if (spec.limit !== null) {
+            rows = rows.slice(0, spec.limit);
+        }
+        result[key] = rows.map((row) => {
+            const raw = {};
+            for (const [name, selector, attr, separator] of spec.fields) {
+                const element = select(row, selector);
+                if (!element) {
+                    raw[name] = null;
+                } else if (attr !== null) {
+                    raw[name] = element.getAttribute(attr) || "";
+                } else {
+                    raw[name] = collect(element, []).join(separator);
+                }
+            }
+            return raw;
+        });
+    }
+    return result;
+}
+"""
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    列表项字段
+
+    - selector: 相对行元素的 CSS 选择器，取第一个匹配的元素
+    - attr: 取该属性的值；为 None 时取去掉首尾空白的文本
+    - separator: 取文本时各文本节点之间的分隔符
+    - default: 没有匹配元素时的值
+    - post: 后处理函数
+    - source: 派生字段，由同一行中已提取的 source 字段经 post 计算得到，不访问页面
+    """
+    selector: Optional[str] = None
+    attr: Optional[str] = None
+    default: str = ""
+    separator: str = ""
+    post: Optional[Callable[[str], str]] = None
+    source: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ListSpec:
+    """列表页定义：行选择器和按输出顺序排列的字段"""
+    name: str
+    rows: str
+    fields: Dict[str, FieldSpec] = field(default_factory=dict)
+
+
+class ListExtractor:
+    """
+    编译后的列表提取器
+
+    导入时将 ListSpec 中的选择器编译为 XPath；同一行中共用选择器的字段只查找一次元素，
+    派生字段在页面元素提取完成后按字段顺序计算。
+    """
+
+    def __init__(self, spec: ListSpec):
+        self.spec = spec
+        self._rows = etree.XPath(css_to_xpath(spec.rows))
+        self._selectors: Dict[str, etree.XPath] = {}
+        for name, field_spec in spec.fields.items():
+            if field_spec.source is not None:
+                if field_spec.source not in spec.fields or field_spec.post is None:
+                    raise ValueError(f"{spec.name} 的派生字段 {name} 定义不完整")
+            elif field_spec.selector is None:
+                raise ValueError(f"{spec.name} 的字段 {name} 缺少选择器")
+            elif field_spec.selector not in self._selectors:
+                self._selectors[field_spec.selector] = etree.XPath(css_to_xpath(field_spec.selector))
+
+    def extract_lxml(self, root, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """从 lxml 树中提取行"""
+        rows = []
+        for row in self._rows(root)[:limit]:
+            try:
+                elements = {}
+                for selector, xpath in self._selectors.items():
+                    matches = xpath(row)
+                    elements[selector] = matches[0] if matches else None
+                rows.append(self.build_row(self._raw_values(elements, self._lxml_value)))
+            except Exception as e:
+                logger.warning(f"解析{self.spec.name}时出错: {str(e)}")
+        return rows
+
+    def extract_bs4(self, soup, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """从 BeautifulSoup 树中提取行"""
+        rows = []
+        for row in soup.select(self.spec.rows)[:limit]:
+            try:
+                elements = {
+                    selector: row if selector == SELF_SELECTOR else row.select_one(scoped_selector(selector))
+                    for selector in self._selectors
+                }
+                rows.append(self.build_row(self._raw_values(elements, self._bs4_value)))
+            except Exception as e:
+                logger.warning(f"解析{self.spec.name}时出错: {str(e)}")
+        return rows
+
+    def evaluate_payload(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """生成 EVALUATE_SCRIPT 使用的可序列化定义"""
+        return {
+            "rows": self.spec.rows,
+            "limit": limit,
+            "fields": [
+                [name, field_spec.selector, field_spec.attr, field_spec.separator]
+                for name, field_spec in self.spec.fields.items()
+                if field_spec.source is None
+            ]
+        }
+
+    def from_evaluated(self, raw_rows: List[Dict[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """将 EVALUATE_SCRIPT 返回的原始值转换为最终的行"""
+        rows = []
+        for raw in raw_rows:
+            try:
+                rows.append(self.build_row(raw))
+            except Exception as e:
+                logger.warning(f"解析{self.spec.name}时出错: {str(e)}")
+        return rows
+
+    def build_row(self, raw: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        由原始值生成一行
+
+        Args:
+            raw: 字段名到原始值的映射，元素不存在时为 None（或缺少该字段）
+        """
+        values = {}
+        for name, field_spec in self.spec.fields.items():
+            if field_spec.source is not None:
+                continue
+            value = raw.get(name)
+            if value is None:
+                value = field_spec.default
+            elif field_spec.attr is None:
+                value = value.strip()
+            values[name] = field_spec.post(value) if field_spec.post else value
+
+        # 按字段顺序输出，派生字段在此计算
+        row = {}
+        for name, field_spec in self.spec.fields.items():
+            row[name] = field_spec.post(values[field_spec.source]) if field_spec.source is not None else values[name]
+        return row
+
+    def _raw_values(self, elements: Dict[str, Any], get_value: Callable[[Any, FieldSpec], str]) -> Dict[str, Optional[str]]:
+        raw = {}
+        for name, field_spec in self.spec.fields.items():
+            if field_spec.source is None:
+                element = elements[field_spec.selector]
+                raw[name] = None if element is None else get_value(element, field_spec)
+        return raw
+
+    @staticmethod
+    def _lxml_value(element, field_spec: FieldSpec) -> str:
+        if field_spec.attr is not None:
+            return element.get(field_spec.attr) or ""
+        return text_of(element, field_spec.separator)
+
+    @staticmethod
+    def _bs4_value(element, field_spec: FieldSpec) -> str:
+        if field_spec.attr is not None:
+            return element.get(field_spec.attr) or ""
+        return element.get_text(separator=field_spec.separator)
+
+
+async def evaluate_lists(page, lists: Dict[str, Tuple[ListExtractor, Optional[int]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    在浏览器页面中执行提取脚本，只传回需要的字段
+
+    Args:
+        page: Playwright 页面
+        lists: 结果键到 (提取器, 最多行数) 的映射
+
+    Returns:
+        结果键到行列表的映射
+    """
+    payload = {key: extractor.evaluate_payload(limit) for key, (extractor, limit) in lists.items()}
+    raw = await page.evaluate(EVALUATE_SCRIPT, payload)
+    return {key: extractor.from_evaluated(raw.get(key) or []) for key, (extractor, _) in lists.items()}
@@ -1,33 +1,87 @@
 """
 响应格式化模块
+
+文章列表逐篇生成输出并累计长度，在最后一篇能完整放下的文章处停止，
+保证 JSON 始终有效；未返回的文章通过 next_continuation 令牌继续获取。
+
+compact 格式输出无缩进的列式 JSON：字段名只出现一次，每篇文章是一行数组，
+占位值（如“未知公众号”）输出为 null。安装了 orjson 时使用 orjson 序列化。
 """
 import json
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，pip install .[fast]
+    orjson = None
+
+from .offload import Offloader, estimate_size, get_offloader
+from .metrics import get_metrics
+from .chunking import content_digest, encode_continuation, decode_continuation
+from .errors import MCPError
 
 # 字符限制（约25k tokens）
 CHARACTER_LIMIT = 25000 * 4
 
+# JSON 模板中文章列表的占位符
+_ARTICLES_PLACEHOLDER = "\x00articles\x00"
+
+# 列表工具可投影的文章字段
+ArticleField = Literal["title", "article_id", "url", "summary", "account_name", "publish_time"]
+
+# 解析器在字段缺失时填入的占位值，compact 格式中输出为 null
+PLACEHOLDER_VALUES = frozenset({"无标题", "无摘要", "未知公众号", "未知时间"})
+
+
+def dumps_compact(data: Any) -> str:
+    """无缩进序列化，安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            # orjson 不支持的类型（如超过 64 位的整数）交给标准库
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
 class ResponseFormatter:
     """响应格式化器"""
     
     @staticmethod
     def format_response(
         data: Any,
-        format: Literal["json", "markdown"] = "json",
-        detail: Literal["concise", "detailed"] = "concise"
+        format: Literal["json", "markdown", "compact"] = "json",
+        detail: Literal["concise", "detailed"] = "concise",
+        continuation: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> str:
         """
         格式化响应数据
         
         Args:
             data: 要格式化的数据
-            format: 输出格式（json 或 markdown）
+            format: 输出格式（json、markdown 或列式的 compact）
             detail: 详细级别（concise 或 detailed）
+            continuation: 上一次响应中的 next_continuation，从其指向的文章开始输出
+            fields: 列表中每篇文章只保留这些字段（仅对 json 和 compact 生效）
             
         Returns:
             格式化后的字符串
         """
-        if format == "json":
+        # 文章列表：逐篇输出，在字符限制内完整地停止
+        if isinstance(data, dict) and isinstance(data.get("articles"), list):
+            start = ResponseFormatter._continuation_start(data["articles"], continuation)
+            if format == "json":
+                stream = ResponseFormatter._stream_json_list(data, detail, start, CHARACTER_LIMIT, fields)
+            elif format == "compact":
+                stream = ResponseFormatter._stream_compact_list(data, detail, start, CHARACTER_LIMIT, fields)
+            else:
+                stream = ResponseFormatter._stream_markdown_list(data, detail, start, CHARACTER_LIMIT)
+            return "".join(stream)
+        
+        if format == "compact":
+            result = dumps_compact(ResponseFormatter._extract_concise_data(data) if detail == "concise" else data)
+        elif format == "json":
             if detail == "concise":
                 # 返回精简的 JSON
                 result = json.dumps(ResponseFormatter._extract_concise_data(data), indent=2, ensure_ascii=False)
@@ -46,6 +100,267 @@ class ResponseFormatter:
         
         return result
     
+    @staticmethod
+    async def format_response_async(
+        data: Any,
+        format: Literal["json", "markdown", "compact"] = "json",
+        detail: Literal["concise", "detailed"] = "concise",
+        offloader: Optional[Offloader] = None,
+        continuation: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> str:
+        """
+        格式化响应数据，较大的响应在执行器中格式化，不阻塞事件循环
+        
+        Args:
+            data: 要格式化的数据
+            format: 输出格式（json、markdown 或 compact）
+            detail: 详细级别（concise 或 detailed）
+            offloader: 卸载器，默认使用进程级共享的卸载器
+            continuation: 上一次响应中的 next_continuation
+            fields: 列表中每篇文章只保留这些字段
+            
+        Returns:
+            格式化后的字符串
+        """
+        if continuation and isinstance(data, dict) and isinstance(data.get("articles"), list):
+            # 先在当前进程校验令牌，使错误类型不因跨进程传递而丢失
+            ResponseFormatter._continuation_start(data["articles"], continuation)
+        offloader = offloader or get_offloader()
+        with get_metrics().stage("format"):
+            return await offloader.run(
+                ResponseFormatter.format_response, data, format, detail, continuation, fields,
+                size=estimate_size(data)
+            )
+    
+    @staticmethod
+    def _articles_digest(articles: List[Dict[str, Any]]) -> str:
+        """文章列表摘要，用于确认 continuation 对应的列表没有变化"""
+        keys = (str(article.get("article_id") or article.get("url") or article.get("title", "")) for article in articles)
+        return content_digest("\n".join(keys))
+    
+    @staticmethod
+    def _continuation_start(articles: List[Dict[str, Any]], continuation: Optional[str]) -> int:
+        """
+        解析 continuation 令牌，返回本次输出的第一篇文章的序号
+        
+        Raises:
+            MCPError: 令牌无效，或文章列表已发生变化
+        """
+        if not continuation:
+            return 0
+        position = decode_continuation(continuation)
+        if position["digest"] != ResponseFormatter._articles_digest(articles):
+            raise MCPError(
+                message="文章列表已发生变化，continuation 已失效",
+                suggestion="请不带 continuation 重新调用，从第一篇文章开始获取",
+                kind="cursor_expired"
+            )
+        if position["index"] >= len(articles):
+            raise MCPError(
+                message=f"continuation 超出文章列表范围（共 {len(articles)} 篇）",
+                suggestion="请使用上一次响应中返回的 next_continuation",
+                kind="invalid_cursor"
+            )
+        return position["index"]
+    
+    @staticmethod
+    def _iter_fitting(
+        articles: List[Dict[str, Any]],
+        start: int,
+        render: Callable[[int, Dict[str, Any]], str],
+        separator: str,
+        budget: int
+    ) -> Iterator[str]:
+        """
+        从 start 开始逐篇生成文章输出，累计长度不超过 budget
+        
+        第一篇就放不下时截短其正文后输出，保证每次调用都有进展。
+        
+        Returns:
+            （生成器返回值）下一篇未输出文章的序号
+        """
+        used = 0
+        for index in range(start, len(articles)):
+            piece = render(index, articles[index])
+            cost = len(piece) + (len(separator) if index > start else 0)
+            if used + cost > budget:
+                if index > start:
+                    return index
+                piece = ResponseFormatter._render_trimmed(index, articles[index], render, budget)
+                cost = len(piece)
+            if index > start:
+                yield separator
+            yield piece
+            used += cost
+        return len(articles)
+    
+    @staticmethod
+    def _render_trimmed(
+        index: int,
+        article: Dict[str, Any],
+        render: Callable[[int, Dict[str, Any]], str],
+        budget: int
+    ) -> str:
+        """截短正文使单篇文章的输出不超过 budget，无正文可截时原样输出"""
+        content = article.get("content") or ""
+        if not content:
+            return render(index, article)
+        overhead = len(render(index, {**article, "content": "", "content_truncated": True}))
+        # 转义会使 JSON 中的正文变长，逐步收缩直到放得下
+        allowed = max(budget - overhead, 0)
+        while True:
+            piece = render(index, {**article, "content": content[:allowed], "content_truncated": True})
+            if len(piece) <= budget or allowed == 0:
+                return piece
+            allowed = int(allowed * 0.8)
+    
+    @staticmethod
+    def _list_position(articles: List[Dict[str, Any]], start: int, end: int) -> Dict[str, Any]:
+        """列表分段信息，全部文章在一次响应中返回时为空"""
+        position: Dict[str, Any] = {}
+        if start > 0 or end < len(articles):
+            position["article_range"] = {"offset": start, "end": end, "total": len(articles)}
+        if end < len(articles):
+            position["next_continuation"] = encode_continuation(end, ResponseFormatter._articles_digest(articles))
+        return position
+    
+    @staticmethod
+    def _longest_position(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """最长的分段信息，用于预先为响应结尾预留空间"""
+        total = len(articles)
+        return {
+            "article_range": {"offset": total, "end": total, "total": total},
+            "next_continuation": encode_continuation(total, ResponseFormatter._articles_digest(articles))
+        }
+    
+    @staticmethod
+    def _json_frame(meta: Dict[str, Any], extra: Dict[str, Any], compact: bool = False) -> List[str]:
+        """将 JSON 响应按文章列表所在位置拆成前后两部分"""
+        template = {key: (_ARTICLES_PLACEHOLDER if key == "articles" else value) for key, value in meta.items()}
+        template.update(extra)
+        text = dumps_compact(template) if compact else json.dumps(template, indent=2, ensure_ascii=False)
+        return text.split(json.dumps(_ARTICLES_PLACEHOLDER), 1)
+    
+    @staticmethod
+    def _list_meta(data: Dict[str, Any], detail: str) -> Dict[str, Any]:
+        """列表响应中文章以外的部分，文章列表留空"""
+        if detail != "concise":
+            return data
+        return ResponseFormatter._extract_concise_data(
+            {**data, "articles": [], "total_results": data.get("total_results", len(data["articles"]))}
+        )
+    
+    @staticmethod
+    def _list_projection(detail: str, fields: Optional[Sequence[str]]) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+        """列表中单篇文章的输出形式：指定字段、精简或原样（None）"""
+        if fields:
+            return lambda article: ResponseFormatter._project_article(article, fields)
+        if detail == "concise":
+            return ResponseFormatter._concise_article
+        return None
+    
+    @staticmethod
+    def _stream_json_list(
+        data: Dict[str, Any],
+        detail: str,
+        start: int,
+        limit: int,
+        fields: Optional[Sequence[str]] = None
+    ) -> Iterator[str]:
+        """逐篇生成文章列表的 JSON，输出与 json.dumps(indent=2) 一致"""
+        articles = data["articles"]
+        meta = ResponseFormatter._list_meta(data, detail)
+        project = ResponseFormatter._list_projection(detail, fields)
+        
+        def render(index: int, article: Dict[str, Any]) -> str:
+            item = project(article) if project else article
+            return "    " + json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+        
+        # 按最长的分段信息预留结尾的空间
+        prefix, worst_suffix = ResponseFormatter._json_frame(meta, ResponseFormatter._longest_position(articles))
+        budget = limit - len(prefix) - len(worst_suffix) - len("[\n\n  ]")
+        
+        yield prefix
+        if start >= len(articles):
+            end = start
+            yield "[]"
+        else:
+            yield "[\n"
+            end = yield from ResponseFormatter._iter_fitting(articles, start, render, ",\n", budget)
+            yield "\n  ]"
+        yield ResponseFormatter._json_frame(meta, ResponseFormatter._list_position(articles, start, end))[1]
+    
+    @staticmethod
+    def _stream_compact_list(
+        data: Dict[str, Any],
+        detail: str,
+        start: int,
+        limit: int,
+        fields: Optional[Sequence[str]] = None
+    ) -> Iterator[str]:
+        """逐篇生成列式 JSON：fields 给出字段名，articles 中每篇文章是按 fields 顺序排列的数组"""
+        articles = data["articles"]
+        project = ResponseFormatter._list_projection(detail, fields)
+        
+        # 字段按首次出现的顺序排列
+        columns: Dict[str, None] = dict.fromkeys(fields or ())
+        if not fields:
+            for article in articles:
+                columns.update(dict.fromkeys(project(article) if project else article))
+        if any("error" in article for article in articles):
+            columns.update(dict.fromkeys(("article_id", "error", "suggestion")))
+        columns = list(columns)
+        meta = {"fields": columns, **ResponseFormatter._list_meta(data, detail)}
+        
+        def render(index: int, article: Dict[str, Any]) -> str:
+            item = article if "error" in article else (project(article) if project else article)
+            return dumps_compact([ResponseFormatter._compact_value(item.get(column)) for column in columns])
+        
+        prefix, worst_suffix = ResponseFormatter._json_frame(meta, ResponseFormatter._longest_position(articles), compact=True)
+        budget = limit - len(prefix) - len(worst_suffix) - len("[]")
+        
+        yield prefix + "["
+        end = yield from ResponseFormatter._iter_fitting(articles, start, render, ",", budget)
+        yield "]"
+        yield ResponseFormatter._json_frame(meta, ResponseFormatter._list_position(articles, start, end), compact=True)[1]
+    
+    @staticmethod
+    def _compact_value(value: Any) -> Any:
+        """compact 格式中占位值输出为 null"""
+        if isinstance(value, str) and value in PLACEHOLDER_VALUES:
+            return None
+        return value
+    
+    @staticmethod
+    def _stream_markdown_list(data: Dict[str, Any], detail: str, start: int, limit: int) -> Iterator[str]:
+        """逐篇生成文章列表的 Markdown"""
+        articles = data["articles"]
+        
+        def render(index: int, article: Dict[str, Any]) -> str:
+            return "\n" + ResponseFormatter._format_markdown_list_item(index + 1, article, detail)
+        
+        def footer(position: Dict[str, Any]) -> str:
+            lines = []
+            if "article_range" in position:
+                article_range = position["article_range"]
+                lines.append(f"\n已显示第 {article_range['offset'] + 1}-{article_range['end']} 篇，共 {len(articles)} 篇文章")
+            else:
+                lines.append(f"\n共 {len(articles)} 篇文章")
+            if "failed" in data:
+                lines.append(f"成功 {data.get('succeeded', 0)} 篇，失败 {data['failed']} 篇")
+            if "next_continuation" in position:
+                lines.append(f"\n**下一页**: 使用 `continuation=\"{position['next_continuation']}\"` 获取后续文章")
+            return "\n" + "\n".join(lines)
+        
+        header = "\n".join(ResponseFormatter._markdown_list_header(data))
+        # 按最长的页脚预留空间
+        budget = limit - len(header) - len(footer(ResponseFormatter._longest_position(articles)))
+        
+        yield header
+        end = yield from ResponseFormatter._iter_fitting(articles, start, render, "", budget)
+        yield footer(ResponseFormatter._list_position(articles, start, end))
+    
     @staticmethod
     def _truncate_response(text: str, max_chars: int) -> str:
         """截断过长的响应"""
@@ -60,8 +375,14 @@ To get complete info:
 3. Use 'concise' detail level"""
     
     @staticmethod
-    def _extract_concise_data(data: Any) -> Any:
-        """提取精简数据"""
+    def _extract_concise_data(data: Any, fields: Optional[Sequence[str]] = None) -> Any:
+        """
+        提取精简数据
+        
+        Args:
+            data: 原始数据
+            fields: 列表中每篇文章只保留这些字段，默认使用精简字段
+        """
         if isinstance(data, dict):
             # 处理文章列表
             if "articles" in data:
@@ -86,20 +407,17 @@ To get complete info:
                 if "account_name" in data:
                     concise_data["account_name"] = data["account_name"]
                 
+                # 复制批量获取统计（如果存在）
+                for key in ("succeeded", "failed"):
+                    if key in data:
+                        concise_data[key] = data[key]
+                
                 # 精简文章列表
                 for article in data.get("articles", []):
-                    concise_article = {
-                        "title": article.get("title", "无标题"),
-                        "article_id": article.get("article_id", ""),
-                        "account_name": article.get("account_name", "未知公众号"),
-                        "publish_time": article.get("publish_time", "未知时间"),
-                    }
-                    
-                    # 添加摘要（如果存在）
-                    if "summary" in article:
-                        concise_article["summary"] = article["summary"]
-                    
-                    concise_data["articles"].append(concise_article)
+                    if fields:
+                        concise_data["articles"].append(ResponseFormatter._project_article(article, fields))
+                    else:
+                        concise_data["articles"].append(ResponseFormatter._concise_article(article))
                 
                 return concise_data
             
@@ -130,56 +448,127 @@ To get complete info:
         return data
     
     @staticmethod
-    def _format_markdown_concise(data: Any) -> str:
-        """格式化为精简 Markdown"""
-        if not isinstance(data, dict):
-            return f"```json\n{json.dumps(data, indent=2, ensure_ascii=False)}\n```"
+    def _concise_article(article: Dict[str, Any]) -> Dict[str, Any]:
+        """精简列表中的单篇文章"""
+        # 获取失败的条目保留错误信息
+        if "error" in article:
+            return {
+                "article_id": article.get("article_id", ""),
+                "error": article["error"],
+                "suggestion": article.get("suggestion", "")
+            }
+        
+        concise_article = {
+            "title": article.get("title", "无标题"),
+            "article_id": article.get("article_id", ""),
+            "account_name": article.get("account_name", "未知公众号"),
+            "publish_time": article.get("publish_time", "未知时间"),
+        }
         
+        # 添加摘要（如果存在）
+        if "summary" in article:
+            concise_article["summary"] = article["summary"]
+        
+        # 添加内容摘要（如果存在）
+        if article.get("content"):
+            content = article["content"]
+            concise_article["content_preview"] = content[:200] + "..." if len(content) > 200 else content
+        
+        return concise_article
+    
+    @staticmethod
+    def _project_article(article: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+        """只保留指定字段，获取失败的条目保留错误信息"""
+        if "error" in article:
+            return ResponseFormatter._concise_article(article)
+        return {field: article.get(field) for field in fields}
+    
+    @staticmethod
+    def _markdown_list_header(data: Dict[str, Any]) -> List[str]:
+        """文章列表的标题和分页信息"""
         result = []
+        if "query" in data:
+            result.append(f"# 搜索结果: {data['query']}")
+        elif "account_name" in data:
+            result.append(f"# {data['account_name']} 的文章")
+        elif "category" in data:
+            category_names = {
+                "hot": "热门",
+                "tech": "科技",
+                "finance": "财经",
+                "entertainment": "娱乐"
+            }
+            category_display = category_names.get(data["category"], data["category"])
+            result.append(f"# {category_display}文章")
+        else:
+            result.append("# 文章列表")
         
-        # 处理文章列表
-        if "articles" in data:
-            # 添加标题
-            if "query" in data:
-                result.append(f"# 搜索结果: {data['query']}")
-            elif "account_name" in data:
-                result.append(f"# {data['account_name']} 的文章")
-            elif "category" in data:
-                category_names = {
-                    "hot": "热门",
-                    "tech": "科技",
-                    "finance": "财经",
-                    "entertainment": "娱乐"
-                }
-                category_display = category_names.get(data["category"], data["category"])
-                result.append(f"# {category_display}文章")
-            else:
-                result.append("# 文章列表")
+        # 添加分页信息
+        if "pagination" in data:
+            pagination = data["pagination"]
+            result.append(f"\n**页码**: {pagination.get('current_page', 1)}/{pagination.get('total_pages', 1)} | "
+                         f"**结果数**: {pagination.get('total_results', 0)}")
+        
+        result.append("\n## 文章\n")
+        return result
+    
+    @staticmethod
+    def _format_markdown_list_item(index: int, article: Dict[str, Any], detail: str) -> str:
+        """格式化列表中的单篇文章"""
+        if "error" in article:
+            return ResponseFormatter._format_markdown_error_item(index, article)
+        
+        result = [
+            f"### {index}. {article.get('title', '无标题')}",
+            f"**公众号**: {article.get('account_name', '未知公众号')} | "
+            f"**发布时间**: {article.get('publish_time', '未知时间')}"
+        ]
+        
+        if detail == "concise":
+            if "summary" in article:
+                result.append(f"\n{article['summary']}\n")
+            
+            if article.get("content"):
+                content = article["content"]
+                preview = content[:300] + "..." if len(content) > 300 else content
+                result.append(f"\n{preview}\n")
+        else:
+            if "url" in article:
+                result.append(f"\n**链接**: {article['url']}")
             
-            # 添加分页信息
-            if "pagination" in data:
-                pagination = data["pagination"]
-                result.append(f"\n**页码**: {pagination.get('current_page', 1)}/{pagination.get('total_pages', 1)} | "
-                             f"**结果数**: {pagination.get('total_results', 0)}")
+            if "article_id" in article:
+                result.append(f"\n**文章ID**: {article['article_id']}")
             
-            # 添加文章列表
-            result.append("\n## 文章\n")
+            if "summary" in article:
+                result.append(f"\n**摘要**:\n> {article['summary']}\n")
             
-            for i, article in enumerate(data.get("articles", []), 1):
-                result.append(f"### {i}. {article.get('title', '无标题')}")
-                result.append(f"**公众号**: {article.get('account_name', '未知公众号')} | "
-                             f"**发布时间**: {article.get('publish_time', '未知时间')}")
-                
-                if "summary" in article:
-                    result.append(f"\n{article['summary']}\n")
-                
-                result.append("---\n")
+            if article.get("content"):
+                result.append(f"\n**内容**:\n\n{article['content']}\n")
             
-            # 添加结果统计
-            result.append(f"\n共 {len(data.get('articles', []))} 篇文章")
+            if article.get("content_truncated"):
+                result.append("*正文过长已截断，请使用 get_wechat_article 分段获取全文*\n")
+        
+        result.append("---\n")
+        return "\n".join(result)
+    
+    @staticmethod
+    def _format_markdown_error_item(index: int, article: Dict[str, Any]) -> str:
+        """格式化获取失败的列表条目"""
+        return (f"### {index}. 获取失败: {article.get('article_id', '')}\n"
+                f"**错误**: {article['error']}\n"
+                f"**建议**: {article.get('suggestion', '请稍后重试')}\n"
+                f"---\n")
+    
+    @staticmethod
+    def _format_markdown_concise(data: Any) -> str:
+        """格式化为精简 Markdown"""
+        if not isinstance(data, dict):
+            return f"```json\n{json.dumps(data, indent=2, ensure_ascii=False)}\n```"
+        
+        result = []
         
-        # 处理单篇文章
-        elif "title" in data and "article_id" in data:
+        # 处理单篇文章（文章列表由 _stream_markdown_list 处理）
+        if "title" in data and "article_id" in data:
             result.append(f"# {data.get('title', '无标题')}")
             result.append(f"**公众号**: {data.get('account_name', '未知公众号')} | "
                          f"**发布时间**: {data.get('publish_time', '未知时间')}")
@@ -206,55 +595,8 @@ To get complete info:
         
         result = []
         
-        # 处理文章列表
-        if "articles" in data:
-            # 添加标题
-            if "query" in data:
-                result.append(f"# 搜索结果: {data['query']}")
-            elif "account_name" in data:
-                result.append(f"# {data['account_name']} 的文章")
-            elif "category" in data:
-                category_names = {
-                    "hot": "热门",
-                    "tech": "科技",
-                    "finance": "财经",
-                    "entertainment": "娱乐"
-                }
-                category_display = category_names.get(data["category"], data["category"])
-                result.append(f"# {category_display}文章")
-            else:
-                result.append("# 文章列表")
-            
-            # 添加分页信息
-            if "pagination" in data:
-                pagination = data["pagination"]
-                result.append(f"\n**页码**: {pagination.get('current_page', 1)}/{pagination.get('total_pages', 1)} | "
-                             f"**结果数**: {pagination.get('total_results', 0)}")
-            
-            # 添加文章列表
-            result.append("\n## 文章\n")
-            
-            for i, article in enumerate(data.get("articles", []), 1):
-                result.append(f"### {i}. {article.get('title', '无标题')}")
-                result.append(f"**公众号**: {article.get('account_name', '未知公众号')} | "
-                             f"**发布时间**: {article.get('publish_time', '未知时间')}")
-                
-                if "url" in article:
-                    result.append(f"\n**链接**: {article['url']}")
-                
-                if "article_id" in article:
-                    result.append(f"\n**文章ID**: {article['article_id']}")
-                
-                if "summary" in article:
-                    result.append(f"\n**摘要**:\n> {article['summary']}\n")
-                
-                result.append("---\n")
-            
-            # 添加结果统计
-            result.append(f"\n共 {len(data.get('articles', []))} 篇文章")
-        
-        # 处理单篇文章
-        elif "title" in data and "article_id" in data:
+        # 处理单篇文章（文章列表由 _stream_markdown_list 处理）
+        if "title" in data and "article_id" in data:
             result.append(f"# {data.get('title', '无标题')}")
             result.append(f"**公众号**: {data.get('account_name', '未知公众号')} | "
                          f"**发布时间**: {data.get('publish_time', '未知时间')}")
@@ -275,6 +617,13 @@ To get complete info:
             
             if "content" in data and data["content"]:
                 result.append(f"\n## 内容\n\n{data['content']}\n")
+            
+            # 分段返回的正文
+            content_range = data.get("content_range")
+            if content_range and (content_range["offset"] > 0 or data.get("next_cursor")):
+                result.append(f"\n*正文第 {content_range['offset'] + 1}-{content_range['end']} 字，共 {content_range['total_chars']} 字*")
+            if data.get("next_cursor"):
+                result.append(f"\n**下一段**: 使用 `cursor=\"{data['next_cursor']}\"` 获取后续正文")
         
         # 其他情况
         else:
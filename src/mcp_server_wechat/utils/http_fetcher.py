@@ -0,0 +1,137 @@
+"""
+HTTP 直连抓取模块
+
+mp.weixin.qq.com 的文章标题、公众号和正文都在服务端渲染的 HTML 中，
+可以直接用 httpx 获取并解析，无需启动浏览器。
+只有在页面需要 JS 渲染或返回验证页时才回退到 Playwright。
+"""
+import os
+import logging
+from typing import Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+
+from .browser import USER_AGENT
+from .block_detection import is_block_html
+
+logger = logging.getLogger("http_fetcher")
+
+# 环境变量配置
+HTTP_TIMEOUT = int(os.getenv("WECHAT_SCRAPER_TIMEOUT", "30000")) / 1000  # 秒
+HTTP_FAST_PATH_ENABLED = os.getenv("WECHAT_SCRAPER_HTTP_FAST_PATH", "true").lower() == "true"
+HTTP_MAX_CONNECTIONS = int(os.getenv("WECHAT_SCRAPER_HTTP_MAX_CONNECTIONS", "20"))
+
+# 支持 HTTP 直连的域名
+FAST_PATH_HOSTS = {"mp.weixin.qq.com"}
+
+# 服务端渲染完整的文章页必须包含的元素
+REQUIRED_MARKERS = ('id="activity-name"', 'id="js_content"')
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖 h2 包，未安装时退回 HTTP/1.1"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def supports_fast_path(url: str, hosts: Optional[Set[str]] = None) -> bool:
+    """判断 URL 是否可以走 HTTP 直连路径"""
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in (hosts or FAST_PATH_HOSTS)
+
+
+def needs_browser(html: str, final_url: str = "", hosts: Optional[Set[str]] = None) -> bool:
+    """
+    判断直连获取的页面是否需要回退到浏览器
+
+    Args:
+        html: 直连获取的 HTML
+        final_url: 跟随重定向后的最终 URL
+        hosts: 允许直连的域名，默认为 FAST_PATH_HOSTS
+
+    Returns:
+        True 表示页面是验证页或缺少服务端渲染的正文，需要浏览器处理
+    """
+    if final_url and not supports_fast_path(final_url, hosts):
+        return True
+    if is_block_html(html):
+        return True
+    return not all(marker in html for marker in REQUIRED_MARKERS)
+
+
+class ArticleHttpFetcher:
+    """
+    基于 httpx 的文章页抓取器
+
+    内部持有一个连接池化的 AsyncClient，可在所有调用之间复用；
+    安装了 h2 时启用 HTTP/2。
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, max_connections: int = HTTP_MAX_CONNECTIONS):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """懒加载共享的 AsyncClient"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=_http2_available(),
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "zh-CN,zh;q=0.9"
+                }
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """
+        直连获取文章 HTML
+
+        Args:
+            url: 文章URL
+
+        Returns:
+            可直接解析的 HTML；页面需要浏览器处理时返回 None
+
+        Raises:
+            httpx.HTTPError: 网络错误或非 2xx 响应
+        """
+        response = await self.client.get(url)
+        response.raise_for_status()
+        html = response.text
+        # 请求的主机可能是配置的替代地址（见 endpoints 模块），重定向到其他主机时才视为异常
+        hosts = FAST_PATH_HOSTS | {urlparse(url).hostname}
+        if needs_browser(html, str(response.url), hosts):
+            logger.info(f"直连页面需要浏览器处理，回退到 Playwright: {url}")
+            return None
+        return html
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_http_fetcher: Optional[ArticleHttpFetcher] = None
+
+
+def get_http_fetcher() -> ArticleHttpFetcher:
+    """获取进程级共享的 HTTP 抓取器"""
+    global _http_fetcher
+    if _http_fetcher is None:
+        _http_fetcher = ArticleHttpFetcher()
+    return _http_fetcher
@@ -0,0 +1,159 @@
+"""
+请求拦截模块
+
+在共享的浏览器上下文上通过 context.route 拦截请求，
+按资源类型和 URL 特征中止不需要的请求（图片、字体、样式、统计脚本、广告等），
+只保留读取 DOM 文本所需的资源。
+"""
+import os
+import re
+import logging
+import weakref
+from typing import Any, Dict, Iterable, Optional, Set
+
+from playwright.async_api import BrowserContext, Page, Request, Route
+
+logger = logging.getLogger("interception")
+
+# 环境变量配置
+BLOCK_RESOURCES_ENABLED = os.getenv("WECHAT_SCRAPER_BLOCK_RESOURCES", "true").lower() == "true"
+BLOCKED_RESOURCE_TYPES = {
+    item.strip()
+    for item in os.getenv(
+        "WECHAT_SCRAPER_BLOCKED_RESOURCE_TYPES",
+        "image,media,font,stylesheet"
+    ).split(",")
+    if item.strip()
+}
+
+# 无论页面类型都会拦截的 URL 特征（统计、广告、跟踪）
+BLOCKED_URL_PATTERNS = (
+    r"hm\.baidu\.com",
+    r"pb\.sogou\.com",
+    r"ping\.sogou\.com",
+    r"cnzz\.com",
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"/cl\.gif",
+    r"/pv\.gif",
+)
+
+# 各页面类型额外放行的资源类型
+# 默认不拦截脚本：搜狗改为脚本渲染结果时，拦截脚本会让列表页静默返回空结果。
+# 在 WECHAT_SCRAPER_BLOCKED_RESOURCE_TYPES 中加入 script 后只对搜索和热门页生效，
+# 公众号文章列表和文章详情依赖脚本渲染，始终保留脚本
+PAGE_TYPE_ALLOWLISTS: Dict[Optional[str], Set[str]] = {
+    "search": set(),
+    "trending": set(),
+    "account": {"script"},
+    "article": {"script"},
+    None: {"script"},
+}
+
+# 按资源类型假定的单个请求大小（字节，取偏大的典型值），被中止的请求没有响应，无法实测
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 30 * 1024,
+    "media": 200 * 1024,
+    "font": 40 * 1024,
+    "stylesheet": 15 * 1024,
+    "script": 30 * 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 5 * 1024
+
+
+class ResourceBlocker:
+    """
+    资源拦截器
+
+    通过 install() 挂载到浏览器上下文上；调用方在导航前用 tag_page()
+    标记页面类型，拦截器据此选择放行规则。
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+        blocked_url_patterns: Iterable[str] = BLOCKED_URL_PATTERNS,
+        allowlists: Optional[Dict[Optional[str], Set[str]]] = None
+    ):
+        self.blocked_types = set(blocked_types)
+        self._url_pattern = re.compile("|".join(blocked_url_patterns)) if blocked_url_patterns else None
+        self.allowlists = allowlists if allowlists is not None else PAGE_TYPE_ALLOWLISTS
+        self._page_types: "weakref.WeakKeyDictionary[Page, str]" = weakref.WeakKeyDictionary()
+
+        # 统计信息
+        self.allowed_requests = 0
+        self.blocked_requests = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.estimated_bytes_saved_upper_bound = 0
+
+    async def install(self, context: BrowserContext):
+        """在浏览器上下文上注册拦截处理器"""
+        await context.route("**/*", self._handle_route)
+        logger.info(f"已启用资源拦截: {', '.join(sorted(self.blocked_types))}")
+
+    def tag_page(self, page: Page, page_type: Optional[str]):
+        """标记页面类型，决定该页面上的放行规则"""
+        if page_type is None:
+            self._page_types.pop(page, None)
+        else:
+            self._page_types[page] = page_type
+
+    def should_block(self, resource_type: str, url: str, page_type: Optional[str] = None) -> bool:
+        """
+        判断请求是否应被拦截
+
+        Args:
+            resource_type: Playwright 资源类型，例如 image、script
+            url: 请求 URL
+            page_type: 页面类型（search、account、trending、article）
+
+        Returns:
+            True 表示应中止该请求
+        """
+        if resource_type == "document":
+            return False
+        if self._url_pattern is not None and self._url_pattern.search(url):
+            return True
+        allowed = self.allowlists.get(page_type, self.allowlists.get(None, set()))
+        return resource_type in self.blocked_types and resource_type not in allowed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回拦截统计信息
+
+        estimated_bytes_saved_upper_bound 不是实测值：被中止的请求没有响应，
+        只能按 ESTIMATED_RESOURCE_BYTES 中每种资源类型的固定估计值累加，只能作为量级参考
+        """
+        return {
+            "allowed_requests": self.allowed_requests,
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "estimated_bytes_saved_upper_bound": self.estimated_bytes_saved_upper_bound
+        }
+
+    async def _handle_route(self, route: Route, request: Request):
+        """拦截处理器：中止被拦截的请求，其余请求继续"""
+        resource_type = request.resource_type
+        if self.should_block(resource_type, request.url, self._page_type_for(request)):
+            self.blocked_requests += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.estimated_bytes_saved_upper_bound += ESTIMATED_RESOURCE_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            try:
+                await route.abort("blockedbyclient")
+            except Exception as e:
+                logger.debug(f"中止请求时出错: {str(e)}")
+            return
+
+        self.allowed_requests += 1
+        try:
+            await route.continue_()
+        except Exception as e:
+            logger.debug(f"放行请求时出错: {str(e)}")
+
+    def _page_type_for(self, request: Request) -> Optional[str]:
+        """获取发起请求的页面类型，Service Worker 等无页面请求返回 None"""
+        try:
+            return self._page_types.get(request.frame.page)
+        except Exception:
+            return None
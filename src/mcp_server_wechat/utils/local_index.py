@@ -0,0 +1,372 @@
+"""
+本地全文索引模块
+
+抓取到的文章详情（含正文）写入 SQLite FTS5 索引，search_local_articles 工具直接在本地检索，
+不访问搜狗，重复的调研问题可以完全绕开最慢、限流最严格的抓取路径。
+
+FTS5 自带的 unicode61 分词器把连续的汉字当作一个词，无法检索中文词语，
+因此索引前先由分词器把文本转换为以空格分隔的词：汉字按相邻两字（bigram）切分，
+字母和数字按连续片段切分。分词器可以替换，只需实现 index_terms 和 match_query。
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+import sqlite3
+import unicodedata
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .article_cache import canonicalize_article_url
+from .errors import MCPError
+from .result_cache import normalize_text
+
+logger = logging.getLogger("local_index")
+
+# 环境变量配置
+LOCAL_INDEX_ENABLED = os.getenv("WECHAT_SCRAPER_LOCAL_INDEX", "true").lower() == "true"
+LOCAL_INDEX_PATH = os.getenv(
+    "WECHAT_SCRAPER_LOCAL_INDEX_PATH",
+    str(Path.home() / ".cache" / "mcp-server-wechat" / "index.db")
+)
+LOCAL_INDEX_MAX_DOCS = int(os.getenv("WECHAT_SCRAPER_LOCAL_INDEX_MAX_DOCS", "20000"))
+
+# 排序权重（bm25 按列）：标题 > 公众号 > 正文
+BM25_WEIGHTS = (5.0, 2.0, 1.0)
+SNIPPET_CHARS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    account_name TEXT NOT NULL,
+    account_key TEXT NOT NULL,
+    publish_time TEXT NOT NULL,
+    published_at TEXT,
+    content TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_account_key ON documents (account_key);
+CREATE INDEX IF NOT EXISTS idx_documents_published_at ON documents (published_at);
+CREATE INDEX IF NOT EXISTS idx_documents_indexed_at ON documents (indexed_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, account_name, content, content='', tokenize='unicode61 remove_diacritics 0'
+);
+"""
+
+# 汉字（含扩展 A 区和兼容汉字）
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_RUN_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+# 发布时间：2025-01-01 08:00、2025-1-1、2025年1月1日、2025/01/01 等
+_PUBLISH_TIME_RE = re.compile(
+    r"(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?(?:\s+(\d{1,2}):(\d{2}))?"
+)
+
+
+def _runs(text: str) -> List[str]:
+    """全角转半角、忽略大小写后切分为汉字片段和字母数字片段"""
+    return _RUN_RE.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+class BigramTokenizer:
+    """
+    汉字 bigram 分词器
+
+    - 索引：每个汉字片段切分为相邻两字，并在片段末尾追加最后一个字，使任意单字都能以前缀匹配检索
+    - 查询：每个汉字片段作为一个短语（相邻 bigram 必须连续出现，即子串匹配），单字按前缀匹配；
+      以空格分隔的多个词之间为 AND 关系
+    """
+
+    name = "bigram"
+
+    def index_terms(self, text: str) -> str:
+        """把文本转换为以空格分隔的索引词"""
+        terms: List[str] = []
+        for run in _runs(text):
+            if _CJK_RE.match(run) and len(run) > 1:
+                terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+                terms.append(run[-1])
+            else:
+                terms.append(run)
+        return " ".join(terms)
+
+    def match_query(self, query: str) -> str:
+        """把用户查询转换为 FTS5 MATCH 表达式，没有可检索的词时返回空字符串"""
+        phrases = []
+        for run in _runs(query):
+            if _CJK_RE.match(run) and len(run) > 1:
+                phrases.append('"' + " ".join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+            elif _CJK_RE.match(run):
+                phrases.append(f'"{run}"*')
+            else:
+                phrases.append(f'"{run}"')
+        return " AND ".join(phrases)
+
+    def highlight_terms(self, query: str) -> List[str]:
+        """用于在原文中定位摘要的查询词"""
+        return _runs(query)
+
+
+def normalize_publish_time(publish_time: str) -> Optional[str]:
+    """
+    把页面上的发布时间规范化为可排序的 'YYYY-MM-DD HH:MM'
+
+    Returns:
+        规范化的时间，无法识别（如“3天前”“未知时间”）时返回 None
+    """
+    match = _PUBLISH_TIME_RE.search(publish_time or "")
+    if match is None:
+        return None
+    year, month, day, hour, minute = match.groups()
+    try:
+        date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+    return f"{int(year):04d}-{int(month):02d}-{int(day):02d} {int(hour or 0):02d}:{minute or '00'}"
+
+
+def _date_bound(value: str, name: str) -> date:
+    """解析 since/until 参数（YYYY-MM-DD）"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise MCPError(
+            message=f"{name} 不是有效的日期: {value}",
+            suggestion="请使用 YYYY-MM-DD 格式，例如 2025-01-01"
+        )
+
+
+def _snippet(content: str, terms: List[str], length: int = SNIPPET_CHARS) -> str:
+    """截取正文中第一个查询词附近的片段作为摘要"""
+    folded = unicodedata.normalize("NFKC", content).casefold()
+    positions = [pos for pos in (folded.find(term) for term in terms) if pos >= 0]
+    start = max(min(positions) - length // 4, 0) if positions else 0
+    snippet = " ".join(content[start:start + length].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if start + length < len(content) else "")
+
+
+class ArticleIndex:
+    """
+    SQLite FTS5 文章全文索引
+
+    - 以规范化 URL 为主键，重复抓取同一篇文章时更新索引
+    - 按 bm25 相关度（标题、公众号名称权重更高）或发布时间排序，支持公众号和时间范围过滤
+    - 文档数超过上限时淘汰最早索引的文章
+    - 数据库开启 WAL 模式，多个服务器进程可以共享；所有数据库操作在线程中执行，不阻塞事件循环
+    """
+
+    def __init__(
+        self,
+        path: str = LOCAL_INDEX_PATH,
+        max_documents: int = LOCAL_INDEX_MAX_DOCS,
+        tokenizer: Optional[BigramTokenizer] = None
+    ):
+        self.path = path
+        self.max_documents = max_documents
+        self.tokenizer = tokenizer or BigramTokenizer()
+        self._initialized = False
+
+        # 统计信息（仅当前进程）
+        self.indexed = 0
+        self.evictions = 0
+        self.searches = 0
+
+    async def add(self, article: Dict[str, Any]):
+        """索引一篇文章，没有正文的文章不索引"""
+        if not article.get("content") or not article.get("url"):
+            return
+        await asyncio.to_thread(self._add, article)
+        self.indexed += 1
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        account: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        sort: str = "relevance"
+    ) -> Dict[str, Any]:
+        """
+        检索本地索引
+
+        Args:
+            query: 检索词，以空格分隔的多个词之间为 AND 关系
+            limit: 返回结果数量
+            account: 只返回该公众号的文章（忽略大小写和多余空白）
+            since: 发布日期下限（YYYY-MM-DD，含当天）
+            until: 发布日期上限（YYYY-MM-DD，含当天）
+            sort: relevance（相关度）或 newest（发布时间倒序）
+
+        Returns:
+            与搜索工具结构相同的结果字典，摘要为正文中命中位置附近的片段，另含相关度 score
+        """
+        match = self.tokenizer.match_query(query)
+        if not match:
+            raise MCPError(
+                message="检索词中没有可检索的文字",
+                suggestion="请输入包含汉字、字母或数字的检索词"
+            )
+        since_bound = _date_bound(since, "since").isoformat() if since else None
+        until_bound = (_date_bound(until, "until") + timedelta(days=1)).isoformat() if until else None
+        account_key = normalize_text(account) if account else None
+
+        rows, total = await asyncio.to_thread(self._search, match, limit, account_key, since_bound, until_bound, sort)
+        self.searches += 1
+
+        terms = self.tokenizer.highlight_terms(query)
+        articles = [
+            {
+                "title": title,
+                "article_id": url,
+                "url": url,
+                "summary": _snippet(content, terms),
+                "account_name": account_name,
+                "publish_time": publish_time,
+                "score": round(-relevance, 3)
+            }
+            for url, title, account_name, publish_time, content, relevance in rows
+        ]
+        return {
+            "query": query,
+            "source": "local_index",
+            "total_results": total,
+            "articles": articles
+        }
+
+    async def count(self) -> int:
+        """索引中的文章数"""
+        return await asyncio.to_thread(self._count)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回索引统计信息"""
+        return {
+            "path": self.path,
+            "tokenizer": self.tokenizer.name,
+            "indexed": self.indexed,
+            "evictions": self.evictions,
+            "searches": self.searches
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接，首次使用时建表"""
+        if not self._initialized:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _fts_values(self, title: str, account_name: str, content: str) -> Tuple[str, str, str]:
+        return (
+            self.tokenizer.index_terms(title),
+            self.tokenizer.index_terms(account_name),
+            self.tokenizer.index_terms(content)
+        )
+
+    def _delete(self, conn: sqlite3.Connection, where: str, params: Tuple[Any, ...]) -> int:
+        """删除文档及其索引词；无内容的 FTS5 表需要用原始词删除"""
+        rows = conn.execute(f"SELECT id, title, account_name, content FROM documents WHERE {where}", params).fetchall()
+        for doc_id, title, account_name, content in rows:
+            conn.execute(
+                "INSERT INTO documents_fts (documents_fts, rowid, title, account_name, content) VALUES ('delete', ?, ?, ?, ?)",
+                (doc_id,) + self._fts_values(title, account_name, content)
+            )
+            conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        return len(rows)
+
+    def _add(self, article: Dict[str, Any]):
+        url = canonicalize_article_url(article["url"])
+        title = article.get("title") or ""
+        account_name = article.get("account_name") or ""
+        publish_time = article.get("publish_time") or ""
+        content = article["content"]
+
+        conn = self._connect()
+        try:
+            with conn:
+                self._delete(conn, "url = ?", (url,))
+                doc_id = conn.execute(
+                    "INSERT INTO documents (url, title, account_name, account_key, publish_time, published_at, content, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, title, account_name, normalize_text(account_name), publish_time,
+                     normalize_publish_time(publish_time), content, time.time())
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO documents_fts (rowid, title, account_name, content) VALUES (?, ?, ?, ?)",
+                    (doc_id,) + self._fts_values(title, account_name, content)
+                )
+                excess = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] - self.max_documents
+                if excess > 0:
+                    self.evictions += self._delete(
+                        conn, "id IN (SELECT id FROM documents ORDER BY indexed_at LIMIT ?)", (excess,)
+                    )
+        finally:
+            conn.close()
+
+    def _search(
+        self,
+        match: str,
+        limit: int,
+        account_key: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+        sort: str
+    ) -> Tuple[List[Tuple[Any, ...]], int]:
+        filters = ["documents_fts MATCH ?"]
+        params: List[Any] = [match]
+        if account_key is not None:
+            filters.append("d.account_key = ?")
+            params.append(account_key)
+        # 无法识别发布时间的文章不参与时间过滤
+        if since is not None:
+            filters.append("d.published_at >= ?")
+            params.append(since)
+        if until is not None:
+            filters.append("d.published_at < ?")
+            params.append(until)
+        where = " AND ".join(filters)
+        order = "d.published_at IS NULL, d.published_at DESC, relevance" if sort == "newest" else "relevance"
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT d.url, d.title, d.account_name, d.publish_time, d.content, bm25(documents_fts, {weights}) AS relevance "
+                f"FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                f"WHERE {where} ORDER BY {order} LIMIT ?",
+                params + [limit]
+            ).fetchall()
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE {where}",
+                params
+            ).fetchone()[0]
+            return rows, total
+        finally:
+            conn.close()
+
+    def _count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            conn.close()
+
+
+_article_index: Optional[ArticleIndex] = None
+
+
+def get_article_index() -> Optional[ArticleIndex]:
+    """获取进程级共享的文章索引，未启用时返回 None"""
+    global _article_index
+    if _article_index is None and LOCAL_INDEX_ENABLED:
+        _article_index = ArticleIndex()
+    return _article_index
@@ -0,0 +1,246 @@
+"""
+指标模块
+
+按工具和阶段记录耗时直方图（浏览器启动、页面池等待、page.goto、wait_for_selector、
+page.content()、解析、格式化等），以及按名称和标签累加的计数器。
+当前工具名通过 contextvars 传递，各阶段无需显式传参。
+
+缓存命中、重试、限流等已有统计对象通过 register_collector 注册，在读取指标时才收集，
+不增加请求路径上的开销。每次记录只有一次字典查找和一次二分查找，可以在生产环境中常开；
+设置 WECHAT_SCRAPER_METRICS=false 可完全关闭。
+
+指标以 JSON（snapshot）和 Prometheus 文本格式（render_prometheus）两种形式导出。
+"""
+import os
+import re
+import time
+import bisect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("metrics")
+
+# 环境变量配置
+METRICS_ENABLED = os.getenv("WECHAT_SCRAPER_METRICS", "true").lower() == "true"
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = "wechat_scraper"
+
+# 当前正在执行的工具
+_current_tool: ContextVar[str] = ContextVar("wechat_scraper_tool", default="")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """固定桶的耗时直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶上界估算分位数，落在 +Inf 桶时返回最大的有限上界"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    进程内指标注册表
+
+    - histograms: (工具, 阶段) -> Histogram，不在工具调用中记录的阶段工具名为空字符串
+    - counters: (名称, 标签) -> 累计值
+    - collectors: 读取指标时调用的统计函数，返回 {名称: 数值或 {标签值: 数值}}
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe(self, stage: str, seconds: float, tool: Optional[str] = None):
+        """记录一次阶段耗时"""
+        if not self.enabled:
+            return
+        key = (_current_tool.get() if tool is None else tool, stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """记录代码块耗时（异常退出时也会记录）"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def tool(self, name: str) -> Iterator[None]:
+        """
+        标记当前工具调用
+
+        块内记录的阶段都归属到该工具，整个调用的耗时记为 total 阶段，
+        并按结果累加 tool_calls 计数器。
+        """
+        token = _current_tool.set(name)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe("total", time.perf_counter() - started)
+            self.inc("tool_calls", tool=name, outcome=outcome)
+            _current_tool.reset(token)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        """累加计数器，未指定 tool 标签时使用当前工具"""
+        if not self.enabled:
+            return
+        labels.setdefault("tool", _current_tool.get())
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]):
+        """注册读取指标时调用的统计函数，同名函数会被替换"""
+        self.collectors[name] = collect
+
+    def reset(self):
+        """清空直方图和计数器（保留收集函数）"""
+        self.histograms.clear()
+        self.counters.clear()
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        collected = {}
+        for name, collect in self.collectors.items():
+            try:
+                collected[name] = collect() or {}
+            except Exception as e:
+                logger.warning(f"收集指标 {name} 时出错: {str(e)}")
+        return collected
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回 JSON 可序列化的指标快照"""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for (tool, stage), histogram in sorted(self.histograms.items()):
+            stages.setdefault(tool or "-", {})[stage] = histogram.snapshot()
+
+        counters: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            counters.setdefault(name, []).append({**dict(labels), "value": value})
+
+        return {
+            "enabled": self.enabled,
+            "stages": stages,
+            "counters": counters,
+            "collectors": self._collect(),
+        }
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus 文本格式（0.0.4）导出"""
+        lines: List[str] = []
+
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines.append(f"# HELP {name} 各工具各阶段的耗时")
+        lines.append(f"# TYPE {name} histogram")
+        for (tool, stage), histogram in sorted(self.histograms.items()):
+            labels = f'tool="{_escape(tool)}",stage="{_escape(stage)}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        counter_names = sorted({counter for counter, _ in self.counters})
+        for counter in counter_names:
+            metric = f"{METRIC_PREFIX}_{_sanitize(counter)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (current, labels), value in sorted(self.counters.items()):
+                if current == counter:
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+        # 收集函数的数值导出为 gauge，嵌套字典的键作为 key 标签
+        for collector, values in sorted(self._collect().items()):
+            for key, value in values.items():
+                metric = f"{METRIC_PREFIX}_{_sanitize(collector)}_{_sanitize(key)}"
+                if isinstance(value, dict):
+                    samples = [((("key", str(k)),), v) for k, v in value.items() if _is_number(v)]
+                elif _is_number(value):
+                    samples = [((), value)]
+                else:
+                    continue
+                if samples:
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.extend(f"{metric}{_format_labels(labels)} {float(v):g}" for labels, v in samples)
+
+        return "\n".join(lines) + "\n"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _sanitize(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{_sanitize(key)}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """获取进程级共享的指标注册表"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
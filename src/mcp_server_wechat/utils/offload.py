@@ -0,0 +1,124 @@
+"""
+CPU 密集任务卸载模块
+
+HTML 解析和响应格式化是同步的 CPU 密集操作，在事件循环中执行会阻塞同一进程内的所有并发请求。
+输入超过阈值时将其放到执行器中运行，较小的输入仍在事件循环中直接执行，避免调度开销。
+
+- thread: 线程池（默认），lxml 解析时会释放 GIL
+- process: 进程池，完全绕开 GIL，要求函数和参数可以被 pickle
+- none: 不卸载，全部在事件循环中执行
+"""
+import os
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger("offload")
+
+T = TypeVar("T")
+
+# 环境变量配置
+OFFLOAD_MODE = os.getenv("WECHAT_SCRAPER_OFFLOAD", "thread").lower()
+OFFLOAD_WORKERS = int(os.getenv("WECHAT_SCRAPER_OFFLOAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+OFFLOAD_THRESHOLD = int(os.getenv("WECHAT_SCRAPER_OFFLOAD_THRESHOLD", "32768"))  # 字符数
+
+OFFLOAD_MODES = ("thread", "process", "none")
+
+
+def estimate_size(data: Any) -> int:
+    """估算待格式化数据的大小（所有字符串的长度之和）"""
+    if isinstance(data, str):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(estimate_size(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return sum(estimate_size(item) for item in data)
+    return 0
+
+
+class Offloader:
+    """按输入大小决定在事件循环中执行还是放到执行器中执行"""
+
+    def __init__(
+        self,
+        mode: str = OFFLOAD_MODE,
+        workers: int = OFFLOAD_WORKERS,
+        threshold: int = OFFLOAD_THRESHOLD
+    ):
+        if mode not in OFFLOAD_MODES:
+            logger.warning(f"未知的卸载模式 {mode}，使用 thread")
+            mode = "thread"
+        self.mode = mode
+        self.workers = max(workers, 1)
+        self.threshold = threshold
+        self._executor: Optional[Executor] = None
+
+        # 统计信息
+        self.inline = 0
+        self.offloaded = 0
+        self.offloaded_seconds = 0.0
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """懒创建执行器"""
+        if self._executor is None and self.mode != "none":
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="wechat-offload")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int) -> T:
+        """
+        执行同步函数
+
+        Args:
+            fn: 同步函数；进程池模式下必须是模块级函数
+            *args: 位置参数；进程池模式下必须可以被 pickle
+            size: 输入大小，小于阈值时直接在事件循环中执行
+
+        Returns:
+            fn 的返回值
+        """
+        if self.mode == "none" or size < self.threshold:
+            self.inline += 1
+            return fn(*args)
+
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+        finally:
+            self.offloaded += 1
+            self.offloaded_seconds += time.monotonic() - started
+
+    def shutdown(self):
+        """关闭执行器，下次使用时重新创建"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """返回卸载统计信息"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "threshold": self.threshold,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "offloaded_seconds": round(self.offloaded_seconds, 3)
+        }
+
+
+_offloader: Optional[Offloader] = None
+
+
+def get_offloader() -> Offloader:
+    """获取进程级共享的卸载器"""
+    global _offloader
+    if _offloader is None:
+        _offloader = Offloader()
+    return _offloader
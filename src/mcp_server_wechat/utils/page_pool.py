@@ -0,0 +1,186 @@
+"""
+页面池模块
+
+预先创建并复用浏览器标签页，限制同时打开的页面数量，
+并保证页面在异常情况下也会被归还。
+"""
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+
+from .metrics import get_metrics
+
+logger = logging.getLogger("page_pool")
+
+# 环境变量配置
+DEFAULT_PAGE_POOL_SIZE = int(os.getenv("WECHAT_SCRAPER_PAGE_POOL_SIZE", "4"))
+RESET_TIMEOUT = 5000  # 毫秒，重置页面到 about:blank 的超时时间
+
+
+class PagePool:
+    """
+    有界页面池
+
+    - 同时借出的页面不超过 size 个，超出的调用方排队等待
+    - 页面归还时导航到 about:blank 以清空状态，随后放回空闲队列复用
+    - 重置失败或已关闭的页面会被丢弃，下次借出时按需重新创建
+    - 浏览器上下文更换（例如浏览器重启）后，旧页面会被自动丢弃
+    """
+
+    def __init__(
+        self,
+        context_factory: Callable[[], Awaitable[BrowserContext]],
+        size: int = DEFAULT_PAGE_POOL_SIZE
+    ):
+        """
+        Args:
+            context_factory: 返回当前浏览器上下文的协程函数
+            size: 页面池大小，即最多同时打开的页面数
+        """
+        if size < 1:
+            raise ValueError("页面池大小必须大于 0")
+        self.size = size
+        self._context_factory = context_factory
+        self._context: Optional[BrowserContext] = None
+        self._idle: List[Page] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+        # 统计信息
+        self.in_use = 0
+        self.waiting = 0
+        self.total_waits = 0
+        self.checkouts = 0
+        self.recycled = 0
+        self.created = 0
+        self.discarded = 0
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """借出一个页面，退出上下文时无论是否出错都会归还"""
+        page = await self.checkout()
+        try:
+            yield page
+        finally:
+            await self.checkin(page)
+
+    async def checkout(self) -> Page:
+        """借出一个页面，池已满时等待"""
+        if self._semaphore.locked():
+            self.waiting += 1
+            self.total_waits += 1
+            try:
+                with get_metrics().stage("pool_wait"):
+                    await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        try:
+            context = await self._current_context()
+            while self._idle:
+                page = self._idle.pop()
+                if not page.is_closed():
+                    self.checkouts += 1
+                    self.in_use += 1
+                    return page
+                self.discarded += 1
+
+            with get_metrics().stage("page_create"):
+                page = await context.new_page()
+            self.created += 1
+            self.checkouts += 1
+            self.in_use += 1
+            return page
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def checkin(self, page: Page):
+        """归还页面：重置为 about:blank 后放回空闲队列"""
+        try:
+            if page.is_closed() or page.context is not self._context:
+                self.discarded += 1
+                return
+            await page.goto("about:blank", timeout=RESET_TIMEOUT)
+            self._idle.append(page)
+            self.recycled += 1
+        except Exception as e:
+            logger.warning(f"重置页面失败，丢弃该页面: {str(e)}")
+            self.discarded += 1
+            await self._close_page(page)
+        finally:
+            self.in_use -= 1
+            self._semaphore.release()
+
+    async def prewarm(self) -> int:
+        """
+        预先创建空闲页面，空闲和借出的页面总数不超过 size
+
+        每创建一个页面都占用一个许可，与并发的借出共同受池大小限制；池已满时立即停止。
+
+        Returns:
+            新创建的页面数
+        """
+        context = await self._current_context()
+        created = 0
+        while len(self._idle) + self.in_use < self.size and not self._semaphore.locked():
+            await self._semaphore.acquire()
+            try:
+                with get_metrics().stage("page_create"):
+                    page = await context.new_page()
+            finally:
+                self._semaphore.release()
+            self._idle.append(page)
+            self.created += 1
+            created += 1
+        return created
+
+    async def close(self):
+        """关闭所有空闲页面"""
+        idle, self._idle = self._idle, []
+        for page in idle:
+            await self._close_page(page)
+        self._context = None
+
+    def clear(self):
+        """丢弃所有空闲页面的引用（上下文已被关闭时使用）"""
+        self._idle = []
+        self._context = None
+
+    def stats(self) -> Dict[str, Any]:
+        """返回页面池统计信息"""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "total_waits": self.total_waits,
+            "checkouts": self.checkouts,
+            "recycled": self.recycled,
+            "created": self.created,
+            "discarded": self.discarded
+        }
+
+    async def _current_context(self) -> BrowserContext:
+        """获取当前上下文，上下文更换时丢弃旧页面"""
+        context = await self._context_factory()
+        if context is not self._context:
+            if self._idle:
+                logger.info("浏览器上下文已更换，丢弃旧的空闲页面")
+                self.discarded += len(self._idle)
+            self._idle = []
+            self._context = context
+        return context
+
+    @staticmethod
+    async def _close_page(page: Page):
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception as e:
+            logger.debug(f"关闭页面时出错: {str(e)}")
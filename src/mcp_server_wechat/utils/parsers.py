@@ -0,0 +1,316 @@
+"""
+页面解析模块
+
+将 HTML 解析为结构化数据，供浏览器渲染路径和 HTTP 直连路径共用。
+
+提供两种解析后端，输出完全相同：
+- lxml: 直接在 lxml.html 树上执行预编译的 XPath，避免构建 BeautifulSoup 树（默认）
+- bs4: 原有的 BeautifulSoup 实现，lxml 后端解析失败时自动回退
+
+通过 WECHAT_SCRAPER_PARSER 环境变量或各函数的 backend 参数选择后端，便于对比解析性能。
+所有页面由 extractors 模块中的声明式 ListSpec 描述，两种后端以及浏览器内提取
+（evaluate_in_page）共用同一份字段定义。
+"""
+import os
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from .extractors import SELF_SELECTOR, FieldSpec, ListExtractor, ListSpec, evaluate_lists
+
+logger = logging.getLogger("parsers")
+
+# 环境变量配置
+PARSER_BACKEND = os.getenv("WECHAT_SCRAPER_PARSER", "lxml").lower()
+
+PARSER_BACKENDS = ("lxml", "bs4")
+
+
+def _absolute_sogou_url(url: str) -> str:
+    """补全搜狗站内相对链接"""
+    if url and not url.startswith("http"):
+        return f"https://weixin.sogou.com{url}"
+    return url
+
+
+def _after(marker: str) -> Callable[[str], str]:
+    """取 marker 之后的部分作为文章ID"""
+    return lambda url: url.split(marker)[-1] if marker in url else ""
+
+
+# 搜狗文章列表（搜索结果页、热门文章页）
+NEWS_LIST_SPEC = ListSpec(
+    name="文章",
+    rows=".news-list li",
+    fields={
+        "article_id": FieldSpec(source="url", post=_after("url=")),
+        "title": FieldSpec("h3 a", default="无标题"),
+        "summary": FieldSpec(".txt-info", default="无摘要"),
+        "url": FieldSpec("h3 a", attr="href", post=_absolute_sogou_url),
+        "account_name": FieldSpec(".account", default="未知公众号"),
+        "publish_time": FieldSpec(".s2", default="未知时间"),
+    }
+)
+
+# 搜索结果分页链接
+PAGEBAR_SPEC = ListSpec(
+    name="分页信息",
+    rows="#pagebar_container a",
+    fields={
+        "page": FieldSpec(SELF_SELECTOR),
+    }
+)
+
+# 公众号搜索结果页
+ACCOUNT_SEARCH_SPEC = ListSpec(
+    name="公众号",
+    rows=".news-list2 li",
+    fields={
+        "url": FieldSpec("a", attr="href", post=_absolute_sogou_url),
+    }
+)
+
+# 公众号文章列表页
+ACCOUNT_ARTICLES_SPEC = ListSpec(
+    name="文章",
+    rows=".weui_media_box",
+    fields={
+        "article_id": FieldSpec(source="url", post=_after("?__biz=")),
+        "title": FieldSpec("h4.weui_media_title", default="无标题"),
+        "summary": FieldSpec(".weui_media_desc", default="无摘要"),
+        "url": FieldSpec("h4.weui_media_title", attr="href"),
+        "publish_time": FieldSpec(".weui_media_extra_info", default="未知时间"),
+    }
+)
+
+# 文章详情页（整个 body 作为一行）
+ARTICLE_FIELDS = {
+    "title": FieldSpec("#activity-name", default="无标题"),
+    "account_name": FieldSpec("#js_name", default="未知公众号"),
+    "publish_time": FieldSpec("#publish_time", default="未知时间"),
+}
+ARTICLE_SPEC = ListSpec(name="文章详情", rows="body", fields=ARTICLE_FIELDS)
+ARTICLE_WITH_CONTENT_SPEC = ListSpec(
+    name="文章详情",
+    rows="body",
+    fields={**ARTICLE_FIELDS, "content": FieldSpec("#js_content", separator="\n")}
+)
+
+NEWS_LIST = ListExtractor(NEWS_LIST_SPEC)
+PAGEBAR = ListExtractor(PAGEBAR_SPEC)
+ACCOUNT_SEARCH = ListExtractor(ACCOUNT_SEARCH_SPEC)
+ACCOUNT_ARTICLES = ListExtractor(ACCOUNT_ARTICLES_SPEC)
+ARTICLE = ListExtractor(ARTICLE_SPEC)
+ARTICLE_WITH_CONTENT = ListExtractor(ARTICLE_WITH_CONTENT_SPEC)
+
+
+def _resolve_backend(backend: Optional[str]) -> str:
+    backend = (backend or PARSER_BACKEND).lower()
+    if backend not in PARSER_BACKENDS:
+        logger.warning(f"未知的解析后端 {backend}，使用 lxml")
+        return "lxml"
+    return backend
+
+
+def _with_fallback(name: str, backend: Optional[str], lxml_impl, bs4_impl, *args):
+    """按后端执行解析，lxml 后端出错时回退到 BeautifulSoup"""
+    if _resolve_backend(backend) == "lxml":
+        try:
+            return lxml_impl(*args)
+        except Exception as e:
+            logger.warning(f"lxml 解析{name}失败，回退到 BeautifulSoup: {str(e)}")
+    return bs4_impl(*args)
+
+
+# ---------------------------------------------------------------------------
+# 各页面的提取方案：需要提取哪些列表，以及如何组装为最终结果
+# ---------------------------------------------------------------------------
+
+Lists = Dict[str, Tuple[ListExtractor, Optional[int]]]
+Rows = Dict[str, List[Dict[str, Any]]]
+
+
+def _total_pages(page_texts: List[str]) -> int:
+    # 尝试从分页链接获取最大页码
+    page_numbers = [int(text) for text in page_texts if text.isdigit()]
+    return max(page_numbers) if page_numbers else 1
+
+
+def _search_lists(limit: int) -> Lists:
+    return {"articles": (NEWS_LIST, limit), "pages": (PAGEBAR, None)}
+
+
+def _assemble_search(rows: Rows, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    total_pages = 1
+    try:
+        total_pages = _total_pages([row["page"] for row in rows["pages"]])
+    except Exception as e:
+        logger.warning(f"解析分页信息时出错: {str(e)}")
+    return rows["articles"], total_pages
+
+
+def _article_lists(article_id: str, article_url: str, include_content: bool) -> Lists:
+    return {"article": (ARTICLE_WITH_CONTENT if include_content else ARTICLE, 1)}
+
+
+def _assemble_article(rows: Rows, article_id: str, article_url: str, include_content: bool) -> Dict[str, Any]:
+    extractor = ARTICLE_WITH_CONTENT if include_content else ARTICLE
+    fields = rows["article"][0] if rows["article"] else extractor.build_row({})
+
+    # 提取阅读量和点赞数
+    read_count = "未知"
+    like_count = "未知"
+
+    return {
+        "article_id": article_id,
+        "title": fields["title"],
+        "account_name": fields["account_name"],
+        "publish_time": fields["publish_time"],
+        "content": fields["content"] if include_content else None,
+        "url": article_url,
+        "stats": {
+            "read_count": read_count,
+            "like_count": like_count
+        }
+    }
+
+
+# 按公开解析函数名索引：(名称, 列表定义, 组装函数)
+_RECIPES: Dict[str, Tuple[str, Callable[..., Lists], Callable[..., Any]]] = {
+    "parse_search_results": ("搜索结果", _search_lists, _assemble_search),
+    "parse_trending_articles": (
+        "热门文章",
+        lambda limit: {"articles": (NEWS_LIST, limit)},
+        lambda rows, limit: rows["articles"]
+    ),
+    "find_account_url": (
+        "公众号搜索结果",
+        lambda: {"accounts": (ACCOUNT_SEARCH, 1)},
+        lambda rows: rows["accounts"][0]["url"] if rows["accounts"] else None
+    ),
+    "parse_account_articles": (
+        "公众号文章列表",
+        lambda limit: {"articles": (ACCOUNT_ARTICLES, limit)},
+        lambda rows, limit: rows["articles"]
+    ),
+    "parse_article_details": ("文章详情", _article_lists, _assemble_article),
+}
+
+
+def _parse_html(recipe: str, html: str, backend: Optional[str], *args: Any) -> Any:
+    """按提取方案解析 HTML"""
+    name, lists, assemble = _RECIPES[recipe]
+
+    def with_lxml():
+        doc = lxml.html.document_fromstring(html)
+        return assemble({key: extractor.extract_lxml(doc, limit) for key, (extractor, limit) in lists(*args).items()}, *args)
+
+    def with_bs4():
+        soup = BeautifulSoup(html, 'lxml')
+        return assemble({key: extractor.extract_bs4(soup, limit) for key, (extractor, limit) in lists(*args).items()}, *args)
+
+    return _with_fallback(name, backend, with_lxml, with_bs4)
+
+
+async def evaluate_in_page(page, parser: Callable[..., Any], *args: Any) -> Any:
+    """
+    在浏览器中直接提取字段，不序列化整个 DOM
+
+    Args:
+        page: 已加载完成的 Playwright 页面
+        parser: 本模块的公开解析函数，例如 parse_search_results
+        *args: 除 html 和 backend 以外传给 parser 的参数
+
+    Returns:
+        与 parser(await page.content(), *args) 相同的结果
+    """
+    _, lists, assemble = _RECIPES[parser.__name__]
+    return assemble(await evaluate_lists(page, lists(*args)), *args)
+
+
+# ---------------------------------------------------------------------------
+# 公开解析函数
+# ---------------------------------------------------------------------------
+
+def parse_search_results(html: str, limit: int, backend: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    解析搜狗微信搜索结果页
+
+    Args:
+        html: 搜索结果页 HTML
+        limit: 最多返回的文章数量
+        backend: 解析后端，默认使用 WECHAT_SCRAPER_PARSER
+
+    Returns:
+        (文章列表, 总页数)
+    """
+    return _parse_html("parse_search_results", html, backend, limit)
+
+
+def parse_trending_articles(html: str, limit: int, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    解析搜狗微信热门文章页
+
+    Args:
+        html: 热门文章页 HTML
+        limit: 最多返回的文章数量
+        backend: 解析后端，默认使用 WECHAT_SCRAPER_PARSER
+
+    Returns:
+        文章列表
+    """
+    return _parse_html("parse_trending_articles", html, backend, limit)
+
+
+def find_account_url(html: str, backend: Optional[str] = None) -> Optional[str]:
+    """
+    从公众号搜索结果页中找到第一个公众号的链接
+
+    Args:
+        html: 公众号搜索结果页 HTML
+        backend: 解析后端，默认使用 WECHAT_SCRAPER_PARSER
+
+    Returns:
+        公众号页面链接；没有搜索结果时返回 None，结果中没有链接时返回空字符串
+    """
+    return _parse_html("find_account_url", html, backend)
+
+
+def parse_account_articles(html: str, limit: int, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    解析公众号文章列表页
+
+    Args:
+        html: 公众号页面 HTML
+        limit: 最多返回的文章数量
+        backend: 解析后端，默认使用 WECHAT_SCRAPER_PARSER
+
+    Returns:
+        文章列表
+    """
+    return _parse_html("parse_account_articles", html, backend, limit)
+
+
+def parse_article_details(
+    html: str,
+    article_id: str,
+    article_url: str,
+    include_content: bool = True,
+    backend: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    解析微信文章详情页
+
+    Args:
+        html: 文章页面 HTML
+        article_id: 文章ID或URL（原样返回）
+        article_url: 文章URL
+        include_content: 是否包含文章内容
+        backend: 解析后端，默认使用 WECHAT_SCRAPER_PARSER
+
+    Returns:
+        文章详情字典
+    """
+    return _parse_html("parse_article_details", html, backend, article_id, article_url, include_content)
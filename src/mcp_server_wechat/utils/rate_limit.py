@@ -0,0 +1,221 @@
+"""
+限流与熔断模块
+
+所有 WechatScraperClient 操作共享按域名划分的令牌桶，避免突发请求触发反爬虫。
+检测到访问频率受限或验证页时熔断器打开，冷却期内直接失败，
+冷却结束后放行一个探测请求，探测成功才恢复正常。
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from .errors import MCPError
+
+logger = logging.getLogger("rate_limit")
+
+# 环境变量配置
+RATE_LIMIT_PER_SECOND = float(os.getenv("WECHAT_SCRAPER_RATE_LIMIT", "1.0"))
+RATE_LIMIT_BURST = int(os.getenv("WECHAT_SCRAPER_RATE_BURST", "3"))
+CIRCUIT_COOLDOWN = float(os.getenv("WECHAT_SCRAPER_CIRCUIT_COOLDOWN", "60"))  # 秒
+CIRCUIT_THRESHOLD = int(os.getenv("WECHAT_SCRAPER_CIRCUIT_THRESHOLD", "1"))
+
+
+class TokenBucket:
+    """异步令牌桶，等待的调用方按先后顺序获得令牌"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        # 统计信息
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self) -> float:
+        """获取一个令牌，返回等待的秒数"""
+        if self.rate <= 0:
+            self.acquired += 1
+            return 0.0
+
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.waits += 1
+            self.wait_seconds += waited
+        return waited
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    - closed: 正常放行
+    - open: 冷却期内直接失败
+    - half_open: 冷却结束，只放行一个探测请求
+    """
+
+    def __init__(self, threshold: int = CIRCUIT_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._blocks = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        # 统计信息
+        self.opened = 0
+        self.rejected = 0
+
+    def remaining(self) -> float:
+        """冷却期剩余秒数"""
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """判断请求是否可以放行"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.remaining() <= 0:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        """记录成功请求，探测成功时关闭熔断器"""
+        if self.state != "closed":
+            logger.info("探测请求成功，熔断器关闭")
+        self.state = "closed"
+        self._blocks = 0
+        self._probing = False
+
+    def record_block(self):
+        """记录访问受限/验证页，达到阈值或探测失败时打开熔断器"""
+        self._blocks += 1
+        if self.state == "half_open" or self._blocks >= self.threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+            self.opened += 1
+            logger.warning(f"检测到访问受限，熔断器打开 {self.cooldown:.0f} 秒")
+
+    def record_failure(self):
+        """记录与访问受限无关的失败，探测失败时允许下一个请求继续探测"""
+        self._probing = False
+
+
+class HostRateLimiter:
+    """按域名划分的令牌桶与熔断器集合"""
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+        threshold: int = CIRCUIT_THRESHOLD,
+        cooldown: float = CIRCUIT_COOLDOWN
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    async def acquire(self, url: str) -> float:
+        """
+        在请求 url 之前调用：检查熔断器并获取令牌
+
+        Returns:
+            等待令牌的秒数
+
+        Raises:
+            MCPError: 熔断器打开时直接失败
+        """
+        host = self._host(url)
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise MCPError(
+                message=f"访问频率受限，{host} 的请求已暂停",
+                suggestion=f"已检测到反爬虫限制，请在约 {breaker.remaining():.0f} 秒后重试",
+                kind="circuit_open"
+            )
+        try:
+            return await self.bucket(host).acquire()
+        except BaseException:
+            # 等待令牌时被取消：释放可能已获得的探测机会
+            breaker.record_failure()
+            raise
+
+    def record_success(self, url: str):
+        self.breaker(self._host(url)).record_success()
+
+    def record_block(self, url: str):
+        self.breaker(self._host(url)).record_block()
+
+    def record_failure(self, url: str):
+        self.breaker(self._host(url)).record_failure()
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.threshold, self.cooldown)
+        return self._breakers[host]
+
+    def stats(self) -> Dict[str, Any]:
+        """返回各域名的限流与熔断统计"""
+        hosts = sorted(set(self._buckets) | set(self._breakers))
+        result = {}
+        for host in hosts:
+            bucket = self.bucket(host)
+            breaker = self.breaker(host)
+            result[host] = {
+                "acquired": bucket.acquired,
+                "waits": bucket.waits,
+                "wait_seconds": round(bucket.wait_seconds, 3),
+                "circuit_state": breaker.state,
+                "circuit_opened": breaker.opened,
+                "circuit_rejected": breaker.rejected
+            }
+        return result
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+
+_rate_limiter: Optional[HostRateLimiter] = None
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """获取进程级共享的限流器"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = HostRateLimiter()
+    return _rate_limiter
@@ -0,0 +1,192 @@
+"""
+结果内存缓存模块
+
+为搜索、公众号文章列表和热门文章提供进程内 TTL + LRU 缓存。
+缓存键为规范化后的参数（不含 limit），limit 较小的请求
+可以直接由 limit 较大的缓存结果截取得到。
+"""
+import os
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .shared_cache import SharedResultCache
+
+logger = logging.getLogger("result_cache")
+
+# 环境变量配置
+RESULT_CACHE_ENABLED = os.getenv("WECHAT_SCRAPER_RESULT_CACHE", "true").lower() == "true"
+RESULT_CACHE_SIZE = int(os.getenv("WECHAT_SCRAPER_RESULT_CACHE_SIZE", "256"))
+# 设置后结果缓存改用该路径的 SQLite 文件，同一主机上的多个服务器进程共享（见 shared_cache 模块）
+SHARED_CACHE_PATH = os.getenv("WECHAT_SCRAPER_SHARED_CACHE_PATH", "")
+RESULT_CACHE_TTLS = {
+    "search": int(os.getenv("WECHAT_SCRAPER_SEARCH_CACHE_TTL", "600")),
+    "account": int(os.getenv("WECHAT_SCRAPER_ACCOUNT_CACHE_TTL", "1800")),
+    "trending": int(os.getenv("WECHAT_SCRAPER_TRENDING_CACHE_TTL", "120")),
+}  # 秒
+
+
+def normalize_text(value: str) -> str:
+    """规范化文本参数：去掉首尾空白、合并连续空白、忽略大小写"""
+    return " ".join(value.split()).casefold()
+
+
+def make_cache_key(operation: str, **kwargs: Any) -> Tuple[Hashable, ...]:
+    """
+    根据操作名和参数生成缓存键
+
+    字符串参数会被规范化，参数顺序不影响结果。
+    """
+    normalized = tuple(
+        (name, normalize_text(value) if isinstance(value, str) else value)
+        for name, value in sorted(kwargs.items())
+    )
+    return (operation,) + normalized
+
+
+@dataclass
+class _CacheEntry:
+    result: Dict[str, Any]
+    limit: int
+    expires_at: float
+
+
+def slice_result(result: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """从缓存结果中截取前 limit 篇文章，同步更新结果数量"""
+    articles = result.get("articles", [])[:limit]
+    sliced = dict(result)
+    sliced["articles"] = list(articles)
+    if "total_results" in sliced:
+        sliced["total_results"] = len(articles)
+    if "pagination" in sliced:
+        sliced["pagination"] = dict(sliced["pagination"], total_results=len(articles))
+    return sliced
+
+
+class ResultCache:
+    """
+    有界 TTL + LRU 缓存
+
+    - 每种操作有独立的 TTL
+    - 超过容量时淘汰最久未使用的条目
+    - 缓存结果的 limit 不小于请求的 limit（或结果已不足其 limit）时即可命中
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttls: Optional[Dict[str, int]] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(RESULT_CACHE_TTLS if ttls is None else ttls)
+        self._entries: "OrderedDict[Tuple[Hashable, ...], _CacheEntry]" = OrderedDict()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Tuple[Hashable, ...], limit: int) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+
+        Args:
+            key: make_cache_key 生成的缓存键
+            limit: 请求的文章数量
+
+        Returns:
+            截取到 limit 的结果副本，未命中时返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        exhausted = len(entry.result.get("articles", [])) < entry.limit
+        if entry.limit < limit and not exhausted:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return slice_result(entry.result, limit)
+
+    def put(self, key: Tuple[Hashable, ...], result: Dict[str, Any], limit: int):
+        """写入缓存；已有 limit 更大且未过期的条目时保留原条目"""
+        ttl = self.ttls.get(key[0], 0)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        now = time.monotonic()
+        existing = self._entries.get(key)
+        if existing is not None and existing.expires_at > now and existing.limit > limit:
+            return
+
+        self._entries[key] = _CacheEntry(result=slice_result(result, limit), limit=limit, expires_at=now + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def lookup(self, key: Tuple[Hashable, ...], limit: int) -> Optional[Dict[str, Any]]:
+        """查询缓存（与 SharedResultCache 一致的异步接口）"""
+        return self.get(key, limit)
+
+    async def fill(
+        self,
+        key: Tuple[Hashable, ...],
+        limit: int,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """抓取并写入缓存，访问失败的结果不缓存"""
+        result = await fetch()
+        if "error" not in result:
+            self.put(key, result, limit)
+        return result
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+_result_cache: Optional[Union[ResultCache, "SharedResultCache"]] = None
+
+
+def get_result_cache() -> Optional[Union[ResultCache, "SharedResultCache"]]:
+    """
+    获取进程级共享的结果缓存，未启用时返回 None
+
+    配置了共享缓存路径时返回 SharedResultCache，否则返回内存 ResultCache。
+    """
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_ENABLED:
+        if SHARED_CACHE_PATH:
+            from .shared_cache import SharedResultCache
+            _result_cache = SharedResultCache(SHARED_CACHE_PATH)
+        else:
+            _result_cache = ResultCache()
+    return _result_cache
+
+
+def use_shared_cache(path: str):
+    """切换到共享结果缓存（命令行 --shared-cache），之后创建的结果缓存使用该路径"""
+    global SHARED_CACHE_PATH, _result_cache
+    SHARED_CACHE_PATH = path
+    _result_cache = None
@@ -0,0 +1,129 @@
+"""
+重试模块
+
+对导航和解析过程中的瞬时错误（超时、连接重置、浏览器崩溃）进行指数退避重试，
+错误分类复用 errors.classify_scraper_error。访问频率受限等错误不会重试，
+避免在反爬虫机制触发时反复请求。
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, TypeVar
+
+from .errors import classify_scraper_error
+
+logger = logging.getLogger("retry")
+
+T = TypeVar("T")
+
+# 环境变量配置
+DEFAULT_RETRY_COUNT = int(os.getenv("WECHAT_SCRAPER_RETRY_COUNT", "3"))
+RETRY_BASE_DELAY = float(os.getenv("WECHAT_SCRAPER_RETRY_BASE_DELAY", "0.5"))  # 秒
+RETRY_MAX_DELAY = float(os.getenv("WECHAT_SCRAPER_RETRY_MAX_DELAY", "8"))  # 秒
+
+# 可以重试的错误类别
+RETRYABLE_KINDS: FrozenSet[str] = frozenset({"timeout", "connection_reset", "browser_closed"})
+
+
+class RetryStats:
+    """重试统计信息"""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.retries_by_kind: Dict[str, int] = {}
+        self.recovered = 0
+        self.exhausted = 0
+        self.retry_delay_seconds = 0.0
+        self.retry_latency_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回统计信息快照"""
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retries_by_kind": dict(self.retries_by_kind),
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+            "retry_delay_seconds": round(self.retry_delay_seconds, 3),
+            "retry_latency_seconds": round(self.retry_latency_seconds, 3)
+        }
+
+
+_retry_stats = RetryStats()
+
+
+def get_retry_stats() -> RetryStats:
+    """获取进程级重试统计"""
+    return _retry_stats
+
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> float:
+    """
+    计算第 attempt 次重试前的等待时间（指数退避 + 全抖动）
+
+    Args:
+        attempt: 重试序号，从 1 开始
+        base_delay: 基础等待时间（秒）
+        max_delay: 最大等待时间（秒）
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+
+
+async def with_retry(
+    fn: Callable[[], Awaitable[T]],
+    max_retries: int = DEFAULT_RETRY_COUNT,
+    operation: str = "",
+    retryable_kinds: FrozenSet[str] = RETRYABLE_KINDS,
+    stats: Optional[RetryStats] = None
+) -> T:
+    """
+    执行协程函数，遇到可重试的错误时按指数退避重试
+
+    Args:
+        fn: 要执行的协程函数，每次重试都会重新调用
+        max_retries: 最大重试次数（不含首次执行）
+        operation: 操作名，用于日志
+        retryable_kinds: 可重试的错误类别
+        stats: 统计对象，默认使用进程级统计
+
+    Returns:
+        fn 的返回值；重试耗尽或错误不可重试时抛出最后一次的异常
+    """
+    stats = stats or _retry_stats
+    stats.calls += 1
+    started = None
+    attempt = 0
+    while True:
+        stats.attempts += 1
+        try:
+            result = await fn()
+        except Exception as e:
+            kind = classify_scraper_error(e)
+            if kind not in retryable_kinds:
+                raise
+            if attempt >= max_retries:
+                stats.exhausted += 1
+                if started is not None:
+                    stats.retry_latency_seconds += time.monotonic() - started
+                logger.warning(f"{operation} 重试 {attempt} 次后仍失败 ({kind})")
+                raise
+
+            attempt += 1
+            if started is None:
+                started = time.monotonic()
+            delay = backoff_delay(attempt)
+            stats.retries += 1
+            stats.retries_by_kind[kind] = stats.retries_by_kind.get(kind, 0) + 1
+            stats.retry_delay_seconds += delay
+            logger.info(f"{operation} 遇到可重试错误 ({kind})，{delay:.2f} 秒后进行第 {attempt} 次重试")
+            await asyncio.sleep(delay)
+        else:
+            if started is not None:
+                stats.recovered += 1
+                stats.retry_latency_seconds += time.monotonic() - started
+            return result
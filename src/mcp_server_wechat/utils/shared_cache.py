@@ -0,0 +1,277 @@
+"""
+跨进程共享的结果缓存模块
+
+多进程 HTTP 模式下各工作进程各自运行浏览器，内存结果缓存和请求合并只在进程内生效。
+本模块把搜索、公众号文章列表和热门文章的结果缓存放到 SQLite（WAL 模式）中，
+并用租约行协调抓取：同一时间只有一个进程抓取某个键，其他进程等待它写入的结果，
+不会重复访问搜狗。
+
+缓存键、TTL 和 limit 截取规则与内存结果缓存相同，可以直接替换 ResultCache。
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .result_cache import RESULT_CACHE_SIZE, RESULT_CACHE_TTLS, slice_result
+
+logger = logging.getLogger("shared_cache")
+
+# 环境变量配置
+SHARED_CACHE_LEASE = float(os.getenv("WECHAT_SCRAPER_SHARED_CACHE_LEASE", "90"))  # 秒
+SHARED_CACHE_POLL_INTERVAL = 0.2  # 秒
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    result_limit INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_accessed_at ON results (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def serialize_cache_key(key: Tuple[Hashable, ...]) -> str:
+    """把 make_cache_key 生成的元组键序列化为数据库主键"""
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+class SharedResultCache:
+    """
+    SQLite 结果缓存
+
+    - 与 ResultCache 相同的 get/put/clear/stats 接口，同一主机上的多个进程共享条目
+    - 超过容量时按最近访问时间淘汰
+    - fill 通过租约保证同一个键同一时间只有一个进程在抓取；
+      租约持有者异常退出时，租约在 lease 秒后过期，由其他进程接手
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = RESULT_CACHE_SIZE,
+        ttls: Optional[Dict[str, int]] = None,
+        lease: float = SHARED_CACHE_LEASE,
+        poll_interval: float = SHARED_CACHE_POLL_INTERVAL
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(RESULT_CACHE_TTLS if ttls is None else ttls)
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._initialized = False
+
+        # 统计信息（仅当前进程）
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.lease_waits = 0
+        self.peer_fills = 0
+
+    def get(self, key: Tuple[Hashable, ...], limit: int) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+
+        Args:
+            key: make_cache_key 生成的缓存键
+            limit: 请求的文章数量
+
+        Returns:
+            截取到 limit 的结果副本，未命中时返回 None
+        """
+        result = self._get(serialize_cache_key(key), limit)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: Tuple[Hashable, ...], result: Dict[str, Any], limit: int):
+        """写入缓存；已有 limit 更大且未过期的条目时保留原条目"""
+        ttl = self.ttls.get(key[0], 0)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        if self._put(serialize_cache_key(key), slice_result(result, limit), limit, ttl):
+            self.writes += 1
+
+    async def lookup(self, key: Tuple[Hashable, ...], limit: int) -> Optional[Dict[str, Any]]:
+        """在线程中查询缓存，不阻塞事件循环"""
+        return await asyncio.to_thread(self.get, key, limit)
+
+    async def fill(
+        self,
+        key: Tuple[Hashable, ...],
+        limit: int,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        抓取并写入缓存，其他进程正在抓取同一个键时等待其结果
+
+        Args:
+            key: make_cache_key 生成的缓存键
+            limit: 请求的文章数量
+            fetch: 抓取函数
+
+        Returns:
+            其他进程写入的结果，或本进程抓取的结果
+        """
+        text_key = serialize_cache_key(key)
+        deadline = time.monotonic() + self.lease
+        waited = False
+        acquired = await asyncio.to_thread(self._acquire, text_key)
+        while not acquired:
+            if not waited:
+                waited = True
+                self.lease_waits += 1
+                logger.info(f"等待其他进程的抓取结果: {key}")
+            await asyncio.sleep(self.poll_interval)
+            result = await asyncio.to_thread(self._get, text_key, limit)
+            if result is not None:
+                self.peer_fills += 1
+                return result
+            if time.monotonic() >= deadline:
+                # 持有者迟迟没有结果，不再等待，直接抓取
+                break
+            # 持有者释放租约却没有写入（抓取失败或 limit 不足）时由本进程接手
+            acquired = await asyncio.to_thread(self._acquire, text_key)
+
+        try:
+            if acquired:
+                # 查询缓存到获得租约之间，其他进程可能已经写入结果并释放了租约
+                result = await asyncio.to_thread(self._get, text_key, limit)
+                if result is not None:
+                    self.peer_fills += 1
+                    return result
+            result = await fetch()
+            # 访问失败的结果不缓存
+            if "error" not in result:
+                await asyncio.to_thread(self.put, key, result, limit)
+            return result
+        finally:
+            if acquired:
+                await asyncio.to_thread(self._release, text_key)
+
+    def clear(self):
+        """清空缓存和租约"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM results")
+                conn.execute("DELETE FROM leases")
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "lease_waits": self.lease_waits,
+            "peer_fills": self.peer_fills
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接，首次使用时建表"""
+        if not self._initialized:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _get(self, key: str, limit: int) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data, result_limit, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            data, result_limit, expires_at = row
+            now = time.time()
+            if expires_at <= now:
+                return None
+
+            result = json.loads(data)
+            exhausted = len(result.get("articles", [])) < result_limit
+            if result_limit < limit and not exhausted:
+                return None
+
+            with conn:
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return slice_result(result, limit)
+        finally:
+            conn.close()
+
+    def _put(self, key: str, result: Dict[str, Any], limit: int, ttl: int) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                existing = conn.execute(
+                    "SELECT result_limit, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if existing is not None and existing[1] > now and existing[0] > limit:
+                    return False
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, data, result_limit, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), limit, now + ttl, now)
+                )
+                conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                evicted = conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+            if evicted > 0:
+                self.evictions += evicted
+            return True
+        finally:
+            conn.close()
+
+    def _acquire(self, key: str) -> bool:
+        """尝试获取抓取租约，已过期的租约可以被接手"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+                acquired = conn.execute(
+                    "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, self.owner, now + self.lease)
+                ).rowcount
+            return acquired == 1
+        finally:
+            conn.close()
+
+    def _release(self, key: str):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        finally:
+            conn.close()
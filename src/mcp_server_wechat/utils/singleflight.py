@@ -0,0 +1,74 @@
+"""
+请求合并模块
+
+相同键的并发请求只执行一次抓取，所有调用方等待同一个结果（或同一个异常）。
+单个调用方被取消不会取消其他调用方共享的抓取任务。
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger("singleflight")
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """进程内的请求合并器"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+        # 统计信息
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入相同键的进行中请求
+
+        Args:
+            key: 规范化后的请求键
+            fn: 无进行中请求时执行的协程函数
+
+        Returns:
+            共享的执行结果；执行失败时所有调用方收到同一个异常
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._on_done(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"合并进行中的相同请求: {key}")
+
+        # shield 保证单个调用方被取消时共享任务继续执行
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回统计信息"""
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
+
+    def _on_done(self, key: Hashable, task: "asyncio.Task[Any]"):
+        """任务结束后移除记录，并标记异常已读取，避免所有调用方都取消时产生警告"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """获取进程级共享的请求合并器"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -2,31 +2,134 @@
 微信文章爬虫客户端
 """
 import os
+import json
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+import sqlite3
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar, Union
 from urllib.parse import quote
 
-from playwright.async_api import async_playwright, Page, Browser
-from bs4 import BeautifulSoup
+import httpx
+from playwright.async_api import async_playwright, Page
 
 from .errors import MCPError, handle_scraper_error
+from .browser import BrowserManager, HEADLESS_MODE, USER_AGENT
+from .page_pool import PagePool
+from .interception import ResourceBlocker, BLOCK_RESOURCES_ENABLED
+from .http_fetcher import ArticleHttpFetcher, HTTP_FAST_PATH_ENABLED, supports_fast_path
+from .parsers import (
+    find_account_url,
+    parse_account_articles,
+    parse_article_details,
+    parse_search_results,
+    parse_trending_articles,
+    evaluate_in_page,
+)
+from .article_cache import ArticleCache, canonicalize_article_url
+from .result_cache import ResultCache, make_cache_key, slice_result
+from .shared_cache import SharedResultCache
+from .local_index import ArticleIndex
+from .singleflight import SingleFlight
+from .retry import DEFAULT_RETRY_COUNT, with_retry
+from .rate_limit import HostRateLimiter
+from .offload import Offloader
+from .block_detection import is_block_url, wait_for_selector_or_block
+from .endpoints import ARTICLE_BASE_URL, SOGOU_BASE_URL, rebase_url
+from .metrics import get_metrics
+from .formatters import CHARACTER_LIMIT
+from .chunking import ARTICLE_CHUNK_CHARS, ArticleContentStore, content_digest, decode_cursor, encode_cursor, split_chunk
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("wechat_client")
 
+T = TypeVar("T")
+
 # 环境变量配置
 DEFAULT_TIMEOUT = int(os.getenv("WECHAT_SCRAPER_TIMEOUT", "30000"))  # 毫秒
-DEFAULT_RETRY_COUNT = int(os.getenv("WECHAT_SCRAPER_RETRY_COUNT", "3"))
-HEADLESS_MODE = os.getenv("WECHAT_SCRAPER_HEADLESS", "true").lower() == "true"
+SEARCH_PAGE_CONCURRENCY = int(os.getenv("WECHAT_SCRAPER_SEARCH_PAGE_CONCURRENCY", "3"))
+SEARCH_MAX_PAGES = 10  # 多页搜索单次最多抓取的页数
+SEARCH_PAGE_LIMIT = 50  # 单页抓取时不截断结果
+CHUNK_FRAME_RESERVE = 2000  # 分段响应中 content_range、next_cursor 和 markdown 标记预留的字符数
+
+# 页面字段提取方式：html（读取 page.content() 后在 Python 中解析）或 dom（在浏览器中提取所需字段）
+# 可按操作分别设置，例如 "html,search=dom,article=dom"；操作名为 search、account、trending、article
+EXTRACTION_MODE = os.getenv("WECHAT_SCRAPER_EXTRACTION", "html")
+EXTRACTION_MODES = ("html", "dom")
+EXTRACTION_OPERATIONS = ("search", "account", "trending", "article")
+
+
+def parse_extraction_modes(value: str) -> Dict[str, str]:
+    """
+    解析提取方式配置
+    
+    Returns:
+        每个操作对应的提取方式
+    """
+    default = "html"
+    overrides = {}
+    for item in value.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        operation, _, mode = item.rpartition("=")
+        if mode not in EXTRACTION_MODES or (operation and operation not in EXTRACTION_OPERATIONS):
+            logger.warning(f"忽略无效的提取方式配置: {item}")
+        elif operation:
+            overrides[operation] = mode
+        else:
+            default = mode
+    return {operation: overrides.get(operation, default) for operation in EXTRACTION_OPERATIONS}
+
 
 class WechatScraperClient:
-    """微信文章爬虫客户端"""
+    """
+    微信文章爬虫客户端
+
+    传入 browser_manager 时复用进程级共享浏览器，退出时不会关闭浏览器；
+    否则每个客户端独立启动并关闭自己的浏览器。
+    传入 http_fetcher 时，文章详情优先通过 HTTP 直连获取；
+    传入 article_cache 时，文章详情会先查询并写入磁盘缓存；
+    传入 article_index 时，抓取到的文章正文写入本地全文索引，供 search_local_articles 离线检索；
+    传入 result_cache 时，搜索、公众号和热门文章列表会先查询结果缓存（内存或多进程共享的 SQLite）；
+    传入 single_flight 时，相同参数的并发抓取会被合并为一次；
+    传入 rate_limiter 时，所有请求共享按域名划分的限流与熔断；
+    传入 offloader 时，较大页面的解析在执行器中进行，不阻塞事件循环；
+    传入 content_store 时，分段读取文章正文的后续分段直接从全文缓存返回。
+    extraction 指定各操作的字段提取方式（见 EXTRACTION_MODE），默认读取环境变量。
+    sogou_base_url / article_base_url 替换请求实际访问的站点地址（见 endpoints 模块），
+    用于指向本地模拟服务器，默认读取环境变量。
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        browser_manager: Optional[BrowserManager] = None,
+        http_fetcher: Optional[ArticleHttpFetcher] = None,
+        article_cache: Optional[ArticleCache] = None,
+        article_index: Optional[ArticleIndex] = None,
+        result_cache: Optional[Union[ResultCache, SharedResultCache]] = None,
+        single_flight: Optional[SingleFlight] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        offloader: Optional[Offloader] = None,
+        content_store: Optional[ArticleContentStore] = None,
+        extraction: Optional[str] = None,
+        sogou_base_url: Optional[str] = None,
+        article_base_url: Optional[str] = None
+    ):
+        self.browser_manager = browser_manager
+        self.http_fetcher = http_fetcher
+        self.article_cache = article_cache
+        self.article_index = article_index
+        self.result_cache = result_cache
+        self.single_flight = single_flight
+        self.rate_limiter = rate_limiter
+        self.offloader = offloader
+        self.content_store = content_store
+        self.extraction_modes = parse_extraction_modes(extraction or EXTRACTION_MODE)
+        self.sogou_base_url = sogou_base_url or SOGOU_BASE_URL
+        self.article_base_url = article_base_url or ARTICLE_BASE_URL
         self.browser = None
         self.context = None
+        self.page_pool = None
+        self.resource_blocker = None
         self.timeout = DEFAULT_TIMEOUT
         self.retry_count = DEFAULT_RETRY_COUNT
         self.headless = HEADLESS_MODE
@@ -40,12 +143,21 @@ class WechatScraperClient:
     
     async def initialize(self):
         """初始化浏览器"""
+        if self.browser_manager is not None:
+            # 复用共享页面池，浏览器在首次借出页面时才启动，
+            # 命中缓存或 HTTP 直连的调用不会启动浏览器
+            self.page_pool = self.browser_manager.page_pool
+            self.resource_blocker = self.browser_manager.resource_blocker
+            return
+        
         try:
             self.playwright = await async_playwright().start()
             self.browser = await self.playwright.chromium.launch(headless=self.headless)
-            self.context = await self.browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            )
+            self.context = await self.browser.new_context(user_agent=USER_AGENT)
+            self.page_pool = PagePool(self._get_context)
+            if BLOCK_RESOURCES_ENABLED:
+                self.resource_blocker = ResourceBlocker()
+                await self.resource_blocker.install(self.context)
             logger.info("浏览器初始化成功")
         except Exception as e:
             logger.error(f"浏览器初始化失败: {str(e)}")
@@ -56,6 +168,13 @@ class WechatScraperClient:
     
     async def close(self):
         """关闭浏览器"""
+        if self.browser_manager is not None:
+            # 共享浏览器由管理器负责关闭
+            self.context = None
+            return
+        
+        if self.page_pool:
+            await self.page_pool.close()
         if self.context:
             await self.context.close()
         if self.browser:
@@ -64,6 +183,159 @@ class WechatScraperClient:
             await self.playwright.stop()
         logger.info("浏览器已关闭")
     
+    async def _get_context(self):
+        """返回客户端自有的浏览器上下文，供页面池使用"""
+        return self.context
+    
+    async def _with_result_cache(
+        self,
+        operation: str,
+        key_args: Dict[str, Any],
+        limit: int,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        通过结果缓存、请求合并和重试执行列表类操作
+        
+        Args:
+            operation: 操作名（search、account、trending），决定缓存 TTL
+            key_args: 除 limit 外的请求参数
+            limit: 请求的文章数量
+            fetch: 未命中时执行的抓取函数
+            
+        Returns:
+            缓存或新抓取的结果
+        """
+        key = make_cache_key(operation, **key_args)
+        if self.result_cache is not None:
+            cached = await self.result_cache.lookup(key, limit)
+            get_metrics().inc("result_cache", outcome="miss" if cached is None else "hit")
+            if cached is not None:
+                logger.info(f"命中结果缓存: {operation} {key_args}")
+                return cached
+        
+        async def fetch_and_store() -> Tuple[Dict[str, Any], int]:
+            if self.result_cache is None:
+                return await fetch(), limit
+            # 上一次合并抓取可能在外层查询之后才写入缓存，抓取前再查一次
+            cached = await self.result_cache.lookup(key, limit)
+            if cached is not None:
+                return cached, limit
+            # 共享缓存在其他进程正在抓取同一个键时等待其结果；访问失败的结果不缓存
+            return await self.result_cache.fill(key, limit, fetch), limit
+        
+        # 合并键不含 limit：limit 较小的请求加入进行中的抓取后截取结果
+        result, fetched_limit = await self._execute(key, fetch_and_store)
+        exhausted = len(result.get("articles", [])) < fetched_limit
+        if "error" not in result and fetched_limit < limit and not exhausted:
+            # 加入的抓取 limit 较小，不足以满足本次请求，按本次的 limit 再抓取一次
+            result, fetched_limit = await self._execute(key + (("limit", limit),), fetch_and_store)
+        # 截取副本，合并的调用方不共享同一个字典
+        return result if "error" in result else slice_result(result, limit)
+    
+    async def _execute(self, key: Tuple[Hashable, ...], fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行一次抓取：对瞬时错误按指数退避重试，并合并相同键的并发抓取
+        
+        Args:
+            key: 规范化的请求键，第一个元素为操作名
+            fetch: 抓取函数，每次重试都会重新调用
+        """
+        async def fetch_with_retry() -> Dict[str, Any]:
+            return await with_retry(fetch, max_retries=self.retry_count, operation=str(key[0]))
+        
+        if self.single_flight is None:
+            return await fetch_with_retry()
+        return await self.single_flight.do(key, fetch_with_retry)
+    
+    async def _goto(self, page: Page, url: str):
+        """
+        经过限流和熔断检查后导航
+        
+        导航被重定向到反爬虫/验证页时打开熔断器并立即失败。
+        url 始终是真实站点的地址，实际访问时替换为配置的基础地址。
+        """
+        metrics = get_metrics()
+        if self.rate_limiter is not None:
+            with metrics.stage("rate_limit_wait"):
+                await self.rate_limiter.acquire(url)
+        
+        try:
+            with metrics.stage("goto"):
+                await page.goto(self._rebase(url), timeout=self.timeout)
+        except BaseException:
+            # 包括调用被取消：释放半开状态下的探测机会，否则熔断器会一直停留在半开状态
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_failure(url)
+            raise
+        
+        if is_block_url(page.url):
+            self._raise_blocked(url)
+    
+    async def _wait_for(self, page: Page, url: str, selector: str):
+        """
+        等待页面出现期望的选择器
+        
+        同时检测验证页特征，验证页出现后立即失败，不再等待选择器超时。
+        """
+        try:
+            with get_metrics().stage("wait_for_selector"):
+                blocked = await wait_for_selector_or_block(page, selector, self.timeout)
+        except BaseException:
+            # 包括调用被取消，同 _goto
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_failure(url)
+            raise
+        
+        if blocked:
+            self._raise_blocked(url)
+        
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_success(url)
+    
+    def _rebase(self, url: str) -> str:
+        """将真实站点的 URL 替换为实际访问的地址"""
+        return rebase_url(url, self.sogou_base_url, self.article_base_url)
+    
+    def _raise_blocked(self, url: str):
+        """记录访问受限并抛出频率受限错误"""
+        logger.warning(f"检测到反爬虫验证页: {url}")
+        get_metrics().inc("blocked_pages")
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_block(url)
+        raise MCPError(
+            message="访问频率受限，可能触发了反爬虫机制",
+            suggestion="请降低请求频率，稍后再试，或考虑使用代理",
+            kind="rate_limited"
+        )
+    
+    async def _parse(self, parser: Callable[..., Any], html: str, *args: Any) -> Any:
+        """解析页面，设置了 offloader 时按页面大小决定是否放到执行器中"""
+        with get_metrics().stage("parse"):
+            if self.offloader is None:
+                return parser(html, *args)
+            return await self.offloader.run(parser, html, *args, size=len(html))
+    
+    async def _extract(self, page: Page, operation: str, parser: Callable[..., Any], *args: Any) -> Any:
+        """
+        从已加载的页面中提取字段
+        
+        dom 模式在浏览器中执行提取脚本，只传回所需字段；
+        html 模式序列化整个 DOM 后用 parser 解析。两者使用同一份字段定义，结果相同。
+        """
+        metrics = get_metrics()
+        if self.extraction_modes[operation] == "dom":
+            with metrics.stage("evaluate"):
+                return await evaluate_in_page(page, parser, *args)
+        with metrics.stage("content"):
+            content = await page.content()
+        return await self._parse(parser, content, *args)
+    
+    def _tag_page(self, page: Page, page_type: str):
+        """标记页面类型，供资源拦截器选择放行规则"""
+        if self.resource_blocker is not None:
+            self.resource_blocker.tag_page(page, page_type)
+    
     async def search_articles(self, query: str, page_num: int = 1, limit: int = 10) -> Dict[str, Any]:
         """
         搜索微信文章
@@ -76,176 +348,335 @@ class WechatScraperClient:
         Returns:
             包含文章列表和分页信息的字典
         """
-        try:
-            # 创建新页面
-            page = await self.context.new_page()
+        return await self._with_result_cache(
+            "search",
+            {"query": query, "page_num": page_num},
+            limit,
+            lambda: self._search_articles(query, page_num, limit)
+        )
+    
+    async def search_articles_multi(self, query: str, start_page: int = 1, max_results: int = 50) -> Dict[str, Any]:
+        """
+        多页搜索微信文章
+        
+        先抓取起始页获得总页数，再并发抓取后续页面，按页序合并并按规范化 URL 去重，
+        达到 max_results 或最后一页时停止。
+        
+        Args:
+            query: 搜索关键词
+            start_page: 起始页码，从1开始
+            max_results: 最多返回的文章数量
             
-            # 构建搜索URL
-            encoded_query = quote(query)
-            search_url = f"https://weixin.sogou.com/weixin?type=2&query={encoded_query}&page={page_num}"
+        Returns:
+            包含合并后文章列表和分页信息的字典
+        """
+        first = await self.search_articles(query, page_num=start_page, limit=SEARCH_PAGE_LIMIT)
+        total_pages = first["pagination"]["total_pages"]
+        pages = [first]
+        
+        # 按第一页的结果数估算还需要的页数
+        per_page = max(len(first["articles"]), 1)
+        needed = -(-max(max_results - len(first["articles"]), 0) // per_page)
+        last_page = min(total_pages, start_page + SEARCH_MAX_PAGES - 1, start_page + needed)
+        
+        if last_page > start_page:
+            semaphore = asyncio.Semaphore(SEARCH_PAGE_CONCURRENCY)
             
-            # 访问搜索页面
-            await page.goto(search_url, timeout=self.timeout)
-            logger.info(f"访问搜索页面: {search_url}")
+            async def fetch_page(page_num: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.search_articles(query, page_num=page_num, limit=SEARCH_PAGE_LIMIT)
             
-            # 等待搜索结果加载
-            await page.wait_for_selector(".news-box", timeout=self.timeout)
+            rest = await asyncio.gather(
+                *(fetch_page(page_num) for page_num in range(start_page + 1, last_page + 1)),
+                return_exceptions=True
+            )
+            # 遇到失败的页面时截止，保证结果按页序连续
+            for page_num, result in enumerate(rest, start_page + 1):
+                if isinstance(result, BaseException):
+                    logger.warning(f"抓取第 {page_num} 页时出错，返回已获取的结果: {str(result)}")
+                    break
+                pages.append(result)
+        
+        # 按页序合并并去重
+        articles = []
+        seen = set()
+        for page in pages:
+            for article in page["articles"]:
+                key = canonicalize_article_url(article["url"]) if article.get("url") else (article.get("title"), article.get("account_name"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                articles.append(article)
+        articles = articles[:max_results]
+        
+        fetched_last_page = start_page + len(pages) - 1
+        return {
+            "articles": articles,
+            "pagination": {
+                "current_page": start_page,
+                "last_page": fetched_last_page,
+                "pages_fetched": len(pages),
+                "total_pages": total_pages,
+                "total_results": len(articles),
+                "has_more": fetched_last_page < total_pages
+            },
+            "query": query
+        }
+    
+    async def _search_articles(self, query: str, page_num: int, limit: int) -> Dict[str, Any]:
+        """抓取并解析搜索结果页"""
+        try:
+            # 从页面池借出页面，结束时自动归还
+            async with self.page_pool.page() as page:
+                # 标记页面类型，用于资源拦截
+                self._tag_page(page, "search")
             
-            # 获取页面内容
-            content = await page.content()
+                # 构建搜索URL
+                encoded_query = quote(query)
+                search_url = f"https://weixin.sogou.com/weixin?type=2&query={encoded_query}&page={page_num}"
             
-            # 解析搜索结果
-            soup = BeautifulSoup(content, 'lxml')
-            articles = []
+                # 访问搜索页面
+                await self._goto(page, search_url)
+                logger.info(f"访问搜索页面: {search_url}")
             
-            # 提取文章列表
-            article_elements = soup.select(".news-list li")
+                # 等待搜索结果加载
+                await self._wait_for(page, search_url, ".news-box")
             
-            for article in article_elements[:limit]:
-                try:
-                    # 提取文章信息
-                    title_element = article.select_one("h3 a")
-                    title = title_element.text.strip() if title_element else "无标题"
-                    
-                    # 提取文章链接
-                    article_url = title_element.get("href", "") if title_element else ""
-                    if article_url and not article_url.startswith("http"):
-                        article_url = f"https://weixin.sogou.com{article_url}"
-                    
-                    # 提取文章ID
-                    article_id = article_url.split("url=")[-1] if "url=" in article_url else ""
-                    
-                    # 提取摘要
-                    summary_element = article.select_one(".txt-info")
-                    summary = summary_element.text.strip() if summary_element else "无摘要"
-                    
-                    # 提取公众号名称
-                    account_element = article.select_one(".account")
-                    account_name = account_element.text.strip() if account_element else "未知公众号"
-                    
-                    # 提取发布时间
-                    time_element = article.select_one(".s2")
-                    publish_time = time_element.text.strip() if time_element else "未知时间"
-                    
-                    articles.append({
-                        "article_id": article_id,
-                        "title": title,
-                        "summary": summary,
-                        "url": article_url,
-                        "account_name": account_name,
-                        "publish_time": publish_time
-                    })
-                except Exception as e:
-                    logger.warning(f"解析文章时出错: {str(e)}")
+                # 提取搜索结果
+                articles, total_pages = await self._extract(page, "search", parse_search_results, limit)
             
-            # 提取分页信息
-            total_pages = 1
-            try:
-                page_info = soup.select_one("#pagebar_container")
-                if page_info:
-                    page_links = page_info.select("a")
-                    if page_links:
-                        # 尝试从分页链接获取最大页码
-                        page_numbers = [int(a.text) for a in page_links if a.text.isdigit()]
-                        if page_numbers:
-                            total_pages = max(page_numbers)
-            except Exception as e:
-                logger.warning(f"解析分页信息时出错: {str(e)}")
-            
-            # 关闭页面
-            await page.close()
-            
-            return {
-                "articles": articles,
-                "pagination": {
-                    "current_page": page_num,
-                    "total_pages": total_pages,
-                    "total_results": len(articles),
-                    "has_more": page_num < total_pages
-                },
-                "query": query
-            }
+                return {
+                    "articles": articles,
+                    "pagination": {
+                        "current_page": page_num,
+                        "total_pages": total_pages,
+                        "total_results": len(articles),
+                        "has_more": page_num < total_pages
+                    },
+                    "query": query
+                }
             
         except Exception as e:
             logger.error(f"搜索文章时出错: {str(e)}")
             raise handle_scraper_error(e)
     
-    async def get_article_details(self, article_id: str, include_content: bool = True) -> Dict[str, Any]:
+    async def get_article_details(
+        self,
+        article_id: str,
+        include_content: bool = True,
+        cache_mode: str = "prefer"
+    ) -> Dict[str, Any]:
         """
         获取微信文章详情
         
         Args:
             article_id: 文章ID或URL
             include_content: 是否包含文章内容
+            cache_mode: 缓存策略，prefer(优先使用缓存)、bypass(跳过缓存重新抓取)、only(只读缓存)
             
         Returns:
             文章详情字典
         """
         try:
-            # 创建新页面
-            page = await self.context.new_page()
+            article_url = self._article_url(article_id)
+            
+            # 优先读取磁盘缓存
+            if cache_mode != "bypass":
+                cached = await self._get_cached_article(article_url, include_content, allow_stale=cache_mode == "only")
+                if cached is not None:
+                    cached["article_id"] = article_id
+                    return cached
+            
+            if cache_mode == "only":
+                raise MCPError(
+                    message="缓存中没有该文章",
+                    suggestion="请使用 cache='prefer' 或 cache='bypass' 抓取文章"
+                )
+            
+            async def fetch_and_store() -> Dict[str, Any]:
+                article = await self._fetch_article_details(article_id, article_url, include_content)
+                # 写入磁盘缓存和本地全文索引
+                await self._cache_article(article_url, article)
+                await self._index_article(article)
+                return article
+            
+            # 相同文章的并发请求只抓取一次
+            key = ("article", canonicalize_article_url(article_url), include_content)
+            article = await self._execute(key, fetch_and_store)
+            return dict(article, article_id=article_id)
+            
+        except MCPError:
+            raise
+        except Exception as e:
+            logger.error(f"获取文章详情时出错: {str(e)}")
+            raise handle_scraper_error(e)
+    
+    async def get_article_chunk(
+        self,
+        article_id: str,
+        offset: int = 0,
+        max_chars: int = ARTICLE_CHUNK_CHARS,
+        cursor: Optional[str] = None,
+        cache_mode: str = "prefer"
+    ) -> Dict[str, Any]:
+        """
+        分段获取文章正文
+        
+        第一次请求抓取全文并写入全文缓存，之后的分段（通过 cursor 或 offset）直接从缓存读取。
+        
+        Args:
+            article_id: 文章ID或URL
+            offset: 正文起始位置（字符），指定 cursor 时忽略
+            max_chars: 本段最多返回的字符数，指定 cursor 时忽略
+            cursor: 上一次响应中的 next_cursor
+            cache_mode: 缓存策略，见 get_article_details；bypass 只对第一段生效
             
-            # 构建文章URL
-            article_url = article_id if article_id.startswith("http") else f"https://mp.weixin.qq.com/s?__biz={article_id}"
+        Returns:
+            文章详情字典，content 为本段正文，另含 content_range 和 next_cursor（最后一段为 None）
+        """
+        article_url = self._article_url(article_id)
+        key = canonicalize_article_url(article_url)
+        
+        expected_digest = None
+        if cursor is not None:
+            position = decode_cursor(cursor)
+            if position["url"] != key:
+                raise MCPError(
+                    message="cursor 与文章不匹配",
+                    suggestion="请使用同一篇文章上一次响应中返回的 next_cursor",
+                    kind="invalid_cursor"
+                )
+            offset, max_chars, expected_digest = position["offset"], position["max_chars"], position["digest"]
+        
+        stored = None
+        if self.content_store is not None and (cursor is not None or offset > 0 or cache_mode != "bypass"):
+            stored = self.content_store.get(key)
+            get_metrics().inc("content_store", outcome="miss" if stored is None else "hit")
+        
+        if stored is not None:
+            article, digest = stored
+        else:
+            # 后续分段至少可以读取磁盘缓存
+            mode = "prefer" if cursor is not None and cache_mode == "bypass" else cache_mode
+            article = await self.get_article_details(article_id, include_content=True, cache_mode=mode)
+            if self.content_store is not None:
+                digest = self.content_store.put(key, article)
+            else:
+                digest = content_digest(article.get("content") or "")
+        
+        if expected_digest is not None and digest != expected_digest:
+            raise MCPError(
+                message="文章内容已更新，cursor 已失效",
+                suggestion="请不带 cursor 重新获取文章的第一段",
+                kind="cursor_expired"
+            )
+        
+        content = article.get("content") or ""
+        if offset > len(content):
+            raise MCPError(
+                message=f"offset 超出正文长度（共 {len(content)} 字）",
+                suggestion="请使用不大于正文长度的 offset，或使用响应中的 next_cursor",
+                kind="invalid_cursor"
+            )
+        
+        # 按序列化后的长度确定本段大小：正文转义后的长度加上其余字段不超过响应字符上限，
+        # 否则格式化器会在中间截断响应，content_range 和 next_cursor 随之丢失
+        metadata = json.dumps(dict(article, content=None), indent=2, ensure_ascii=False)
+        max_encoded = CHARACTER_LIMIT - len(metadata) - CHUNK_FRAME_RESERVE
+        chunk, end = split_chunk(content, offset, max_chars, max_encoded=max_encoded)
+        return dict(
+            article,
+            article_id=article_id,
+            content=chunk,
+            content_range={"offset": offset, "end": end, "total_chars": len(content)},
+            next_cursor=encode_cursor(key, end, max_chars, digest) if end < len(content) else None
+        )
+    
+    @staticmethod
+    def _article_url(article_id: str) -> str:
+        """由文章ID或URL构建文章URL"""
+        return article_id if article_id.startswith("http") else f"https://mp.weixin.qq.com/s?__biz={article_id}"
+    
+    async def _fetch_article_details(self, article_id: str, article_url: str, include_content: bool) -> Dict[str, Any]:
+        """抓取并解析文章详情，优先 HTTP 直连，必要时使用浏览器"""
+        # 优先尝试 HTTP 直连，无需浏览器
+        if self.http_fetcher is not None and HTTP_FAST_PATH_ENABLED and supports_fast_path(article_url):
+            metrics = get_metrics()
+            try:
+                if self.rate_limiter is not None:
+                    with metrics.stage("rate_limit_wait"):
+                        await self.rate_limiter.acquire(article_url)
+                try:
+                    with metrics.stage("http_fetch"):
+                        content = await self.http_fetcher.fetch(self._rebase(article_url))
+                    article = None
+                    if content is not None:
+                        article = await self._parse(parse_article_details, content, article_id, article_url, include_content)
+                except BaseException:
+                    # 网络错误、解析失败或调用被取消：释放探测机会，回退到浏览器时可以重新获取
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_failure(article_url)
+                    raise
+                if article is not None:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_success(article_url)
+                    logger.info(f"直连获取文章页面: {article_url}")
+                    metrics.inc("http_fast_path", outcome="direct")
+                    return article
+                # 验证页或缺少服务端渲染的正文：无法区分是否受限，释放探测机会，由浏览器访问的结果决定熔断状态
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_failure(article_url)
+                metrics.inc("http_fast_path", outcome="fallback")
+            except httpx.HTTPError as e:
+                logger.warning(f"直连获取文章失败，回退到 Playwright: {str(e)}")
+                metrics.inc("http_fast_path", outcome="error")
+        
+        # 从页面池借出页面，结束时自动归还
+        async with self.page_pool.page() as page:
+            # 标记页面类型，用于资源拦截
+            self._tag_page(page, "article")
             
             # 访问文章页面
-            await page.goto(article_url, timeout=self.timeout)
+            await self._goto(page, article_url)
             logger.info(f"访问文章页面: {article_url}")
             
             # 等待文章内容加载
-            await page.wait_for_selector("#activity-name", timeout=self.timeout)
-            
-            # 获取页面内容
-            content = await page.content()
-            
-            # 解析文章详情
-            soup = BeautifulSoup(content, 'lxml')
-            
-            # 提取标题
-            title_element = soup.select_one("#activity-name")
-            title = title_element.text.strip() if title_element else "无标题"
-            
-            # 提取作者和公众号
-            account_element = soup.select_one("#js_name")
-            account_name = account_element.text.strip() if account_element else "未知公众号"
-            
-            # 提取发布时间
-            time_element = soup.select_one("#publish_time")
-            publish_time = time_element.text.strip() if time_element else "未知时间"
-            
-            # 提取文章内容
-            article_content = ""
-            if include_content:
-                content_element = soup.select_one("#js_content")
-                if content_element:
-                    # 清理内容中的样式
-                    for tag in content_element.select("[style]"):
-                        del tag["style"]
-                    article_content = content_element.get_text(separator="\n").strip()
-            
-            # 提取阅读量和点赞数
-            read_count = "未知"
-            like_count = "未知"
-            
-            # 关闭页面
-            await page.close()
-            
-            return {
-                "article_id": article_id,
-                "title": title,
-                "account_name": account_name,
-                "publish_time": publish_time,
-                "content": article_content if include_content else None,
-                "url": article_url,
-                "stats": {
-                    "read_count": read_count,
-                    "like_count": like_count
-                }
-            }
+            await self._wait_for(page, article_url, "#activity-name")
             
-        except Exception as e:
-            logger.error(f"获取文章详情时出错: {str(e)}")
-            raise handle_scraper_error(e)
+            # 提取文章详情
+            return await self._extract(page, "article", parse_article_details, article_id, article_url, include_content)
+    
+    async def _get_cached_article(self, article_url: str, include_content: bool, allow_stale: bool) -> Optional[Dict[str, Any]]:
+        """读取文章缓存，缓存不可用时返回 None"""
+        if self.article_cache is None:
+            return None
+        metrics = get_metrics()
+        try:
+            with metrics.stage("article_cache"):
+                cached = await self.article_cache.get(article_url, include_content, allow_stale=allow_stale)
+            metrics.inc("article_cache", outcome="miss" if cached is None else "hit")
+            return cached
+        except sqlite3.Error as e:
+            logger.warning(f"读取文章缓存失败: {str(e)}")
+            return None
+    
+    async def _index_article(self, article: Dict[str, Any]):
+        """写入本地全文索引，失败时只记录日志"""
+        if self.article_index is None:
+            return
+        try:
+            await self.article_index.add(article)
+        except sqlite3.Error as e:
+            logger.warning(f"写入本地索引失败: {str(e)}")
+    
+    async def _cache_article(self, article_url: str, article: Dict[str, Any]):
+        """写入文章缓存，失败时只记录日志"""
+        if self.article_cache is None:
+            return
+        try:
+            await self.article_cache.put(article_url, article)
+        except sqlite3.Error as e:
+            logger.warning(f"写入文章缓存失败: {str(e)}")
     
     async def list_articles_by_account(self, account_name: str, limit: int = 10) -> Dict[str, Any]:
         """
@@ -258,110 +689,66 @@ class WechatScraperClient:
         Returns:
             包含文章列表的字典
         """
+        return await self._with_result_cache(
+            "account",
+            {"account_name": account_name},
+            limit,
+            lambda: self._list_articles_by_account(account_name, limit)
+        )
+    
+    async def _list_articles_by_account(self, account_name: str, limit: int) -> Dict[str, Any]:
+        """抓取并解析公众号文章列表"""
         try:
-            # 创建新页面
-            page = await self.context.new_page()
-            
-            # 构建搜索URL
-            encoded_account = quote(account_name)
-            search_url = f"https://weixin.sogou.com/weixin?type=1&query={encoded_account}"
-            
-            # 访问搜索页面
-            await page.goto(search_url, timeout=self.timeout)
-            logger.info(f"访问公众号搜索页面: {search_url}")
-            
-            # 等待搜索结果加载
-            await page.wait_for_selector(".news-box", timeout=self.timeout)
-            
-            # 获取页面内容
-            content = await page.content()
-            
-            # 解析搜索结果
-            soup = BeautifulSoup(content, 'lxml')
-            
-            # 查找公众号
-            account_element = soup.select_one(".news-list2 li")
-            if not account_element:
-                await page.close()
-                return {
-                    "account_name": account_name,
-                    "articles": [],
-                    "total_results": 0
-                }
-            
-            # 点击进入公众号
-            account_link = account_element.select_one("a")
-            if account_link and account_link.get("href"):
-                account_url = account_link.get("href")
-                if not account_url.startswith("http"):
-                    account_url = f"https://weixin.sogou.com{account_url}"
-                
-                # 访问公众号页面
-                await page.goto(account_url, timeout=self.timeout)
-                logger.info(f"访问公众号页面: {account_url}")
-                
-                # 等待文章列表加载
-                await page.wait_for_selector(".weui_media_box", timeout=self.timeout)
-                
-                # 获取页面内容
-                content = await page.content()
-                
-                # 解析文章列表
-                soup = BeautifulSoup(content, 'lxml')
-                articles = []
-                
-                # 提取文章列表
-                article_elements = soup.select(".weui_media_box")
+            # 从页面池借出页面，结束时自动归还
+            async with self.page_pool.page() as page:
+                # 标记页面类型，用于资源拦截
+                self._tag_page(page, "account")
+            
+                # 构建搜索URL
+                encoded_account = quote(account_name)
+                search_url = f"https://weixin.sogou.com/weixin?type=1&query={encoded_account}"
+            
+                # 访问搜索页面
+                await self._goto(page, search_url)
+                logger.info(f"访问公众号搜索页面: {search_url}")
+            
+                # 等待搜索结果加载
+                await self._wait_for(page, search_url, ".news-box")
+            
+                # 查找公众号
+                account_url = await self._extract(page, "account", find_account_url)
+                if account_url is None:
+                    return {
+                        "account_name": account_name,
+                        "articles": [],
+                        "total_results": 0
+                    }
+            
+                # 点击进入公众号
+                if account_url:
+                    # 访问公众号页面
+                    await self._goto(page, account_url)
+                    logger.info(f"访问公众号页面: {account_url}")
                 
-                for article in article_elements[:limit]:
-                    try:
-                        # 提取文章信息
-                        title_element = article.select_one("h4.weui_media_title")
-                        title = title_element.text.strip() if title_element else "无标题"
-                        
-                        # 提取文章链接
-                        article_url = title_element.get("href", "") if title_element else ""
-                        
-                        # 提取文章ID
-                        article_id = article_url.split("?__biz=")[-1] if "?__biz=" in article_url else ""
-                        
-                        # 提取摘要
-                        summary_element = article.select_one(".weui_media_desc")
-                        summary = summary_element.text.strip() if summary_element else "无摘要"
-                        
-                        # 提取发布时间
-                        time_element = article.select_one(".weui_media_extra_info")
-                        publish_time = time_element.text.strip() if time_element else "未知时间"
-                        
-                        articles.append({
-                            "article_id": article_id,
-                            "title": title,
-                            "summary": summary,
-                            "url": article_url,
-                            "publish_time": publish_time
-                        })
-                    except Exception as e:
-                        logger.warning(f"解析文章时出错: {str(e)}")
+                    # 等待文章列表加载
+                    await self._wait_for(page, account_url, ".weui_media_box")
                 
-                # 关闭页面
-                await page.close()
+                    # 提取文章列表
+                    articles = await self._extract(page, "account", parse_account_articles, limit)
                 
+                    return {
+                        "account_name": account_name,
+                        "articles": articles,
+                        "total_results": len(articles)
+                    }
+            
                 return {
                     "account_name": account_name,
-                    "articles": articles,
-                    "total_results": len(articles)
+                    "articles": [],
+                    "total_results": 0,
+                    "error": "未找到公众号或无法访问公众号页面"
                 }
             
-            # 关闭页面
-            await page.close()
-            
-            return {
-                "account_name": account_name,
-                "articles": [],
-                "total_results": 0,
-                "error": "未找到公众号或无法访问公众号页面"
-            }
-            
         except Exception as e:
             logger.error(f"获取公众号文章列表时出错: {str(e)}")
             raise handle_scraper_error(e)
@@ -377,83 +764,47 @@ class WechatScraperClient:
         Returns:
             包含热门文章列表的字典
         """
+        return await self._with_result_cache(
+            "trending",
+            {"category": category},
+            limit,
+            lambda: self._get_trending_articles(category, limit)
+        )
+    
+    async def _get_trending_articles(self, category: str, limit: int) -> Dict[str, Any]:
+        """抓取并解析热门文章页"""
         try:
-            # 创建新页面
-            page = await self.context.new_page()
-            
-            # 映射分类到URL
-            category_urls = {
-                "hot": "https://weixin.sogou.com/",
-                "tech": "https://weixin.sogou.com/pcindex/pc/pc_1/1.html",
-                "finance": "https://weixin.sogou.com/pcindex/pc/pc_2/1.html",
-                "entertainment": "https://weixin.sogou.com/pcindex/pc/pc_4/1.html"
-            }
-            
-            # 获取对应分类的URL
-            url = category_urls.get(category, category_urls["hot"])
+            # 从页面池借出页面，结束时自动归还
+            async with self.page_pool.page() as page:
+                # 标记页面类型，用于资源拦截
+                self._tag_page(page, "trending")
+            
+                # 映射分类到URL
+                category_urls = {
+                    "hot": "https://weixin.sogou.com/",
+                    "tech": "https://weixin.sogou.com/pcindex/pc/pc_1/1.html",
+                    "finance": "https://weixin.sogou.com/pcindex/pc/pc_2/1.html",
+                    "entertainment": "https://weixin.sogou.com/pcindex/pc/pc_4/1.html"
+                }
             
-            # 访问页面
-            await page.goto(url, timeout=self.timeout)
-            logger.info(f"访问热门文章页面: {url}")
+                # 获取对应分类的URL
+                url = category_urls.get(category, category_urls["hot"])
             
-            # 等待文章列表加载
-            await page.wait_for_selector(".news-list", timeout=self.timeout)
+                # 访问页面
+                await self._goto(page, url)
+                logger.info(f"访问热门文章页面: {url}")
             
-            # 获取页面内容
-            content = await page.content()
-            
-            # 解析文章列表
-            soup = BeautifulSoup(content, 'lxml')
-            articles = []
+                # 等待文章列表加载
+                await self._wait_for(page, url, ".news-list")
             
-            # 提取文章列表
-            article_elements = soup.select(".news-list li")
+                # 提取文章列表
+                articles = await self._extract(page, "trending", parse_trending_articles, limit)
             
-            for article in article_elements[:limit]:
-                try:
-                    # 提取文章信息
-                    title_element = article.select_one("h3 a")
-                    title = title_element.text.strip() if title_element else "无标题"
-                    
-                    # 提取文章链接
-                    article_url = title_element.get("href", "") if title_element else ""
-                    if article_url and not article_url.startswith("http"):
-                        article_url = f"https://weixin.sogou.com{article_url}"
-                    
-                    # 提取文章ID
-                    article_id = article_url.split("url=")[-1] if "url=" in article_url else ""
-                    
-                    # 提取摘要
-                    summary_element = article.select_one(".txt-info")
-                    summary = summary_element.text.strip() if summary_element else "无摘要"
-                    
-                    # 提取公众号名称
-                    account_element = article.select_one(".account")
-                    account_name = account_element.text.strip() if account_element else "未知公众号"
-                    
-                    # 提取发布时间
-                    time_element = article.select_one(".s2")
-                    publish_time = time_element.text.strip() if time_element else "未知时间"
-                    
-                    articles.append({
-                        "article_id": article_id,
-                        "title": title,
-                        "summary": summary,
-                        "url": article_url,
-                        "account_name": account_name,
-                        "publish_time": publish_time
-                    })
-                except Exception as e:
-                    logger.warning(f"解析文章时出错: {str(e)}")
-            
-            # 关闭页面
-            await page.close()
-            
-            return {
-                "category": category,
-                "articles": articles,
-                "total_results": len(articles)
-            }
+                return {
+                    "category": category,
+                    "articles": articles,
+                    "total_results": len(articles)
+                }
             
         except Exception as e:
             logger.error(f"获取热门文章时出错: {str(e)}")
@@ -0,0 +1,73 @@
+"""
+多进程 HTTP 服务
+
+--workers N 启动 N 个工作进程，由 uvicorn 在主进程中创建监听套接字，各工作进程共享该套接字接受连接。
+每个工作进程有自己的共享浏览器和页面池，互不阻塞；跨进程的状态通过 SQLite 共享：
+
+- 文章详情：文章磁盘缓存（WECHAT_SCRAPER_ARTICLE_CACHE_PATH），正文分段的 cursor 在任意进程都可以继续读取
+- 搜索/公众号/热门结果：共享结果缓存（--shared-cache），同一个键同一时间只有一个进程在抓取
+
+MCP 会话状态无法跨进程，多进程模式以无状态 HTTP 提供服务。
+按域名的限流在进程内生效，主进程把配置的速率平分给各工作进程，总请求速率与单进程相同。
+"""
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.applications import Starlette
+
+logger = logging.getLogger("workers")
+
+DEFAULT_SHARED_CACHE_PATH = str(Path.home() / ".cache" / "mcp-server-wechat" / "results.db")
+
+
+def worker_env(workers: int, shared_cache: Optional[str] = None, prewarm: bool = False) -> Dict[str, str]:
+    """
+    工作进程的环境变量：各工作进程在导入时读取这些配置
+
+    Args:
+        workers: 工作进程数
+        shared_cache: 共享结果缓存路径，默认使用 DEFAULT_SHARED_CACHE_PATH
+        prewarm: 是否在握手后预热浏览器
+
+    Returns:
+        需要写入 os.environ 的变量
+    """
+    from .utils.rate_limit import RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND
+
+    env = {
+        "WECHAT_SCRAPER_SHARED_CACHE_PATH": shared_cache or DEFAULT_SHARED_CACHE_PATH,
+        # 每个工作进程各有一个令牌桶，平分后总速率不超过配置值
+        "WECHAT_SCRAPER_RATE_LIMIT": str(RATE_LIMIT_PER_SECOND / workers),
+        "WECHAT_SCRAPER_RATE_BURST": str(max(1, RATE_LIMIT_BURST // workers)),
+    }
+    if prewarm:
+        env["WECHAT_SCRAPER_PREWARM"] = "true"
+    return env
+
+
+def create_app() -> Starlette:
+    """工作进程的应用工厂：每个工作进程导入服务器并创建无状态 HTTP 应用"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from .server import mcp
+    logger.info(f"工作进程 {os.getpid()} 已启动")
+    return mcp.http_app(stateless_http=True)
+
+
+def serve(host: str, port: int, workers: int, shared_cache: Optional[str] = None, prewarm: bool = False):
+    """
+    启动多进程 HTTP 服务，阻塞直到收到退出信号
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        workers: 工作进程数
+        shared_cache: 共享结果缓存路径
+        prewarm: 是否在握手后预热浏览器
+    """
+    import uvicorn
+
+    os.environ.update(worker_env(workers, shared_cache, prewarm))
+    logger.info(f"以 {workers} 个工作进程在 {host}:{port} 提供 HTTP 服务，共享结果缓存: {os.environ['WECHAT_SCRAPER_SHARED_CACHE_PATH']}")
+    uvicorn.run(f"{__name__}:create_app", factory=True, host=host, port=port, workers=workers)
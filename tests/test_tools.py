@@ -7,6 +7,7 @@
 import pytest
 from mcp_server_wechat.tools.search import SearchWechatArticlesInput
 from mcp_server_wechat.tools.article import GetWechatArticleInput
+from mcp_server_wechat.tools.article_batch import GetWechatArticlesBatchInput
 
 
 def test_search_input_validation():
@@ -61,6 +62,26 @@ def test_article_input_validation():
         GetWechatArticleInput(article_id="")
 
 
+def test_article_batch_input_validation():
+    """测试批量获取文章输入参数验证"""
+    input_data = GetWechatArticlesBatchInput(article_ids=["a", "b"])
+    assert input_data.include_content is False
+    assert input_data.cache == "prefer"
+    assert 1 <= input_data.concurrency <= 20
+
+    with pytest.raises(Exception):
+        # 空列表应该失败
+        GetWechatArticlesBatchInput(article_ids=[])
+
+    with pytest.raises(Exception):
+        # 超过 500 篇应该失败
+        GetWechatArticlesBatchInput(article_ids=["a"] * 501)
+
+    with pytest.raises(Exception):
+        # 并发数超出范围应该失败
+        GetWechatArticlesBatchInput(article_ids=["a"], concurrency=0)
+
+
 # 以下是集成测试示例（需要网络，默认跳过）
 
 @pytest.mark.skip(reason="需要真实网络访问，仅在手动测试时运行")
@@ -0,0 +1,1351 @@
+"""
+测试工具模块的基本功能
+
+这些测试使用简单的替身对象，不需要启动浏览器或访问网络。
+"""
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import lxml.html
+import pytest
+from bs4 import BeautifulSoup
+
+from mcp_server_wechat.utils import ArticleHttpFetcher, MCPError, ResponseFormatter, WechatScraperClient
+from mcp_server_wechat.utils.article_cache import ArticleCache, canonicalize_article_url
+from mcp_server_wechat.utils.block_detection import is_block_url
+from mcp_server_wechat.utils.chunking import ArticleContentStore, decode_cursor, encode_cursor, split_chunk
+from mcp_server_wechat.utils.endpoints import rebase_url
+from mcp_server_wechat.utils.extractors import EVALUATE_SCRIPT, FieldSpec, ListExtractor, ListSpec, css_to_xpath, text_of
+from mcp_server_wechat.utils.http_fetcher import needs_browser
+from mcp_server_wechat.utils.interception import ResourceBlocker
+from mcp_server_wechat.utils.local_index import ArticleIndex, BigramTokenizer, normalize_publish_time
+from mcp_server_wechat.utils.metrics import Metrics
+from mcp_server_wechat.utils.offload import Offloader
+from mcp_server_wechat.utils.page_pool import PagePool
+from mcp_server_wechat.utils.parsers import (
+    find_account_url,
+    parse_account_articles,
+    parse_article_details,
+    parse_search_results,
+    parse_trending_articles,
+    evaluate_in_page,
+)
+from mcp_server_wechat.utils.wechat_client import parse_extraction_modes
+from mcp_server_wechat.utils.rate_limit import CircuitBreaker, HostRateLimiter, TokenBucket
+from mcp_server_wechat.utils.result_cache import ResultCache, make_cache_key
+from mcp_server_wechat.utils.retry import RetryStats, with_retry
+from mcp_server_wechat.utils.shared_cache import SharedResultCache
+from mcp_server_wechat.utils.singleflight import SingleFlight
+
+
+class FakePage:
+    """模拟 Playwright Page"""
+
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+        self.urls = []
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, timeout=None):
+        self.urls.append(url)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    """模拟 Playwright BrowserContext"""
+
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+
+@pytest.mark.asyncio
+async def test_page_pool_recycles_pages():
+    """测试页面归还后被重置并复用"""
+    context = FakeContext()
+
+    async def get_context():
+        return context
+
+    pool = PagePool(get_context, size=2)
+
+    async with pool.page() as page:
+        first = page
+    async with pool.page() as page:
+        assert page is first
+
+    assert first.urls == ["about:blank", "about:blank"]
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["recycled"] == 2
+    assert stats["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_page_pool_returns_page_on_error_and_bounds_size():
+    """测试异常时页面仍被归还，且并发借出数量不超过池大小"""
+    context = FakeContext()
+
+    async def get_context():
+        return context
+
+    pool = PagePool(get_context, size=1)
+
+    with pytest.raises(RuntimeError):
+        async with pool.page():
+            raise RuntimeError("解析失败")
+    assert pool.stats()["in_use"] == 0
+
+    release = asyncio.Event()
+
+    async def hold():
+        async with pool.page():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert pool.stats()["waiting"] == 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert len(context.pages) == 1
+    assert pool.stats()["total_waits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_page_pool_prewarm_respects_pages_in_use(monkeypatch):
+    """测试预热只补足到池大小（计入借出的页面），并由启动预热调用"""
+    from types import SimpleNamespace
+
+    from mcp_server_wechat import startup, utils
+
+    context = FakeContext()
+
+    async def get_context():
+        return context
+
+    pool = PagePool(get_context, size=3)
+    async with pool.page() as held:
+        assert await pool.prewarm() == 2
+        assert await pool.prewarm() == 0
+        assert pool.stats()["idle"] == 2
+        assert len(context.pages) == 3
+    assert held in pool._idle and len(pool._idle) == 3
+
+    # 启动预热在浏览器启动后填满页面池
+    context = FakeContext()
+    pool = PagePool(get_context, size=2)
+    manager = SimpleNamespace(get_context=get_context, page_pool=pool)
+    monkeypatch.setattr(utils, "get_browser_manager", lambda: manager)
+    await startup.prewarm()
+    assert pool.stats()["idle"] == 2
+    assert len(context.pages) == 2
+
+
+ARTICLE_HTML = """
+<html><body>
+<h1 id="activity-name"> 测试标题 </h1>
+<a id="js_name">测试公众号</a>
+<em id="publish_time">2025-01-01</em>
+<div id="js_content" style="visibility: hidden;"><p>第一段</p><p>第二段</p></div>
+</body></html>
+"""
+
+
+def test_needs_browser_heuristic():
+    """测试直连页面是否需要回退浏览器的判断"""
+    assert needs_browser(ARTICLE_HTML, "https://mp.weixin.qq.com/s/abc") is False
+    # 验证页
+    assert needs_browser("<html>环境异常 完成验证后即可继续访问</html>") is True
+    # 缺少服务端渲染的正文
+    assert needs_browser("<html><body></body></html>") is True
+    # 被重定向到其他域名
+    assert needs_browser(ARTICLE_HTML, "https://weixin.sogou.com/antispider/") is True
+
+
+@pytest.mark.asyncio
+async def test_http_fast_path_parses_article():
+    """测试 HTTP 直连路径直接解析文章，不启动浏览器"""
+    fetcher = ArticleHttpFetcher()
+    fetcher._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text=ARTICLE_HTML))
+    )
+    client = WechatScraperClient(http_fetcher=fetcher)
+
+    article = await client.get_article_details("https://mp.weixin.qq.com/s/abc")
+    await fetcher.aclose()
+
+    assert article["title"] == "测试标题"
+    assert article["account_name"] == "测试公众号"
+    assert article["publish_time"] == "2025-01-01"
+    assert article["content"] == "第一段\n第二段"
+
+
+def test_resource_blocker_rules():
+    """测试资源拦截规则和按页面类型放行"""
+    blocker = ResourceBlocker(blocked_types={"image", "script"})
+
+    assert blocker.should_block("document", "https://weixin.sogou.com/", "search") is False
+    assert blocker.should_block("image", "https://img01.sogoucdn.com/a.png", "search") is True
+    assert blocker.should_block("script", "https://weixin.sogou.com/a.js", "search") is True
+    # 公众号页面需要保留脚本
+    assert blocker.should_block("script", "https://weixin.sogou.com/a.js", "account") is False
+    # 统计请求无论页面类型都会被拦截
+    assert blocker.should_block("xhr", "https://hm.baidu.com/hm.gif", "account") is True
+
+    # 默认不拦截脚本，搜狗页面改为脚本渲染时列表页不会静默变空
+    assert ResourceBlocker().should_block("script", "https://weixin.sogou.com/a.js", "search") is False
+    assert ResourceBlocker().should_block("stylesheet", "https://weixin.sogou.com/a.css", "search") is True
+
+
+def test_canonicalize_article_url():
+    """测试文章 URL 规范化"""
+    assert canonicalize_article_url(
+        "http://MP.weixin.qq.com/s?sn=c&mid=2&__biz=a&idx=1&chksm=x&scene=21#wechat_redirect"
+    ) == "https://mp.weixin.qq.com/s?__biz=a&idx=1&mid=2&sn=c"
+    assert canonicalize_article_url(
+        "https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw?from=timeline"
+    ) == "https://mp.weixin.qq.com/s/UjZAqvkfk8AzpOoK1KV0yw"
+
+
+@pytest.mark.asyncio
+async def test_article_cache_roundtrip_and_eviction(tmp_path):
+    """测试文章缓存读写、TTL 和容量淘汰"""
+    cache = ArticleCache(path=str(tmp_path / "articles.db"), ttl=3600, max_bytes=10_000, compress=True)
+    article = {"article_id": "a", "title": "标题", "content": "正文" * 100, "url": "https://mp.weixin.qq.com/s/a"}
+
+    await cache.put("https://mp.weixin.qq.com/s/a?from=timeline", article)
+    cached = await cache.get("https://mp.weixin.qq.com/s/a")
+    assert cached == article
+    assert (await cache.get("https://mp.weixin.qq.com/s/a", include_content=False))["content"] is None
+
+    # 过期条目只有在允许时才返回
+    cache.ttl = -1
+    assert await cache.get("https://mp.weixin.qq.com/s/a") is None
+    assert await cache.get("https://mp.weixin.qq.com/s/a", allow_stale=True) == article
+    cache.ttl = 3600
+
+    # 超过容量后淘汰最早访问的条目
+    cache.compress = False
+    for i in range(20):
+        await cache.put(f"https://mp.weixin.qq.com/s/{i}", {"title": str(i), "content": str(i) * 2000})
+    assert cache.evictions > 0
+    assert await cache.get("https://mp.weixin.qq.com/s/a") is None
+
+
+@pytest.mark.asyncio
+async def test_article_cache_metadata_write_keeps_content_age(tmp_path, monkeypatch):
+    """测试不含正文的写入不会刷新旧正文的过期时间，并且缓存总大小与条目一致"""
+    import sqlite3
+    from mcp_server_wechat.utils import article_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(article_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "articles.db")
+    cache = ArticleCache(path=path, ttl=60, max_bytes=10_000, compress=False)
+    url = "https://mp.weixin.qq.com/s/a"
+
+    await cache.put(url, {"title": "标题", "content": "正文" * 100})
+    now[0] += 120
+    await cache.put(url, {"title": "新标题", "content": None})
+
+    # 元数据是新的，正文已经过期
+    assert (await cache.get(url, include_content=False))["title"] == "新标题"
+    assert await cache.get(url) is None
+    assert (await cache.get(url, allow_stale=True))["content"] == "正文" * 100
+
+    for i in range(20):
+        await cache.put(f"https://mp.weixin.qq.com/s/{i}", {"title": str(i), "content": str(i) * 2000})
+    await cache.put("https://mp.weixin.qq.com/s/19", {"title": "19", "content": None})
+    conn = sqlite3.connect(path)
+    try:
+        total = conn.execute("SELECT total FROM cache_size").fetchone()[0]
+        assert total == conn.execute("SELECT SUM(size) FROM articles").fetchone()[0]
+        assert total <= cache.max_bytes
+    finally:
+        conn.close()
+
+
+def test_result_cache_limit_superset_and_lru():
+    """测试结果缓存的 limit 截取、TTL 和 LRU 淘汰"""
+    cache = ResultCache(max_entries=2, ttls={"search": 60, "trending": 0})
+    result = {
+        "articles": [{"title": str(i)} for i in range(10)],
+        "pagination": {"current_page": 1, "total_pages": 5, "total_results": 10},
+        "query": "人工智能"
+    }
+    key = make_cache_key("search", query=" 人工智能 ", page_num=1)
+    cache.put(key, result, limit=10)
+
+    # 参数规范化后命中，limit 更小时截取
+    cached = cache.get(make_cache_key("search", page_num=1, query="人工智能"), limit=3)
+    assert [a["title"] for a in cached["articles"]] == ["0", "1", "2"]
+    assert cached["pagination"]["total_results"] == 3
+    # limit 更大时未命中
+    assert cache.get(key, limit=20) is None
+
+    # TTL 为 0 的操作不缓存
+    cache.put(make_cache_key("trending", category="hot"), result, limit=10)
+    assert cache.get(make_cache_key("trending", category="hot"), limit=10) is None
+
+    # 超过容量时淘汰最久未使用的条目
+    cache.put(make_cache_key("search", query="a", page_num=1), result, limit=10)
+    cache.put(make_cache_key("search", query="b", page_num=1), result, limit=10)
+    assert cache.get(key, limit=10) is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_result_cache_across_instances(tmp_path):
+    """测试共享结果缓存：两个实例（模拟两个工作进程）共享条目，同一个键只抓取一次"""
+    path = str(tmp_path / "results.db")
+    first = SharedResultCache(path, poll_interval=0.01)
+    second = SharedResultCache(path, poll_interval=0.01)
+    key = make_cache_key("search", query="人工智能", page_num=1)
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"articles": [{"title": str(i)} for i in range(10)], "total_results": 10}
+
+    filling = asyncio.create_task(first.fill(key, 10, fetch))
+    await asyncio.sleep(0.05)
+    waiting = asyncio.create_task(second.fill(key, 5, fetch))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert len((await filling)["articles"]) == 10
+    peer = await waiting
+    assert [a["title"] for a in peer["articles"]] == ["0", "1", "2", "3", "4"]
+    assert peer["total_results"] == 5
+    assert calls == 1
+    assert second.stats()["lease_waits"] == 1 and second.stats()["peer_fills"] == 1
+
+    # limit 更大时未命中；访问失败的结果不缓存，租约释放后其他实例可以接手
+    assert second.get(key, limit=20) is None
+    other = make_cache_key("search", query="b", page_num=1)
+    assert (await first.fill(other, 10, lambda: asyncio.sleep(0, {"error": "blocked"})))["error"] == "blocked"
+    assert await second.lookup(other, 10) is None
+    assert "articles" in await second.fill(other, 10, fetch)
+
+
+def test_workers_cli_and_env(monkeypatch):
+    """测试多进程参数：非 HTTP 模式拒绝多个工作进程，限流速率平分给各工作进程"""
+    from mcp_server_wechat import server, workers
+    from mcp_server_wechat.utils import rate_limit
+
+    monkeypatch.setattr(sys, "argv", ["mcp-server-wechat", "--workers", "2"])
+    with pytest.raises(SystemExit):
+        server.main()
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PER_SECOND", 2.0)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BURST", 3)
+    env = workers.worker_env(4, prewarm=True)
+    assert float(env["WECHAT_SCRAPER_RATE_LIMIT"]) == 0.5
+    assert env["WECHAT_SCRAPER_RATE_BURST"] == "1"
+    assert env["WECHAT_SCRAPER_SHARED_CACHE_PATH"] == workers.DEFAULT_SHARED_CACHE_PATH
+    assert env["WECHAT_SCRAPER_PREWARM"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_survives_cancel():
+    """测试并发相同请求只执行一次，且单个调用方取消不影响其他调用方"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"articles": []}
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    third = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == {"articles": []}
+    assert await third is await second
+    assert first.cancelled()
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 2}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_error():
+    """测试共享任务的异常会传递给所有调用方"""
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("抓取失败")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert results[0] is results[1]
+
+
+@pytest.mark.asyncio
+async def test_list_requests_coalesce_across_limits():
+    """测试 limit 较小的请求加入进行中的抓取，合并抓取前会再次查询缓存"""
+    client = WechatScraperClient(result_cache=ResultCache(), single_flight=SingleFlight())
+    release = asyncio.Event()
+    calls = []
+
+    def fetcher(limit):
+        async def fetch():
+            calls.append(limit)
+            await release.wait()
+            return {"articles": [{"title": str(i)} for i in range(limit)], "total_results": limit}
+        return fetch
+
+    async def request(query, limit):
+        return await client._with_result_cache("search", {"query": query}, limit, fetcher(limit))
+
+    # limit=5 加入 limit=10 的抓取并截取结果
+    larger = asyncio.create_task(request("人工智能", 10))
+    smaller = asyncio.create_task(request("人工智能", 5))
+    await asyncio.sleep(0)
+    release.set()
+    assert len((await larger)["articles"]) == 10
+    assert (await smaller)["total_results"] == 5
+    assert calls == [10]
+
+    # limit=10 无法由进行中的 limit=5 抓取满足，按自己的 limit 再抓取
+    release.clear()
+    calls.clear()
+    smaller = asyncio.create_task(request("大模型", 5))
+    larger = asyncio.create_task(request("大模型", 10))
+    await asyncio.sleep(0)
+    release.set()
+    assert len((await smaller)["articles"]) == 5
+    assert len((await larger)["articles"]) == 10
+    assert calls == [5, 10]
+
+    # 外层查询未命中后，上一次抓取写入的结果在合并抓取内被命中
+    calls.clear()
+    lookup = client.result_cache.lookup
+    lookups = []
+
+    async def stale_lookup(key, limit):
+        lookups.append(limit)
+        return None if len(lookups) == 1 else await lookup(key, limit)
+
+    client.result_cache.lookup = stale_lookup
+    assert len((await request("人工智能", 3))["articles"]) == 3
+    assert lookups == [3, 3]
+    assert calls == []
+
+
+def test_formatter_keeps_batch_errors():
+    """测试批量结果中失败条目的格式化"""
+    data = {
+        "articles": [
+            {"article_id": "a", "title": "标题", "account_name": "公众号", "publish_time": "今天", "content": "正文"},
+            {"article_id": "b", "error": "请求超时", "suggestion": "请稍后重试"}
+        ],
+        "total_results": 2,
+        "succeeded": 1,
+        "failed": 1
+    }
+
+    concise = json.loads(ResponseFormatter.format_response(data, format="json", detail="concise"))
+    assert concise["failed"] == 1
+    assert concise["articles"][0]["content_preview"] == "正文"
+    assert concise["articles"][1] == {"article_id": "b", "error": "请求超时", "suggestion": "请稍后重试"}
+
+    markdown = ResponseFormatter.format_response(data, format="markdown", detail="detailed")
+    assert "获取失败: b" in markdown
+    assert "正文" in markdown
+
+
+def test_formatter_stops_at_article_boundary_with_continuation():
+    """测试超长列表在文章边界处停止，输出有效 JSON，并可通过 continuation 取完全部文章"""
+    from mcp_server_wechat.utils.formatters import CHARACTER_LIMIT
+
+    articles = [
+        {"article_id": f"id-{i}", "title": f"标题{i}", "account_name": "公众号", "publish_time": "今天",
+         "content": f"第{i}篇\n" * 2000}
+        for i in range(30)
+    ]
+    data = {"articles": articles, "total_results": 30, "query": "测试"}
+
+    seen, continuation = [], None
+    while True:
+        text = ResponseFormatter.format_response(data, format="json", detail="detailed", continuation=continuation)
+        assert len(text) <= CHARACTER_LIMIT
+        page = json.loads(text)
+        assert page["articles"] == articles[len(seen):len(seen) + len(page["articles"])]
+        seen.extend(page["articles"])
+        continuation = page.get("next_continuation")
+        if continuation is None:
+            break
+        assert page["article_range"]["end"] == len(seen)
+    assert len(seen) == 30
+
+    markdown = ResponseFormatter.format_response(data, format="markdown", detail="detailed")
+    assert len(markdown) <= CHARACTER_LIMIT
+    assert "continuation=" in markdown and markdown.count("---") == markdown.count("### ")
+
+    # 单篇文章就超出限制时截短正文，而不是返回空列表
+    huge = {"articles": [dict(articles[0], content="长" * (CHARACTER_LIMIT * 2))]}
+    single = json.loads(ResponseFormatter.format_response(huge, format="json", detail="detailed"))
+    assert single["articles"][0]["content_truncated"] is True
+    assert "next_continuation" not in single
+
+    # 列表变化后令牌失效
+    first = json.loads(ResponseFormatter.format_response(data, format="json", detail="detailed"))
+    with pytest.raises(MCPError) as excinfo:
+        ResponseFormatter.format_response({"articles": articles[1:]}, continuation=first["next_continuation"])
+    assert excinfo.value.kind == "cursor_expired"
+    with pytest.raises(MCPError) as excinfo:
+        ResponseFormatter.format_response(data, continuation="not-a-token")
+    assert excinfo.value.kind == "invalid_cursor"
+
+
+def test_formatter_compact_columns_and_field_projection():
+    """测试 compact 列式输出、占位值置空和字段投影"""
+    from pydantic import ValidationError
+    from mcp_server_wechat.tools.search import SearchWechatArticlesInput
+
+    data = {
+        "articles": [
+            {"article_id": "a", "title": "标题", "account_name": "未知公众号", "publish_time": "未知时间",
+             "summary": "摘要", "url": "https://mp.weixin.qq.com/s/a"},
+            {"article_id": "b", "error": "请求超时", "suggestion": "请稍后重试"}
+        ],
+        "total_results": 2,
+        "query": "测试"
+    }
+
+    text = ResponseFormatter.format_response(data, format="compact")
+    assert "\n" not in text
+    compact = json.loads(text)
+    assert compact["fields"] == ["title", "article_id", "account_name", "publish_time", "summary", "error", "suggestion"]
+    assert compact["articles"][0] == ["标题", "a", None, None, "摘要", None, None]
+    assert compact["articles"][1] == [None, "b", None, None, None, "请求超时", "请稍后重试"]
+    assert compact["query"] == "测试"
+
+    projected = json.loads(ResponseFormatter.format_response(data, format="compact", fields=["title", "url"]))
+    assert projected["fields"] == ["title", "url", "article_id", "error", "suggestion"]
+    assert projected["articles"][0] == ["标题", "https://mp.weixin.qq.com/s/a", None, None, None]
+
+    as_json = json.loads(ResponseFormatter.format_response(data, format="json", fields=["title", "url"]))
+    assert as_json["articles"][0] == {"title": "标题", "url": "https://mp.weixin.qq.com/s/a"}
+    assert ResponseFormatter._extract_concise_data(data, fields=["url"])["articles"][0] == {"url": "https://mp.weixin.qq.com/s/a"}
+
+    with pytest.raises(ValidationError):
+        SearchWechatArticlesInput(query="测试", fields=["content"])
+
+
+@pytest.mark.asyncio
+async def test_search_articles_multi_merges_and_dedupes():
+    """测试多页搜索按页序合并、去重，并在总页数处停止"""
+    client = WechatScraperClient()
+    requested = []
+
+    async def fake_search(query, page_num=1, limit=10):
+        requested.append(page_num)
+        articles = [
+            {"title": f"{page_num}-{i}", "url": f"https://weixin.sogou.com/link?url={page_num}-{i}&k={page_num}"}
+            for i in range(3)
+        ]
+        # 第 2 页重复第 1 页的最后一篇文章（跳转参数不同）
+        if page_num == 2:
+            articles[0]["url"] = "https://weixin.sogou.com/link?url=1-2&k=99"
+        return {"articles": articles, "pagination": {"current_page": page_num, "total_pages": 3}, "query": query}
+
+    client.search_articles = fake_search
+    result = await client.search_articles_multi("测试", start_page=1, max_results=100)
+
+    assert sorted(requested) == [1, 2, 3]
+    titles = [a["title"] for a in result["articles"]]
+    assert titles == ["1-0", "1-1", "1-2", "2-1", "2-2", "3-0", "3-1", "3-2"]
+    assert result["pagination"]["pages_fetched"] == 3
+    assert result["pagination"]["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_with_retry_policy(monkeypatch):
+    """测试瞬时错误会重试，访问频率受限不会重试"""
+    monkeypatch.setattr("mcp_server_wechat.utils.retry.backoff_delay", lambda attempt: 0)
+    stats = RetryStats()
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise MCPError("请求超时", kind="timeout")
+        return "ok"
+
+    assert await with_retry(flaky, max_retries=3, stats=stats) == "ok"
+    assert calls == 3
+    assert stats.retries == 2
+    assert stats.recovered == 1
+
+    async def blocked():
+        raise MCPError("访问频率受限", kind="rate_limited")
+
+    with pytest.raises(MCPError):
+        await with_retry(blocked, max_retries=3, stats=stats)
+    assert stats.retries == 2
+
+    async def always_timeout():
+        raise MCPError("请求超时", kind="timeout")
+
+    with pytest.raises(MCPError):
+        await with_retry(always_timeout, max_retries=1, stats=stats)
+    assert stats.exhausted == 1
+    assert stats.retries_by_kind == {"timeout": 3}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_burst():
+    """测试令牌桶在突发容量用尽后开始等待"""
+    bucket = TokenBucket(rate=50, burst=2)
+    waits = [await bucket.acquire() for _ in range(3)]
+
+    assert waits[0] < 0.01 and waits[1] < 0.01
+    assert waits[2] > 0.005
+    assert bucket.acquired == 3
+    assert bucket.waits == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_transitions():
+    """测试熔断器在访问受限后打开、冷却后只放行一个探测请求"""
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    assert breaker.allow()
+
+    breaker.record_block()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    await asyncio.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    limiter = HostRateLimiter(rate=0, burst=1, threshold=1, cooldown=60)
+    limiter.record_block("https://weixin.sogou.com/weixin?query=a")
+    with pytest.raises(MCPError) as exc_info:
+        await limiter.acquire("https://weixin.sogou.com/weixin?query=b")
+    assert exc_info.value.kind == "circuit_open"
+    # 其他域名不受影响
+    await limiter.acquire("https://mp.weixin.qq.com/s/abc")
+    assert limiter.stats()["weixin.sogou.com"]["circuit_rejected"] == 1
+
+
+class FakeArticleFetcher:
+    """模拟 HTTP 直连抓取器，返回固定的 HTML（None 表示需要浏览器）"""
+
+    def __init__(self, html):
+        self.html = html
+
+    async def fetch(self, url):
+        return self.html
+
+
+class HangingPage:
+    """导航永不完成的页面"""
+
+    url = "about:blank"
+
+    async def goto(self, url, timeout=None):
+        await asyncio.sleep(3600)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_and_cancellation_settle_half_open_probe():
+    """测试直连路径和被取消的导航都会结束半开状态的探测，熔断器不会停留在半开状态"""
+    article_url = "https://mp.weixin.qq.com/s/abc"
+    limiter = HostRateLimiter(rate=0, burst=1, threshold=1, cooldown=0.01)
+    breaker = limiter.breaker("mp.weixin.qq.com")
+
+    # 探测请求走直连路径且成功：熔断器关闭，后续请求正常放行
+    limiter.record_block(article_url)
+    await asyncio.sleep(0.02)
+    client = WechatScraperClient(http_fetcher=FakeArticleFetcher(load_fixture("article.html")), rate_limiter=limiter)
+    assert (await client.get_article_details(article_url))["title"] == "示例文章：从入门到实践"
+    assert breaker.state == "closed"
+    assert (await client.get_article_details(article_url, cache_mode="bypass"))["title"] == "示例文章：从入门到实践"
+
+    # 直连页面需要浏览器：回退前释放探测机会，浏览器访问可以重新获得
+    limiter.record_block(article_url)
+    await asyncio.sleep(0.02)
+    client = WechatScraperClient(http_fetcher=FakeArticleFetcher(None), rate_limiter=limiter)
+    with pytest.raises(Exception):
+        # 没有页面池，回退到浏览器时失败
+        await client._fetch_article_details(article_url, article_url, True)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+    # 导航被取消：释放探测机会
+    breaker.record_failure()
+    task = asyncio.create_task(client._goto(HangingPage(), article_url))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.allow()
+
+
+class FakeLoadedPage:
+    """模拟已完成导航的页面，只包含给定的元素"""
+
+    def __init__(self, url, elements, html="<html><body></body></html>"):
+        self.url = url
+        self.elements = set(elements)
+        self.html = html
+
+    async def wait_for_selector(self, selector, timeout=None):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        if not any(part in self.elements for part in selector.split(", ")):
+            await asyncio.sleep(timeout / 1000)
+            raise PlaywrightTimeoutError(selector)
+
+    async def query_selector(self, selector):
+        return selector if selector in self.elements else None
+
+    async def content(self):
+        return self.html
+
+
+@pytest.mark.asyncio
+async def test_block_page_detected_without_selector_timeout():
+    """测试验证页在等待期望选择器时立即被识别"""
+    limiter = HostRateLimiter(rate=0, burst=1, threshold=1, cooldown=60)
+    client = WechatScraperClient(rate_limiter=limiter)
+    client.timeout = 30000
+    url = "https://weixin.sogou.com/weixin?type=2&query=test"
+
+    # 正常页面
+    await client._wait_for(FakeLoadedPage(url, [".news-box"]), url, ".news-box")
+
+    # 同一 URL 返回验证码表单
+    with pytest.raises(MCPError) as exc_info:
+        await asyncio.wait_for(
+            client._wait_for(FakeLoadedPage(url, ["#seccodeForm"]), url, ".news-box"),
+            timeout=1
+        )
+    assert exc_info.value.kind == "rate_limited"
+    assert limiter.breaker("weixin.sogou.com").state == "open"
+
+    # 重定向到 antispider 页面
+    blocked_url = "https://weixin.sogou.com/antispider/?from=%2Fweixin"
+    with pytest.raises(MCPError):
+        await client._wait_for(FakeLoadedPage(blocked_url, []), url, ".news-box")
+
+
+@pytest.mark.asyncio
+async def test_block_page_detected_by_text_after_selector_timeout():
+    """测试没有验证页元素的访问受限页按文本识别，与 HTTP 直连的判断一致"""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    limiter = HostRateLimiter(rate=0, burst=1, threshold=1, cooldown=60)
+    client = WechatScraperClient(rate_limiter=limiter)
+    client.timeout = 10
+    url = "https://weixin.sogou.com/weixin?type=2&query=test"
+
+    # 普通的选择器超时仍按超时处理（可重试），不打开熔断器
+    with pytest.raises(PlaywrightTimeoutError):
+        await client._wait_for(FakeLoadedPage(url, []), url, ".news-box")
+    assert limiter.breaker("weixin.sogou.com").state == "closed"
+
+    html = "<html><body><p>访问频率受限，请稍后再试</p></body></html>"
+    assert needs_browser(html)
+    with pytest.raises(MCPError) as exc_info:
+        await client._wait_for(FakeLoadedPage(url, [], html), url, ".news-box")
+    assert exc_info.value.kind == "rate_limited"
+    assert limiter.breaker("weixin.sogou.com").state == "open"
+
+
+SEARCH_HTML = """
+<html><body><div class="news-box"><ul class="news-list">
+<li><div class="txt-box"><h3><a href="/link?url=abc&amp;type=2">标题<em><!--red_beg-->一<!--red_end--></em></a></h3>
+<p class="txt-info">摘要 <script>var x = 1;</script>内容</p>
+<div class="s-p"><span class="all-time-y2 account">公众号A</span><span class="s2">2025-01-01</span></div></div></li>
+<li><h3><a href="https://weixin.sogou.com/link?url=def">第二篇</a></h3></li>
+<li><p class="txt-info">没有标题</p></li>
+</ul></div>
+<div id="pagebar_container"><a>2</a><a>3</a><a>下一页</a></div>
+</body></html>
+"""
+
+ACCOUNT_SEARCH_HTML = """
+<html><body><ul class="news-list2"><li><div class="img-box"><a href="/gzh?openid=xyz"><img></a></div></li></ul></body></html>
+"""
+
+ACCOUNT_HTML = """
+<html><body>
+<div class="weui_media_box appmsg"><h4 class="weui_media_title" href="https://mp.weixin.qq.com/s?__biz=MzA=&amp;mid=1">文章<span> 一 </span></h4>
+<p class="weui_media_desc">摘要一</p><p class="weui_media_extra_info">2025年1月1日</p></div>
+<div class="weui_media_box"><p class="weui_media_desc">&nbsp;</p></div>
+</body></html>
+"""
+
+RICH_ARTICLE_HTML = """
+<html><head><style>.a {}</style></head><body>
+<h1 id="activity-name">
+  标题 &amp; 副标题
+</h1>
+<span id="js_name"><!-- name -->公众号<style>.x{}</style></span>
+<div id="js_content"><section style="color:red"><p>第一段<br>换行</p><script>alert(1)</script>
+<p>第二段<ruby>汉<rt>han</rt></ruby></p></section>尾部</div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("html", [ARTICLE_HTML, RICH_ARTICLE_HTML, "<html><body></body></html>"])
+@pytest.mark.parametrize("include_content", [True, False])
+def test_parser_backends_produce_identical_articles(html, include_content):
+    """测试 lxml 与 BeautifulSoup 后端解析文章详情的输出完全相同"""
+    url = "https://mp.weixin.qq.com/s/abc"
+    expected = parse_article_details(html, "id", url, include_content, backend="bs4")
+    assert parse_article_details(html, "id", url, include_content, backend="lxml") == expected
+
+
+def test_parser_backends_produce_identical_lists():
+    """测试 lxml 与 BeautifulSoup 后端解析列表页的输出完全相同"""
+    articles, total_pages = parse_search_results(SEARCH_HTML, 10, backend="lxml")
+    assert (articles, total_pages) == parse_search_results(SEARCH_HTML, 10, backend="bs4")
+    assert total_pages == 3
+    assert [a["title"] for a in articles] == ["标题一", "第二篇", "无标题"]
+    assert articles[0]["article_id"] == "abc&type=2"
+    assert articles[0]["summary"] == "摘要 内容"
+
+    assert parse_search_results(SEARCH_HTML, 1, backend="lxml")[0] == articles[:1]
+    assert parse_trending_articles(SEARCH_HTML, 10, backend="lxml") == parse_trending_articles(SEARCH_HTML, 10, backend="bs4")
+
+    for html in (ACCOUNT_SEARCH_HTML, ACCOUNT_HTML, "<html><ul class='news-list2'><li>无链接</li></ul></html>"):
+        assert find_account_url(html, backend="lxml") == find_account_url(html, backend="bs4")
+    assert find_account_url(ACCOUNT_SEARCH_HTML) == "https://weixin.sogou.com/gzh?openid=xyz"
+    assert find_account_url(ACCOUNT_HTML) is None
+
+    articles = parse_account_articles(ACCOUNT_HTML, 10, backend="lxml")
+    assert articles == parse_account_articles(ACCOUNT_HTML, 10, backend="bs4")
+    assert articles[0]["article_id"] == "MzA=&mid=1"
+    assert articles[1]["summary"] == ""
+
+
+def test_lxml_backend_falls_back_to_bs4():
+    """测试 lxml 后端无法解析时回退到 BeautifulSoup"""
+    html = '<?xml version="1.0" encoding="utf-8"?><html><body><h1 id="activity-name">标题</h1></body></html>'
+    assert parse_article_details(html, "id", "url", False, backend="lxml")["title"] == "标题"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process"])
+async def test_offloader_threshold_and_executor(mode):
+    """测试小输入在事件循环中执行，大输入放到执行器中执行且结果一致"""
+    offloader = Offloader(mode=mode, workers=1, threshold=len(ARTICLE_HTML) + 1)
+    url = "https://mp.weixin.qq.com/s/abc"
+    try:
+        small = await offloader.run(parse_article_details, ARTICLE_HTML, "id", url, True, size=len(ARTICLE_HTML))
+        assert offloader.stats()["inline"] == 1
+
+        large_html = ARTICLE_HTML.replace("第二段", "第二段" * 1000)
+        large = await offloader.run(parse_article_details, large_html, "id", url, True, size=len(large_html))
+        assert offloader.stats()["offloaded"] == 1
+        assert large["title"] == small["title"]
+        assert large["content"].endswith("第二段" * 1000)
+
+        data = {"articles": [large], "total_results": 1}
+        formatted = await ResponseFormatter.format_response_async(data, format="markdown", offloader=offloader)
+        assert formatted == ResponseFormatter.format_response(data, format="markdown")
+        assert offloader.stats()["offloaded"] == 2
+    finally:
+        offloader.shutdown()
+
+
+def test_list_extractor_spec():
+    """测试声明式列表提取器的编译、共用选择器和派生字段"""
+    assert css_to_xpath("h4.weui_media_title") == (
+        ".//h4[contains(concat(' ', normalize-space(@class), ' '), ' weui_media_title ')]"
+    )
+    assert css_to_xpath("#main a") == ".//*[@id='main']//a"
+    with pytest.raises(ValueError):
+        css_to_xpath("ul > li")
+
+    extractor = ListExtractor(ListSpec(
+        name="测试",
+        rows="#main .item",
+        fields={
+            "slug": FieldSpec(source="link", post=lambda url: url.rsplit("/", 1)[-1]),
+            "name": FieldSpec("a", default="无名称"),
+            "link": FieldSpec("a", attr="href"),
+        }
+    ))
+    html = '<div id="main"><p class="item"><a href="/x/1"> 一 </a></p><p class="item other"></p></div>'
+    rows = extractor.extract_lxml(lxml.html.document_fromstring(html))
+    assert rows == [{"slug": "1", "name": "一", "link": "/x/1"}, {"slug": "", "name": "无名称", "link": ""}]
+    assert list(rows[0]) == ["slug", "name", "link"]
+    assert extractor.extract_bs4(BeautifulSoup(html, "lxml"), limit=1) == rows[:1]
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# (解析函数, 固定页面, 除 html 外的参数)
+FIXTURE_CASES = [
+    (parse_search_results, "search.html", (10,)),
+    (parse_search_results, "search.html", (2,)),
+    (parse_trending_articles, "trending.html", (10,)),
+    (find_account_url, "account_search.html", ()),
+    (find_account_url, "account.html", ()),
+    (parse_account_articles, "account.html", (10,)),
+    (parse_article_details, "article.html", ("id", "https://mp.weixin.qq.com/s/abc", True)),
+    (parse_article_details, "article.html", ("id", "https://mp.weixin.qq.com/s/abc", False)),
+]
+
+
+def load_fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class FakeEvaluatePage:
+    """按 EVALUATE_SCRIPT 的约定在 lxml 树上返回原始值，模拟 page.evaluate"""
+
+    def __init__(self, html):
+        self.doc = lxml.html.document_fromstring(html)
+
+    async def evaluate(self, script, payload):
+        result = {}
+        for key, spec in payload.items():
+            rows = self.doc.xpath(css_to_xpath(spec["rows"]))[:spec["limit"]]
+            result[key] = []
+            for row in rows:
+                raw = {}
+                for name, selector, attr, separator in spec["fields"]:
+                    matches = row.xpath(css_to_xpath(selector))
+                    if not matches:
+                        raw[name] = None
+                    elif attr is not None:
+                        raw[name] = matches[0].get(attr) or ""
+                    else:
+                        raw[name] = text_of(matches[0], separator)
+                result[key].append(raw)
+        return result
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parser, fixture, args", FIXTURE_CASES)
+async def test_fixture_parity_across_extraction_modes(parser, fixture, args):
+    """测试固定页面在 lxml、BeautifulSoup 和浏览器内提取三种方式下结果相同"""
+    html = load_fixture(fixture)
+    expected = parser(html, *args, backend="bs4")
+    assert parser(html, *args, backend="lxml") == expected
+    assert await evaluate_in_page(FakeEvaluatePage(html), parser, *args) == expected
+
+
+def test_fixture_expected_values():
+    """测试固定页面的关键字段"""
+    articles, total_pages = parse_search_results(load_fixture("search.html"), 10)
+    assert total_pages == 10
+    assert [a["title"] for a in articles] == ["示例关键词在实际场景中的应用", "第二篇\xa0文章", "没有链接的标题", "无标题"]
+    assert articles[0]["publish_time"] == "2025-1-1"
+    assert articles[1]["summary"] == "摘要里有\n换行和空白"
+
+    article = parse_article_details(load_fixture("article.html"), "id", "url", True)
+    assert article["title"] == "示例文章：从入门到实践"
+    assert article["account_name"] == "示例公众号"
+    assert "window.__second_open__" not in article["content"]
+    assert "hàn" not in article["content"]
+
+
+NESTED_ROW_SPEC = ListSpec(
+    name="嵌套行",
+    rows="div.row",
+    fields={"link": FieldSpec(selector="h3 a", attr="href"), "title": FieldSpec(selector="h3 a")}
+)
+NESTED_ROW_HTML = """
+<html><body>
+<h3><div class="row"><a href="/outside">行外的 h3</a></div></h3>
+<div class="row"><h3><a href="/inside">行内的 h3</a></h3></div>
+</body></html>
+"""
+NESTED_ROW_EXPECTED = [{"link": "", "title": ""}, {"link": "/inside", "title": "行内的 h3"}]
+
+
+def test_list_extractor_scopes_field_selectors_to_row():
+    """测试字段选择器的每一部分都只在行内匹配，行外的祖先元素不参与匹配"""
+    extractor = ListExtractor(NESTED_ROW_SPEC)
+    assert extractor.extract_lxml(lxml.html.document_fromstring(NESTED_ROW_HTML)) == NESTED_ROW_EXPECTED
+    assert extractor.extract_bs4(BeautifulSoup(NESTED_ROW_HTML, "lxml")) == NESTED_ROW_EXPECTED
+
+
+@pytest.mark.asyncio
+async def test_evaluate_script_matches_parser_in_browser():
+    """在真实浏览器中执行提取脚本，与 Python 解析结果对比（需要已安装 Chromium）"""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        try:
+            browser = await playwright.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"无法启动 Chromium: {e}")
+        try:
+            page = await browser.new_page()
+            for parser, fixture, args in FIXTURE_CASES:
+                html = load_fixture(fixture)
+                await page.set_content(html)
+                assert await evaluate_in_page(page, parser, *args) == parser(html, *args, backend="bs4"), fixture
+
+            # 行位于 h3 内时，"h3 a" 不应匹配行外的祖先
+            extractor = ListExtractor(NESTED_ROW_SPEC)
+            await page.set_content(NESTED_ROW_HTML)
+            raw = await page.evaluate(EVALUATE_SCRIPT, {"rows": extractor.evaluate_payload()})
+            assert extractor.from_evaluated(raw["rows"]) == NESTED_ROW_EXPECTED
+        finally:
+            await browser.close()
+
+
+def test_parse_extraction_modes():
+    """测试按操作设置提取方式"""
+    assert parse_extraction_modes("html") == {"search": "html", "account": "html", "trending": "html", "article": "html"}
+    modes = parse_extraction_modes("html, search=dom,article=DOM,bogus=dom,trending=xml")
+    assert modes == {"search": "dom", "account": "html", "trending": "html", "article": "dom"}
+    assert parse_extraction_modes("dom")["account"] == "dom"
+
+
+def test_benchmark_script_emits_json(tmp_path):
+    """测试离线基准脚本输出可解析的 JSON 并能与基线对比"""
+    script = Path(__file__).resolve().parent.parent / "benchmarks" / "bench_parsers.py"
+    output = tmp_path / "results.json"
+    args = [sys.executable, str(script), "--iterations", "1", "--min-seconds", "0", "--backend", "lxml"]
+    subprocess.run(args + ["--output", str(output)], check=True, timeout=120)
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert {"meta", "parse", "format"} <= results.keys()
+    assert {item["page"] for item in results["parse"]} >= {"search", "trending", "account", "article_small", "article_huge"}
+    assert {(item["format"], item["detail"]) for item in results["format"]} == {
+        ("json", "concise"), ("json", "detailed"), ("compact", "concise"), ("compact", "detailed"),
+        ("markdown", "concise"), ("markdown", "detailed")
+    }
+    assert all(item["mean_ms"] >= 0 and item["python_heap_peak_kb"] > 0 for item in results["parse"])
+    # 常驻内存在子进程中测量，包含 libxml2 的分配
+    huge = next(item for item in results["parse"] if item["page"] == "article_huge")
+    assert huge["peak_rss_kb"] > huge["python_heap_peak_kb"]
+
+    # 阈值很大时不应报告回归
+    compared = subprocess.run(
+        args + ["--skip-formatter", "--baseline", str(output), "--threshold", "1000"],
+        capture_output=True, text=True, timeout=120
+    )
+    assert compared.returncode == 0
+    assert json.loads(compared.stdout)["regressions"] == []
+
+
+def test_rebase_url():
+    """测试真实站点地址替换为配置的基础地址"""
+    base = "http://127.0.0.1:8765"
+    assert rebase_url("https://weixin.sogou.com/weixin?type=2&query=a", base, base) == f"{base}/weixin?type=2&query=a"
+    assert rebase_url("https://mp.weixin.qq.com/s/abc?x=1", base, base + "/mp/") == f"{base}/mp/s/abc?x=1"
+    assert rebase_url("https://example.com/s/abc", base, base) == "https://example.com/s/abc"
+    assert rebase_url("https://mp.weixin.qq.com/s/abc") == "https://mp.weixin.qq.com/s/abc"
+
+
+@pytest.mark.asyncio
+async def test_client_against_fake_server():
+    """测试客户端通过基础地址访问本地模拟服务器，并能识别注入的验证页"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+    from fake_wechat_server import FakeServerConfig, FakeWechatServer
+
+    article_url = "https://mp.weixin.qq.com/s/abc"
+    with FakeWechatServer(FakeServerConfig(article_fixture="article.html")) as server:
+        fetcher = ArticleHttpFetcher()
+        client = WechatScraperClient(http_fetcher=fetcher, sogou_base_url=server.base_url, article_base_url=server.base_url)
+        try:
+            article = await client.get_article_details(article_url)
+            assert article["title"] == "示例文章：从入门到实践"
+            assert article["url"] == article_url
+
+            # 验证页：直连路径返回 None，重定向后的地址可被识别
+            server.config.captcha_rate = 1.0
+            assert await fetcher.fetch(rebase_url(article_url, server.base_url, server.base_url)) is None
+            response = await fetcher.client.get(f"{server.base_url}/weixin?type=2&query=a")
+            assert is_block_url(str(response.url))
+            assert "seccodeForm" in response.text
+        finally:
+            await fetcher.aclose()
+
+        assert server.stats()["captchas"] == 2
+
+
+@pytest.mark.asyncio
+async def test_local_index_search_and_filters(tmp_path, monkeypatch):
+    """测试本地全文索引：抓取的文章写入索引，中文按 bigram 检索，支持排序、公众号和时间过滤"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+    from fake_wechat_server import FakeServerConfig, FakeWechatServer
+    from mcp_server_wechat.tools import local_search
+
+    tokenizer = BigramTokenizer()
+    assert tokenizer.index_terms("ＧＰＴ4模型：人工智能") == "gpt4 模型 型 人工 工智 智能 能"
+    assert tokenizer.match_query("人工智能  gpt4 猫") == '"人工 工智 智能" AND "gpt4" AND "猫"*'
+    assert normalize_publish_time("2025年1月2日") == "2025-01-02 00:00"
+    assert normalize_publish_time("3天前") is None
+
+    index = ArticleIndex(str(tmp_path / "index.db"), max_documents=3)
+    with FakeWechatServer(FakeServerConfig(article_fixture="article.html")) as server:
+        fetcher = ArticleHttpFetcher()
+        client = WechatScraperClient(http_fetcher=fetcher, article_index=index, article_base_url=server.base_url)
+        try:
+            await client.get_article_details("https://mp.weixin.qq.com/s/abc")
+        finally:
+            await fetcher.aclose()
+
+    await index.add({"url": "https://mp.weixin.qq.com/s/b", "title": "人工智能周报", "account_name": "机器之心",
+                     "publish_time": "2025-03-01", "content": "本周人工智能领域发布了多个模型。"})
+    await index.add({"url": "https://mp.weixin.qq.com/s/c", "title": "医疗动态", "account_name": "科技日报",
+                     "publish_time": "2025-02-01 10:00", "content": "医院引入人工智能辅助诊断，小猫也来了。"})
+
+    result = await index.search("入门")
+    assert [a["title"] for a in result["articles"]] == ["示例文章：从入门到实践"]
+    assert result["articles"][0]["account_name"] == "示例公众号"
+
+    # 标题命中排在正文命中之前；子串必须连续出现；单字按前缀匹配
+    assert [a["url"][-1] for a in (await index.search("人工智能"))["articles"]] == ["b", "c"]
+    assert (await index.search("智人"))["total_results"] == 0
+    assert [a["url"][-1] for a in (await index.search("猫"))["articles"]] == ["c"]
+    assert "人工智能" in (await index.search("辅助 诊断"))["articles"][0]["summary"]
+
+    assert [a["url"][-1] for a in (await index.search("人工智能", account=" 科技日报 "))["articles"]] == ["c"]
+    assert [a["url"][-1] for a in (await index.search("人工智能", until="2025-02-01"))["articles"]] == ["c"]
+    assert [a["url"][-1] for a in (await index.search("人工智能", sort="newest", since="2025-01-15"))["articles"]] == ["b", "c"]
+
+    # 重新抓取时更新索引；超过上限时淘汰最早索引的文章
+    await index.add({"url": "https://mp.weixin.qq.com/s/c", "title": "医疗动态", "account_name": "科技日报",
+                     "publish_time": "2025-02-01 10:00", "content": "更新后的正文"})
+    assert (await index.search("猫"))["total_results"] == 0
+    await index.add({"url": "https://mp.weixin.qq.com/s/d", "title": "新文章", "account_name": "科技日报",
+                     "publish_time": "2025-04-01", "content": "正文"})
+    assert await index.count() == 3
+    assert (await index.search("入门"))["total_results"] == 0
+
+    monkeypatch.setattr(local_search, "get_article_index", lambda: index)
+    response = json.loads(await local_search.search_local_articles(
+        local_search.SearchLocalArticlesInput(query="人工智能", format="compact", fields=["title", "url"])
+    ))
+    assert response["fields"] == ["title", "url"]
+    assert response["articles"] == [["人工智能周报", "https://mp.weixin.qq.com/s/b"]]
+    with pytest.raises(MCPError):
+        await local_search.search_local_articles(local_search.SearchLocalArticlesInput(query="！？"))
+
+
+@pytest.mark.asyncio
+async def test_metrics_stages_and_counters():
+    """测试阶段耗时按工具归类，计数器和收集函数可导出为 JSON 和 Prometheus 文本"""
+    metrics = Metrics()
+    metrics.register_collector("pool", lambda: {"total_waits": 3, "path": "ignored", "by_kind": {"timeout": 2}})
+    metrics.register_collector("broken", lambda: 1 / 0)
+
+    async def call_tool(name: str, fail: bool):
+        with metrics.tool(name):
+            with metrics.stage("goto"):
+                await asyncio.sleep(0)
+            metrics.inc("blocked_pages")
+            if fail:
+                raise MCPError(message="失败")
+
+    await call_tool("search_wechat_articles", False)
+    with pytest.raises(MCPError):
+        await call_tool("search_wechat_articles", True)
+    metrics.observe("browser_launch", 120.0)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["search_wechat_articles"]["goto"]["count"] == 2
+    assert snapshot["stages"]["search_wechat_articles"]["total"]["count"] == 2
+    assert snapshot["stages"]["-"]["browser_launch"]["p99_seconds"] == 60.0
+    assert {"outcome": "error", "tool": "search_wechat_articles", "value": 1} in snapshot["counters"]["tool_calls"]
+    assert snapshot["counters"]["blocked_pages"] == [{"tool": "search_wechat_articles", "value": 2}]
+    assert snapshot["collectors"]["pool"]["total_waits"] == 3
+
+    text = metrics.render_prometheus()
+    assert 'wechat_scraper_stage_duration_seconds_bucket{tool="search_wechat_articles",stage="goto",le="+Inf"} 2' in text
+    assert 'wechat_scraper_stage_duration_seconds_bucket{tool="",stage="browser_launch",le="60"} 0' in text
+    assert 'wechat_scraper_blocked_pages_total{tool="search_wechat_articles"} 2' in text
+    assert "wechat_scraper_pool_total_waits 3" in text
+    assert 'wechat_scraper_pool_by_kind{key="timeout"} 2' in text
+    assert "path" not in text
+
+    disabled = Metrics(enabled=False)
+    with disabled.tool("x"), disabled.stage("goto"):
+        disabled.inc("blocked_pages")
+    assert disabled.snapshot()["stages"] == {} and disabled.snapshot()["counters"] == {}
+
+
+@pytest.mark.asyncio
+async def test_metrics_resource_and_prometheus_endpoint():
+    """测试服务器提供指标资源和 /metrics 端点"""
+    from fastmcp import Client
+    from mcp_server_wechat.server import mcp
+
+    async with Client(mcp) as client:
+        contents = await client.read_resource("wechat://metrics")
+    assert {"stages", "counters", "collectors"} <= json.loads(contents[0].text).keys()
+
+    app = mcp.http_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        response = await http.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE wechat_scraper_stage_duration_seconds histogram" in response.text
+    assert "wechat_scraper_page_pool_total_waits" in response.text
+
+
+def test_server_import_defers_scraper_dependencies():
+    """测试导入服务器不加载爬虫依赖，--measure-startup 输出各阶段耗时"""
+    probe = (
+        "import sys, mcp_server_wechat.server; "
+        "print([m for m in ('playwright', 'bs4', 'lxml', 'httpx', 'mcp_server_wechat.utils.wechat_client') if m in sys.modules])"
+    )
+    loaded = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, timeout=60)
+    assert loaded.stdout.strip() == "[]"
+
+    measured = subprocess.run(
+        [sys.executable, "-m", "mcp_server_wechat.server", "--measure-startup", "--no-browser"],
+        capture_output=True, text=True, check=True, timeout=120
+    )
+    report = json.loads(measured.stdout)
+    assert {"interpreter", "import_fastmcp", "import_server", "import_playwright", "list_tools"} <= report["phases_ms"].keys()
+    assert report["tools"] == 6
+    assert report["ready_ms"] > 0 and "browser_launch" not in report["phases_ms"]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_starts_after_handshake(monkeypatch):
+    """测试预热在 MCP 握手完成后启动"""
+    from fastmcp import Client, FastMCP
+    from mcp_server_wechat import server
+
+    started = []
+    monkeypatch.setattr(server, "start_prewarm", lambda: started.append(True))
+
+    app = FastMCP(name="prewarm-test")
+    app.add_middleware(server.PrewarmMiddleware())
+    async with Client(app) as client:
+        assert started == [True]
+        await client.list_tools()
+    assert started == [True]
+
+
+def test_split_chunk_and_cursor():
+    """测试正文分段在段落边界处结束，cursor 可以往返解析"""
+    content = "第一段" * 10 + "\n" + "第二段" * 10 + "\n" + "尾" * 5
+    chunk, end = split_chunk(content, 0, 35)
+    assert chunk == "第一段" * 10 + "\n" and end == 31
+    chunk, end = split_chunk(content, 0, 20)
+    assert len(chunk) == 20 and end == 20  # 窗口内没有换行时按字符数切分
+    assert split_chunk(content, 31, 1000) == (content[31:], len(content))
+
+    cursor = encode_cursor("https://mp.weixin.qq.com/s/abc", 31, 40, "d1")
+    assert decode_cursor(cursor) == {"url": "https://mp.weixin.qq.com/s/abc", "offset": 31, "max_chars": 40, "digest": "d1"}
+    with pytest.raises(MCPError) as excinfo:
+        decode_cursor("not-a-cursor")
+    assert excinfo.value.kind == "invalid_cursor"
+
+
+@pytest.mark.asyncio
+async def test_article_chunk_fits_response_limit_when_escaped():
+    """测试转义后变长的正文按序列化长度分段，响应不会在中间被截断"""
+    from mcp_server_wechat.utils.formatters import CHARACTER_LIMIT
+
+    url = "https://mp.weixin.qq.com/s/escaped"
+    content = ('"\\\n\x01\t😀' * 10 + "正文\n") * 3000
+    store = ArticleContentStore()
+    store.put(url, {"title": "转义", "account_name": "示例公众号", "publish_time": "2025-01-01", "url": url, "content": content})
+    client = WechatScraperClient(content_store=store)
+
+    full, cursor, chunks = "", None, 0
+    while True:
+        chunk = await client.get_article_chunk(url, max_chars=80000, cursor=cursor)
+        # 文章详情始终使用详细模式
+        for format in ("json", "compact", "markdown"):
+            response = ResponseFormatter.format_response(chunk, format=format, detail="detailed")
+            assert len(response) <= CHARACTER_LIMIT
+            if format != "markdown":
+                assert json.loads(response).get("next_cursor") == chunk["next_cursor"]
+            elif chunk["next_cursor"]:
+                assert chunk["next_cursor"] in response
+        full += chunk["content"]
+        chunks += 1
+        cursor = chunk["next_cursor"]
+        if cursor is None:
+            break
+
+    assert full == content
+    assert chunks > len(content) // 80000
+
+
+@pytest.mark.asyncio
+async def test_article_chunks_served_from_content_store():
+    """测试长文章分段返回，后续分段从全文缓存读取而不重新抓取"""
+    paragraphs = [f"<p>第{i}段" + "内容" * 50 + "</p>" for i in range(40)]
+    html = ARTICLE_HTML.replace("<p>第一段</p><p>第二段</p>", "".join(paragraphs))
+    requests = []
+
+    def handler(request):
+        requests.append(request.url)
+        return httpx.Response(200, text=html)
+
+    fetcher = ArticleHttpFetcher()
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = WechatScraperClient(http_fetcher=fetcher, content_store=ArticleContentStore())
+    url = "https://mp.weixin.qq.com/s/abc"
+
+    try:
+        first = await client.get_article_chunk(url, max_chars=1500)
+        full = first["content"]
+        cursor = first["next_cursor"]
+        while cursor is not None:
+            chunk = await client.get_article_chunk(url, cursor=cursor)
+            assert chunk["content_range"]["offset"] == len(full)
+            assert len(chunk["content"]) <= 1500
+            full += chunk["content"]
+            cursor = chunk["next_cursor"]
+    finally:
+        await fetcher.aclose()
+
+    expected = await asyncio.to_thread(parse_article_details, html, url, url, True)
+    assert full == expected["content"]
+    assert len(requests) == 1
+    assert first["content"].endswith("\n")  # 在段落边界处结束
+    assert first["content_range"] == {"offset": 0, "end": len(first["content"]), "total_chars": len(full)}
+
+    # 其他文章的 cursor 不能使用
+    with pytest.raises(MCPError) as excinfo:
+        await client.get_article_chunk("https://mp.weixin.qq.com/s/other", cursor=first["next_cursor"])
+    assert excinfo.value.kind == "invalid_cursor"
+
+    markdown = ResponseFormatter.format_response(first, format="markdown", detail="detailed")
+    assert first["next_cursor"] in markdown